@@ -1,25 +1,33 @@
 from flask import Flask
 import os
 from flask_migrate import Migrate
-from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flasgger import Swagger
 from config import Config
 from extensions import db
+from utils.jwt_cache import CachingJWTManager
 from models.tokenblacklist import TokenBlacklist
 # Import all models to ensure relationships are properly configured
 from models.user import User
 from models.product import Product, Category
 from models.cart import Cart, CartItem, Invoice
 from models.order import Order, OrderItem
+from models.rollup import DailySalesRollup
+from models.sketch import DailySketch, SketchDelta
+from models.precompute import AnalyticsCacheEntry, SchedulerLease
+from models.rate_limit import RateLimitBucket
 
-jwt = JWTManager()
+jwt = CachingJWTManager()
 migrate = Migrate()
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
+    # Pool telemetry for /api/admin/metrics/db-pool; must precede engine creation
+    from utils.db_pool import init_pool_metrics
+    init_pool_metrics(app)
+
     db.init_app(app)
     jwt.init_app(app)
     migrate.init_app(app, db)
@@ -43,6 +51,22 @@ def create_app():
     def health():
         """Health check endpoint"""
         return {"status": "healthy", "message": "Backend is running"}, 200
+
+    @app.route('/health/db')
+    def health_db():
+        """Database connectivity; pool telemetry is at /api/admin/metrics/db-pool"""
+        import time
+        from sqlalchemy import text
+        started = time.perf_counter()
+        try:
+            with db.engine.connect() as conn:
+                conn.execute(text('SELECT 1'))
+        except Exception:
+            # Driver errors can name the host, user or database
+            app.logger.exception('Database health check failed')
+            return {"status": "unhealthy", "message": "Database unavailable"}, 503
+        ping_ms = round((time.perf_counter() - started) * 1000, 3)
+        return {"status": "healthy", "pingMs": ping_ms}, 200
     
     @app.route('/api/seed-database', methods=['POST'])
     def seed_database():
@@ -209,6 +233,16 @@ def create_app():
     from seed import init_app as init_seed
     init_seed(app)
 
+    # Register analytics maintenance commands
+    from commands import init_app as init_commands
+    init_commands(app)
+
+    # Background analytics precompute (ANALYTICS_PRECOMPUTE_INTERVAL > 0);
+    # a preloading gunicorn master starts it in each worker instead
+    if not app.config.get('DEFER_BACKGROUND_THREADS'):
+        from services.precompute_service import start_scheduler
+        start_scheduler(app)
+
     # JWT error handlers
     @jwt.expired_token_loader
     def expired_token_callback(jwt_header, jwt_payload):
@@ -239,8 +273,8 @@ def create_app():
 
     @jwt.token_in_blocklist_loader
     def check_if_token_revoked(jwt_header, jwt_payload):
-        jti = jwt_payload["jti"]
-        return TokenBlacklist.query.filter_by(jti=jti).first() is not None
+        from services.token_revocation import is_token_revoked
+        return is_token_revoked(jwt_payload)
 
     return app
 
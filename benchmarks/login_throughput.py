@@ -0,0 +1,97 @@
+"""
+Benchmark: login throughput under concurrency
+Fires concurrent logins at one app instance while probing /health, once
+with KDF work on the request threads (the old path) and once through the
+bounded hashing pool. Reports logins/s, latency, 503s and how slow the
+health check gets.
+Run with: python benchmarks/login_throughput.py [clients] [logins_per_client]
+"""
+import os
+import statistics
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+
+from app import create_app, db  # noqa: E402
+from models.user import User  # noqa: E402
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def inline_verify(user, password):
+    """The previous behaviour: hash on the request thread, no limit"""
+    return user.check_password(password)
+
+
+def run(label, clients, per_client, workers, queue_limit, verify=None):
+    app = create_app()
+    app.config.update(PASSWORD_HASH_WORKERS=workers, PASSWORD_HASH_QUEUE_LIMIT=queue_limit,
+                      RATE_LIMIT_ENABLED=False)
+    with app.app_context():
+        db.create_all()
+        for i in range(clients):
+            user = User(email=f'bench{i}@test.com', role='customer')
+            user.set_password('benchmark123')
+            db.session.add(user)
+        db.session.commit()
+
+    latencies, statuses, health = [], [], []
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def client(i):
+        http = app.test_client()
+        for _ in range(per_client):
+            started = time.perf_counter()
+            response = http.post('/api/auth/login', json={'email': f'bench{i}@test.com', 'password': 'benchmark123'})
+            with lock:
+                latencies.append(time.perf_counter() - started)
+                statuses.append(response.status_code)
+
+    def prober():
+        http = app.test_client()
+        while not done.is_set():
+            started = time.perf_counter()
+            http.get('/health')
+            health.append(time.perf_counter() - started)
+            time.sleep(0.01)
+
+    with mock.patch('routes.auth.verify_password', verify) if verify else nullcontext():
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+        probe = threading.Thread(target=prober)
+        started = time.perf_counter()
+        probe.start()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+        done.set()
+        probe.join()
+
+    ok = statuses.count(200)
+    print(f'{label:<22} {ok / elapsed:7.1f} logins/s  p50 {percentile(latencies, 0.5) * 1000:7.1f} ms  '
+          f'p95 {percentile(latencies, 0.95) * 1000:7.1f} ms  503s {statuses.count(503):4d}  '
+          f'health p95 {percentile(health, 0.95) * 1000:6.1f} ms (median {statistics.median(health) * 1000:.1f})')
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+def main(clients=32, per_client=5):
+    print(f'{clients} concurrent clients x {per_client} logins, scrypt:32768:8:1')
+    run('inline (old path)', clients, per_client, workers=4, queue_limit=1000, verify=inline_verify)
+    run('pool 4, no limit', clients, per_client, workers=4, queue_limit=1000)
+    run('pool 4, queue 8', clients, per_client, workers=4, queue_limit=8)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
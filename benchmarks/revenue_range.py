@@ -0,0 +1,95 @@
+"""
+Benchmark: date-range revenue totals
+Compares a scan of orders, a sum over daily_sales_rollup and the prefix-sum
+revenue index for random ranges.
+Run with: python benchmarks/revenue_range.py [orders] [queries]
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+
+from sqlalchemy import func  # noqa: E402
+from app import create_app, db  # noqa: E402
+from models.order import Order, OrderItem  # noqa: E402
+from models.rollup import DailySalesRollup  # noqa: E402
+from services.revenue_index import build_revenue_index  # noqa: E402
+from services.rollup_service import rebuild_rollup  # noqa: E402
+
+CATEGORIES = ('Men', 'Women', 'Children', 'Accessories')
+DAYS = 730
+
+
+def seed(order_count):
+    rng = random.Random(35)
+    origin = datetime.utcnow() - timedelta(days=DAYS)
+    orders, items = [], []
+    for order_id in range(1, order_count + 1):
+        created = origin + timedelta(seconds=rng.randrange(DAYS * 86400))
+        lines = [(rng.choice(CATEGORIES), rng.randint(1, 3), rng.randint(10, 200)) for _ in range(rng.randint(1, 4))]
+        total = sum(q * p for _, q, p in lines)
+        orders.append({
+            'id': order_id, 'user_id': 1, 'items': '[]', 'subtotal': total,
+            'total_amount': total, 'status': 'delivered', 'created_at': created
+        })
+        for category, quantity, price in lines:
+            items.append({
+                'order_id': order_id, 'product_id': 1, 'product_name': 'Item',
+                'category_name': category, 'quantity': quantity,
+                'unit_price': price, 'total_price': quantity * price
+            })
+    db.session.execute(Order.__table__.insert(), orders)
+    db.session.execute(OrderItem.__table__.insert(), items)
+    db.session.commit()
+    return origin.date()
+
+
+def timed(label, ranges, run):
+    started = time.perf_counter()
+    for start, end in ranges:
+        run(start, end)
+    elapsed = time.perf_counter() - started
+    print(f'{label:<12} {elapsed * 1000:10.1f} ms total  {elapsed / len(ranges) * 1e6:10.1f} us/query')
+
+
+def main(order_count=50000, query_count=500):
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        origin = seed(order_count)
+        rebuild_rollup()
+        db.session.commit()
+
+        rng = random.Random(17)
+        ranges = []
+        for _ in range(query_count):
+            start = origin + timedelta(days=rng.randrange(DAYS))
+            ranges.append((start, start + timedelta(days=rng.randint(1, 120))))
+
+        def orders_scan(start, end):
+            return db.session.query(func.count(Order.id), func.sum(Order.total_amount)).filter(
+                Order.created_at >= start, Order.created_at < end
+            ).one()
+
+        def rollup_sum(start, end):
+            return db.session.query(func.sum(DailySalesRollup.order_count), func.sum(DailySalesRollup.revenue)).filter(
+                DailySalesRollup.category == DailySalesRollup.ALL_CATEGORIES,
+                DailySalesRollup.date >= start, DailySalesRollup.date < end
+            ).one()
+
+        started = time.perf_counter()
+        index = build_revenue_index()
+        print(f'{order_count} orders, {query_count} ranges; index built in '
+              f'{(time.perf_counter() - started) * 1000:.1f} ms ({index.days} days)')
+
+        timed('orders scan', ranges, orders_scan)
+        timed('rollup sum', ranges, rollup_sum)
+        timed('index', ranges, index.range_total)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,133 @@
+"""
+Maintenance commands
+Run with: flask analytics <command>, flask tokens <command>,
+flask ratelimit <command> or flask users <command>
+"""
+import click
+from flask.cli import AppGroup
+from extensions import db
+
+analytics_cli = AppGroup('analytics', help='Analytics maintenance commands.')
+tokens_cli = AppGroup('tokens', help='JWT blacklist maintenance commands.')
+ratelimit_cli = AppGroup('ratelimit', help='Rate limit maintenance commands.')
+users_cli = AppGroup('users', help='User account maintenance commands.')
+
+
+@analytics_cli.command('rebuild-rollup')
+@click.option('--since', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Only rebuild days on or after this date (YYYY-MM-DD).')
+def rebuild_rollup_command(since):
+    """Backfill or rebuild the daily sales rollup from orders."""
+    from services.rollup_service import rebuild_rollup
+
+    rows = rebuild_rollup(since.date() if since else None)
+    db.session.commit()
+    click.echo(f'✅ Rebuilt daily_sales_rollup: {rows} rows')
+
+
+
+@analytics_cli.command('rebuild-sketches')
+@click.option('--since', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Only rebuild days on or after this date (YYYY-MM-DD).')
+def rebuild_sketches_command(since):
+    """Backfill or rebuild the daily customer and order value sketches."""
+    from services.sketch_service import rebuild_sketches
+
+    rows = rebuild_sketches(since.date() if since else None)
+    db.session.commit()
+    click.echo(f'✅ Rebuilt daily_sketches: {rows} rows')
+
+
+@analytics_cli.command('compact-sketches')
+def compact_sketches_command():
+    """Fold sketch deltas recorded at checkout into daily_sketches."""
+    from services.sketch_service import compact_sketches
+
+    folded = compact_sketches()
+    click.echo(f'✅ Folded {folded} sketch deltas into daily_sketches')
+
+
+
+@analytics_cli.command('precompute')
+def precompute_command():
+    """Recompute the shared analytics cache once."""
+    from flask import current_app
+    from services.precompute_service import run_precompute
+
+    written = run_precompute(current_app.config)
+    click.echo(f'✅ Precomputed {written} analytics cache entries')
+
+
+@tokens_cli.command('purge')
+@click.option('--batch-size', default=1000, show_default=True,
+              help='Rows deleted per transaction.')
+def purge_tokens_command(batch_size):
+    """Delete blacklist rows of tokens that have expired."""
+    from services.token_revocation import purge_expired_tokens
+
+    deleted = purge_expired_tokens(batch_size=batch_size)
+    click.echo(f'✅ Purged {deleted} expired token_blacklist rows')
+
+
+@ratelimit_cli.command('purge')
+def purge_rate_limits_command():
+    """Delete shared rate limit buckets that have refilled completely."""
+    from utils.rate_limit import DatabaseStore
+
+    deleted = DatabaseStore().purge()
+    click.echo(f'✅ Purged {deleted} rate_limit_buckets rows')
+
+
+@users_cli.command('resolve-email-duplicates')
+@click.option('--merge', 'keep_id', type=int, metavar='USER_ID',
+              help="Merge the other accounts sharing this account's email into it.")
+@click.option('--rename', type=(int, str), metavar='USER_ID EMAIL',
+              help='Give an account a different email address.')
+def resolve_email_duplicates_command(keep_id, rename):
+    """
+    List, merge or rename accounts whose emails differ only in case.
+    Without options, reports each group by user id. These must be
+    resolved before the unique lower(email) migration can run.
+    """
+    from services.user_service import find_email_duplicates, merge_users, rename_user_email
+
+    groups = find_email_duplicates()
+    try:
+        if keep_id is not None:
+            group = next((g for g in groups if keep_id in [row.id for row in g]), None)
+            if group is None:
+                raise click.ClickException(f'User {keep_id} has no duplicate accounts')
+            merged = [row.id for row in group if row.id != keep_id]
+            merge_users(keep_id, merged)
+            db.session.commit()
+            click.echo(f'✅ Merged users {merged} into user {keep_id}')
+            return
+        if rename:
+            user_id, email = rename
+            rename_user_email(user_id, email)
+            db.session.commit()
+            click.echo(f'✅ Renamed user {user_id}')
+            return
+    except ValueError as e:
+        db.session.rollback()
+        raise click.ClickException(str(e))
+
+    if not groups:
+        click.echo('✅ No duplicate emails')
+        return
+    for number, group in enumerate(groups, 1):
+        accounts = ', '.join(
+            f'id={row.id} role={row.role} orders={row.orders} created={row.created_at:%Y-%m-%d}'
+            if row.created_at else f'id={row.id} role={row.role} orders={row.orders}'
+            for row in group
+        )
+        click.echo(f'Group {number}: {accounts}')
+    click.echo(f'{len(groups)} groups; resolve each with --merge USER_ID or --rename USER_ID EMAIL')
+
+
+def init_app(app):
+    """Register maintenance commands with Flask app."""
+    app.cli.add_command(analytics_cli)
+    app.cli.add_command(tokens_cli)
+    app.cli.add_command(ratelimit_cli)
+    app.cli.add_command(users_cli)
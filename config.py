@@ -1,6 +1,20 @@
 import os
 from datetime import timedelta
 
+
+def engine_options(url, pool_options, statement_timeout_ms):
+    """
+    SQLAlchemy engine options for one database URL: the pool settings
+    (not applied to SQLite) and, on Postgres, the statement timeout
+    """
+    if url.startswith('sqlite'):
+        return {}
+    connect_args = {}
+    if url.startswith('postgresql') and statement_timeout_ms:
+        connect_args['options'] = f'-c statement_timeout={statement_timeout_ms}'
+    return dict(pool_options, connect_args=connect_args)
+
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key'
     # Render uses postgres:// but SQLAlchemy needs postgresql://
@@ -9,9 +23,92 @@ class Config:
         database_url = database_url.replace('postgres://', 'postgresql://', 1)
     SQLALCHEMY_DATABASE_URI = database_url
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Connection pool per worker process. Size it to the request threads
+    # of one worker (GUNICORN_THREADS) plus one for the precompute thread;
+    # overflow absorbs bursts. Not applied to SQLite.
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', int(os.environ.get('GUNICORN_THREADS', 4)) + 1))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 5))
+    # Seconds to wait for a free connection before failing the request
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+    # Seconds before a connection is replaced (below server/proxy idle timeouts)
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    # Postgres statement_timeout in milliseconds (0 disables)
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+    pool_options = {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': DB_POOL_PRE_PING
+    }
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(database_url, pool_options, DB_STATEMENT_TIMEOUT_MS)
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+    # Seconds analytics results are cached per worker (0 disables)
+    ANALYTICS_CACHE_TTL = int(os.environ.get('ANALYTICS_CACHE_TTL', 30))
+    # Seconds before a worker rebuilds its prefix-sum revenue index
+    REVENUE_INDEX_MAX_AGE = int(os.environ.get('REVENUE_INDEX_MAX_AGE', 60))
+    # Seconds between background analytics precomputes (0 disables)
+    ANALYTICS_PRECOMPUTE_INTERVAL = int(os.environ.get('ANALYTICS_PRECOMPUTE_INTERVAL', 0))
+    # Leave the precompute thread to be started after fork (set by
+    # gunicorn.conf.py when the app is preloaded in the master)
+    DEFER_BACKGROUND_THREADS = os.environ.get('DEFER_BACKGROUND_THREADS', 'false').lower() == 'true'
+    # Sketch deltas a worker records before it compacts them after a
+    # checkout (0 leaves compaction to the precompute job and the CLI)
+    SKETCH_COMPACT_THRESHOLD = int(os.environ.get('SKETCH_COMPACT_THRESHOLD', 1000))
+    # Precomputed analytics windows: a bare granularity is the window the
+    # endpoints default to for it (no from/to); days:granularity is the
+    # last `days` days, read only by requests with that aligned `from`
+    ANALYTICS_PRECOMPUTE_WINDOWS = os.environ.get('ANALYTICS_PRECOMPUTE_WINDOWS', 'day,hour,week,month')
+    # Seconds before a logout on one worker is seen by the others
+    TOKEN_REVOCATION_REFRESH_INTERVAL = float(os.environ.get('TOKEN_REVOCATION_REFRESH_INTERVAL', 5))
+    # Seconds between full reloads, bounding the delay for revocations
+    # that committed out of id order beyond the refresh overlap
+    TOKEN_REVOCATION_FULL_RELOAD_INTERVAL = float(os.environ.get('TOKEN_REVOCATION_FULL_RELOAD_INTERVAL', 300))
+    # Bloom-filter hits whose database answer is remembered per worker
+    TOKEN_REVOCATION_LRU_SIZE = int(os.environ.get('TOKEN_REVOCATION_LRU_SIZE', 10000))
+    # Verified tokens whose claims are remembered per worker (0 disables)
+    JWT_DECODE_CACHE_SIZE = int(os.environ.get('JWT_DECODE_CACHE_SIZE', 10000))
+    # 'claims' authorizes from the signed role claim plus a cached security
+    # epoch; 'database' loads the user on every protected request
+    AUTHZ_MODE = os.environ.get('AUTHZ_MODE', 'claims')
+    # Seconds a role change or deletion may take to reach other workers
+    SECURITY_EPOCH_CACHE_TTL = int(os.environ.get('SECURITY_EPOCH_CACHE_TTL', 30))
+    # Werkzeug method and cost for new password hashes; older hashes are
+    # upgraded on the next successful login
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    # Per-worker hashing threads, and how many more requests may wait for one
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 4))
+    PASSWORD_HASH_QUEUE_LIMIT = int(os.environ.get('PASSWORD_HASH_QUEUE_LIMIT', 32))
+    # Admission control for login, register and checkout; limits are
+    # 'count/period' with period second, minute, hour or day
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    # 'memory' keeps buckets per worker process, so each limit is allowed
+    # once per worker; 'database' shares them across workers and nodes.
+    # gunicorn.conf.py defaults to 'database' when it runs several workers
+    RATE_LIMIT_STORAGE = os.environ.get('RATE_LIMIT_STORAGE', 'memory')
+    RATE_LIMIT_MEMORY_KEYS = int(os.environ.get('RATE_LIMIT_MEMORY_KEYS', 100000))
+    # Trusted proxies in front of the app (client IP is read from X-Forwarded-For)
+    RATE_LIMIT_PROXY_HOPS = int(os.environ.get('RATE_LIMIT_PROXY_HOPS', 0))
+    RATE_LIMIT_LOGIN_IP = os.environ.get('RATE_LIMIT_LOGIN_IP', '30/minute')
+    RATE_LIMIT_LOGIN_EMAIL = os.environ.get('RATE_LIMIT_LOGIN_EMAIL', '5/minute')
+    RATE_LIMIT_REGISTER_IP = os.environ.get('RATE_LIMIT_REGISTER_IP', '10/hour')
+    RATE_LIMIT_CHECKOUT_USER = os.environ.get('RATE_LIMIT_CHECKOUT_USER', '10/minute')
+    # Optional read replica for analytics, admin listings and exports
+    replica_url = os.environ.get('REPLICA_DATABASE_URL')
+    if replica_url and replica_url.startswith('postgres://'):
+        replica_url = replica_url.replace('postgres://', 'postgresql://', 1)
+    # SQLALCHEMY_ENGINE_OPTIONS only configure the primary; the replica
+    # gets options for its own URL, which may use another driver
+    SQLALCHEMY_BINDS = {
+        'replica': dict(engine_options(replica_url, pool_options, DB_STATEMENT_TIMEOUT_MS), url=replica_url)
+    } if replica_url else {}
+    # Replica reads fall back to the primary beyond this lag (seconds)
+    REPLICA_MAX_LAG = float(os.environ.get('REPLICA_MAX_LAG', 30))
+    # Seconds between replica health/lag checks per worker
+    REPLICA_CHECK_INTERVAL = float(os.environ.get('REPLICA_CHECK_INTERVAL', 10))
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -22,6 +119,7 @@ class TestingConfig(Config):
     # Use SQLite for testing to avoid PostgreSQL dependency
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     JWT_SECRET_KEY = 'test-jwt-secret'
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
     WTF_CSRF_ENABLED = False
 
 class ProductionConfig(Config):
@@ -30,6 +128,7 @@ class ProductionConfig(Config):
     if database_url and database_url.startswith('postgres://'):
         database_url = database_url.replace('postgres://', 'postgresql://', 1)
     SQLALCHEMY_DATABASE_URI = database_url
+    RATE_LIMIT_STORAGE = os.environ.get('RATE_LIMIT_STORAGE', 'database')
     
 # Configuration dictionary
 config = {
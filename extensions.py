@@ -3,12 +3,30 @@ Flask Extensions Module
 Initializes database, JWT, CORS, and migrations
 """
 
+from flask import g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_jwt_extended import JWTManager
 
 from flask_migrate import Migrate
 
-db = SQLAlchemy()
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to the replica engine chosen for the current
+    request (see utils.replica). Flushes and INSERT/UPDATE/DELETE
+    statements always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context() and not self._flushing:
+            replica = g.get('read_replica')
+            if replica is not None and not getattr(clause, 'is_dml', False):
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 jwt = JWTManager()
 
 migrate = Migrate()
@@ -0,0 +1,109 @@
+"""
+Gunicorn configuration
+Run with: gunicorn -c gunicorn.conf.py app:app
+
+Sizing comes from the CPUs available to the process and can be
+overridden with env vars:
+
+  GUNICORN_PROFILE      gthread (default) or gevent
+  WEB_CONCURRENCY       worker processes
+  GUNICORN_THREADS      threads per gthread worker (also sizes the DB pool)
+  GUNICORN_WORKER_CONNECTIONS  concurrent greenlets per gevent worker
+  GUNICORN_PRELOAD      load the app once in the master (default true)
+  GUNICORN_MAX_REQUESTS / GUNICORN_MAX_REQUESTS_JITTER  worker recycling
+  GUNICORN_TIMEOUT      seconds before a silent worker is restarted
+
+With more than one worker RATE_LIMIT_STORAGE defaults to 'database', so
+that rate limits hold per deployment rather than per worker process.
+
+The gevent profile needs gevent installed (and psycogreen for
+cooperative Postgres I/O); set DB_POOL_SIZE to the expected concurrent
+database users per worker, since the GUNICORN_THREADS default does not
+apply.
+"""
+
+import gc
+import os
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+PROFILE = os.environ.get('GUNICORN_PROFILE', 'gthread')
+if PROFILE not in ('gthread', 'gevent'):
+    raise ValueError(f'Unknown GUNICORN_PROFILE: {PROFILE}')
+
+cpus = _cpu_count()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+worker_class = PROFILE
+if PROFILE == 'gthread':
+    # Requests mostly wait on the database, so a few threads per process
+    # keep each core busy without the memory of extra processes
+    workers = _env_int('WEB_CONCURRENCY', cpus * 2 + 1)
+    threads = _env_int('GUNICORN_THREADS', 4)
+else:
+    workers = _env_int('WEB_CONCURRENCY', cpus + 1)
+    worker_connections = _env_int('GUNICORN_WORKER_CONNECTIONS', 100)
+
+# In-memory rate limit buckets are per worker, which would multiply every
+# limit by the worker count; share them through the database instead
+if workers > 1:
+    os.environ.setdefault('RATE_LIMIT_STORAGE', 'database')
+
+# Load the app once in the master and share its memory with the workers
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+if preload_app:
+    # Threads do not survive fork; post_fork starts them in each worker
+    os.environ['DEFER_BACKGROUND_THREADS'] = 'true'
+    if PROFILE == 'gevent':
+        # Patch before the app imports socket/threading in the master
+        from gevent import monkey
+        monkey.patch_all()
+
+# Recycle workers to bound slow leaks; jitter keeps them from restarting together
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', max(1, max_requests // 10))
+
+timeout = _env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    if preload_app:
+        # Move everything imported so far to the permanent generation, so
+        # that collections in the workers do not write to (and so copy)
+        # the pages shared with the master
+        gc.collect()
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if not preload_app:
+        return
+    from extensions import db
+    from services.precompute_service import start_scheduler
+
+    app = server.app.wsgi()
+    with app.app_context():
+        # Connections opened in the master belong to it; drop them from
+        # this worker's pools without closing the master's sockets
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    # Thread pools created before the fork have no threads in the child
+    app.extensions.pop('password_hasher', None)
+    start_scheduler(app)
@@ -0,0 +1,40 @@
+"""add analytics_cache and scheduler_leases tables
+
+Revision ID: 3d7c1e9f0b52
+Revises: 9b3e5f1a7c20
+Create Date: 2026-10-19 15:37:49.204117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d7c1e9f0b52'
+down_revision = '9b3e5f1a7c20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('analytics_cache',
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('value', sa.Text(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index('ix_analytics_cache_expires_at', 'analytics_cache', ['expires_at'], unique=False)
+
+    op.create_table('scheduler_leases',
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('holder', sa.String(length=255), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('scheduler_leases')
+    op.drop_index('ix_analytics_cache_expires_at', table_name='analytics_cache')
+    op.drop_table('analytics_cache')
@@ -0,0 +1,26 @@
+"""add orders (status, created_at) and (payment_status, created_at) indexes
+
+Revision ID: 5e9b7d2c4a10
+Revises: a3c1f0e27b41
+Create Date: 2026-10-19 10:03:51.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e9b7d2c4a10'
+down_revision = 'a3c1f0e27b41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_orders_status_created_at', 'orders', ['status', 'created_at'], unique=False)
+    op.create_index('ix_orders_payment_status_created_at', 'orders', ['payment_status', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_orders_payment_status_created_at', table_name='orders')
+    op.drop_index('ix_orders_status_created_at', table_name='orders')
@@ -0,0 +1,27 @@
+"""add token_blacklist.expires_at
+
+Revision ID: 6a4f2d8e1c73
+Revises: 3d7c1e9f0b52
+Create Date: 2026-10-19 16:21:35.730914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a4f2d8e1c73'
+down_revision = '3d7c1e9f0b52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('token_blacklist', sa.Column('expires_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_token_blacklist_expires_at', 'token_blacklist', ['expires_at'], unique=False)
+    # Existing rows keep a NULL expiry; the purge removes them by created_at
+
+
+def downgrade():
+    op.drop_index('ix_token_blacklist_expires_at', table_name='token_blacklist')
+    op.drop_column('token_blacklist', 'expires_at')
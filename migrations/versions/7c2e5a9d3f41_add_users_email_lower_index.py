@@ -0,0 +1,28 @@
+"""add lower(email) index on users
+
+Revision ID: 7c2e5a9d3f41
+Revises: e4b9a7c2d518
+Create Date: 2026-10-19 19:04:27.518302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2e5a9d3f41'
+down_revision = 'e4b9a7c2d518'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # text_pattern_ops so that LIKE 'prefix%' can use the index under any collation
+        op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email) text_pattern_ops')], unique=False)
+    else:
+        op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_users_email_lower', table_name='users')
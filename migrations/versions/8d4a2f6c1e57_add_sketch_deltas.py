@@ -0,0 +1,33 @@
+"""add sketch_deltas table
+
+Revision ID: 8d4a2f6c1e57
+Revises: c3f8d1a6b294
+Create Date: 2026-10-19 21:37:52.904316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d4a2f6c1e57'
+down_revision = 'c3f8d1a6b294'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sketch_deltas',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('total_amount', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_sketch_deltas_date', 'sketch_deltas', ['date'], unique=False)
+
+
+def downgrade():
+    # Unfolded deltas are lost; run `flask analytics compact-sketches` first
+    op.drop_index('ix_sketch_deltas_date', table_name='sketch_deltas')
+    op.drop_table('sketch_deltas')
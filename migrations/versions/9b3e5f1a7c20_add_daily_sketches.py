@@ -0,0 +1,61 @@
+"""add daily_sketches table
+
+Revision ID: 9b3e5f1a7c20
+Revises: f2a8d4b61c95
+Create Date: 2026-10-19 14:02:11.518204
+
+The sketches of existing orders are built in the same upgrade (the same
+computation as `flask analytics rebuild-sketches`), so customer counts
+and order value percentiles are complete as soon as the release step
+has run.
+"""
+from collections import defaultdict
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+from utils.sketches import DDSketch, HyperLogLog
+
+
+# revision identifiers, used by Alembic.
+revision = '9b3e5f1a7c20'
+down_revision = 'f2a8d4b61c95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_sketches',
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('date', 'name')
+    )
+    _backfill(op.get_bind())
+
+
+def _backfill(conn):
+    by_day = defaultdict(lambda: (HyperLogLog(), DDSketch()))
+    result = conn.execution_options(stream_results=True, yield_per=5000).execute(sa.text(
+        'SELECT date(created_at), user_id, total_amount FROM orders WHERE created_at IS NOT NULL'
+    ))
+    for day, user_id, total_amount in result:
+        customers, order_value = by_day[day]
+        customers.add(user_id)
+        order_value.add(total_amount or 0)
+    if not by_day:
+        return
+    now = datetime.utcnow()
+    table = sa.table('daily_sketches', sa.column('date', sa.Date), sa.column('name', sa.String),
+                     sa.column('data', sa.LargeBinary), sa.column('updated_at', sa.DateTime))
+    rows = []
+    for day, (customers, order_value) in by_day.items():
+        if isinstance(day, str):
+            day = datetime.strptime(day, '%Y-%m-%d').date()
+        rows.append({'date': day, 'name': 'customers', 'data': customers.to_bytes(), 'updated_at': now})
+        rows.append({'date': day, 'name': 'order_value', 'data': order_value.to_bytes(), 'updated_at': now})
+    op.bulk_insert(table, rows)
+
+
+def downgrade():
+    op.drop_table('daily_sketches')
@@ -0,0 +1,24 @@
+"""add orders (user_id, created_at) index
+
+Revision ID: a3c1f0e27b41
+Revises: d8bfb73f5322
+Create Date: 2026-10-19 09:12:04.118230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c1f0e27b41'
+down_revision = 'd8bfb73f5322'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_orders_user_id_created_at', 'orders', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_orders_user_id_created_at', table_name='orders')
@@ -0,0 +1,24 @@
+"""add users.security_epoch
+
+Revision ID: b85e0c3a9f16
+Revises: 6a4f2d8e1c73
+Create Date: 2026-10-19 17:05:12.441806
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b85e0c3a9f16'
+down_revision = '6a4f2d8e1c73'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('security_epoch', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    op.drop_column('users', 'security_epoch')
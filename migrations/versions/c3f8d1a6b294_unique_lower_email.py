@@ -0,0 +1,63 @@
+"""make users emails case-insensitively unique
+
+Revision ID: c3f8d1a6b294
+Revises: 7c2e5a9d3f41
+Create Date: 2026-10-19 19:48:36.120947
+
+Accounts whose emails differ only in case or surrounding whitespace
+cannot be merged safely (they may belong to different people or roles),
+so the upgrade stops and lists their user ids; resolve them with
+`flask users resolve-email-duplicates` and run it again.
+Every email is then stored lowercase and the lower(email) index becomes
+unique.
+"""
+import logging
+from collections import defaultdict
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f8d1a6b294'
+down_revision = '7c2e5a9d3f41'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+
+def _check_duplicates(conn):
+    groups = defaultdict(list)
+    for user_id, email in conn.execute(sa.text('SELECT id, email FROM users ORDER BY id')):
+        groups[email.strip().lower()].append(user_id)
+    conflicts = [ids for ids in groups.values() if len(ids) > 1]
+    if not conflicts:
+        return
+    # User ids only: the deploy log is no place for email addresses
+    for ids in conflicts:
+        logger.error('Accounts sharing an email: user ids %s', ', '.join(map(str, ids)))
+    raise RuntimeError(
+        f'{len(conflicts)} emails are used by more than one account when case is ignored. '
+        f'Resolve them with `flask users resolve-email-duplicates`, then rerun the upgrade.'
+    )
+
+
+def upgrade():
+    conn = op.get_bind()
+    _check_duplicates(conn)
+    conn.execute(sa.text('UPDATE users SET email = lower(trim(email)) WHERE email <> lower(trim(email))'))
+
+    op.drop_index('ix_users_email_lower', table_name='users')
+    if conn.dialect.name == 'postgresql':
+        op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email) text_pattern_ops')], unique=True)
+    else:
+        op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')], unique=True)
+
+
+def downgrade():
+    # Original email casing is not restored
+    op.drop_index('ix_users_email_lower', table_name='users')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email) text_pattern_ops')], unique=False)
+    else:
+        op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')], unique=False)
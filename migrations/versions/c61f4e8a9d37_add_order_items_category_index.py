@@ -0,0 +1,25 @@
+"""add order_items (order_id, category_name, total_price) index
+
+Revision ID: c61f4e8a9d37
+Revises: 5e9b7d2c4a10
+Create Date: 2026-10-19 10:41:27.730561
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c61f4e8a9d37'
+down_revision = '5e9b7d2c4a10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_order_items_order_id_category_name', 'order_items',
+                    ['order_id', 'category_name', 'total_price'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_order_items_order_id_category_name', table_name='order_items')
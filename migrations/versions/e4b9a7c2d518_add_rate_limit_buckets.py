@@ -0,0 +1,32 @@
+"""add rate_limit_buckets table
+
+Revision ID: e4b9a7c2d518
+Revises: b85e0c3a9f16
+Create Date: 2026-10-19 18:12:05.631874
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b9a7c2d518'
+down_revision = 'b85e0c3a9f16'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('rate_limit_buckets',
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('tokens', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.Float(), nullable=False),
+    sa.Column('resets_at', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index('ix_rate_limit_buckets_resets_at', 'rate_limit_buckets', ['resets_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_rate_limit_buckets_resets_at', table_name='rate_limit_buckets')
+    op.drop_table('rate_limit_buckets')
@@ -0,0 +1,59 @@
+"""add daily_sales_rollup table
+
+Revision ID: f2a8d4b61c95
+Revises: c61f4e8a9d37
+Create Date: 2026-10-19 11:26:44.019382
+
+The table is backfilled from existing orders in the same upgrade, with the
+same aggregation as `flask analytics rebuild-rollup`, so analytics read
+complete totals as soon as the release step has run.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a8d4b61c95'
+down_revision = 'c61f4e8a9d37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_sales_rollup',
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('category', sa.String(length=100), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('line_count', sa.Integer(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('date', 'category', 'status')
+    )
+    # Order-level totals under category '*'
+    op.execute("""
+        INSERT INTO daily_sales_rollup (date, category, status, order_count, line_count, units, revenue)
+        SELECT date(o.created_at), '*', coalesce(o.status, 'pending'), count(o.id),
+               coalesce(sum(p.lines), 0), coalesce(sum(p.units), 0), coalesce(sum(o.total_amount), 0)
+        FROM orders o
+        LEFT JOIN (
+            SELECT order_id, count(id) AS lines, sum(quantity) AS units
+            FROM order_items GROUP BY order_id
+        ) p ON p.order_id = o.id
+        WHERE o.created_at IS NOT NULL
+        GROUP BY date(o.created_at), coalesce(o.status, 'pending')
+    """)
+    # Order lines per category
+    op.execute("""
+        INSERT INTO daily_sales_rollup (date, category, status, order_count, line_count, units, revenue)
+        SELECT date(o.created_at), coalesce(i.category_name, 'Uncategorized'), coalesce(o.status, 'pending'),
+               count(DISTINCT o.id), count(i.id), coalesce(sum(i.quantity), 0), coalesce(sum(i.total_price), 0)
+        FROM order_items i
+        JOIN orders o ON o.id = i.order_id
+        WHERE o.created_at IS NOT NULL
+        GROUP BY date(o.created_at), coalesce(i.category_name, 'Uncategorized'), coalesce(o.status, 'pending')
+    """)
+
+
+def downgrade():
+    op.drop_table('daily_sales_rollup')
@@ -8,5 +8,9 @@ from models.user import User
 from models.product import Product, Category
 from models.cart import Cart, CartItem, Invoice
 from models.order import Order, OrderItem
+from models.rollup import DailySalesRollup
+from models.sketch import DailySketch, SketchDelta
+from models.precompute import AnalyticsCacheEntry, SchedulerLease
 
-__all__ = ['db', 'User', 'Product', 'Category', 'Cart', 'CartItem', 'Invoice', 'Order', 'OrderItem']
\ No newline at end of file
+__all__ = ['db', 'User', 'Product', 'Category', 'Cart', 'CartItem', 'Invoice', 'Order', 'OrderItem', 'DailySalesRollup', 'DailySketch', 'SketchDelta',
+           'AnalyticsCacheEntry', 'SchedulerLease']
\ No newline at end of file
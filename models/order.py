@@ -7,9 +7,27 @@ from datetime import datetime
 from extensions import db
 import json
 
+
+def _copy_json(value):
+    """
+    Copy a parsed items or address payload: the list and the records in
+    it, or the dict. Both are flat records, and copying them costs far
+    less than copy.deepcopy or parsing again.
+    """
+    if isinstance(value, list):
+        return [dict(item) if isinstance(item, dict) else item for item in value]
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
 class OrderItem(db.Model):
     """Individual order line item"""
     __tablename__ = 'order_items'
+    __table_args__ = (
+        # Covers the orders join + GROUP BY category in the analytics service
+        db.Index('ix_order_items_order_id_category_name', 'order_id', 'category_name', 'total_price'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False, index=True)
@@ -43,6 +61,13 @@ class OrderItem(db.Model):
 class Order(db.Model):
     """Customer order model"""
     __tablename__ = 'orders'
+    __table_args__ = (
+        # Customer order history: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+        db.Index('ix_orders_user_id_created_at', 'user_id', 'created_at'),
+        # Admin listings filtered by status / payment status, newest first
+        db.Index('ix_orders_status_created_at', 'status', 'created_at'),
+        db.Index('ix_orders_payment_status_created_at', 'payment_status', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
@@ -63,13 +88,29 @@ class Order(db.Model):
     user = db.relationship('User', backref=db.backref('orders', lazy='dynamic'))
     order_items = db.relationship('OrderItem', back_populates='order', cascade='all, delete-orphan')
     
+    def _parsed_json(self, column):
+        """
+        Parse a JSON text column once per instance.
+        The result is cached against the raw string, so assigning a new
+        value to the column invalidates it automatically. Each call
+        returns a copy (see _copy_json), so a caller enriching the items
+        of a to_dict() result cannot change the cached value.
+        """
+        raw = getattr(self, column)
+        if not isinstance(raw, str):
+            return raw
+        cache = self.__dict__.setdefault('_json_cache', {})
+        cached = cache.get(column)
+        if cached is None or cached[0] is not raw:
+            cached = (raw, json.loads(raw) if raw else None)
+            cache[column] = cached
+        return _copy_json(cached[1])
+    
     # Property to access items as dict
     @property
     def items_dict(self):
         """Return items as parsed JSON dict."""
-        if isinstance(self.items, str):
-            return json.loads(self.items)
-        return self.items
+        return self._parsed_json('items')
     
     @items_dict.setter
     def items_dict(self, value):
@@ -80,9 +121,7 @@ class Order(db.Model):
     @property
     def address_dict(self):
         """Return shipping_address as parsed JSON dict."""
-        if isinstance(self.shipping_address, str):
-            return json.loads(self.shipping_address) if self.shipping_address else None
-        return self.shipping_address
+        return self._parsed_json('shipping_address')
     
     @address_dict.setter
     def address_dict(self, value):
@@ -94,12 +133,14 @@ class Order(db.Model):
         timestamp = datetime.utcnow().strftime('%Y%m%d%H%M%S')
         self.invoice_number = f'INV-{timestamp}-{self.id}'
     
-    def to_dict(self):
+    def to_dict(self, user=None):
+        if user is None:
+            user = self.user
         return {
             'id': self.id,
             'invoice_number': self.invoice_number,
             'customerId': self.user_id,
-            'items': self.items_dict if isinstance(self.items, str) else self.items,
+            'items': self.items_dict,
             'totalAmount': float(self.total_amount),
             'subtotal': float(self.subtotal) if self.subtotal else float(self.total_amount),
             'shippingFee': float(self.shipping_fee),
@@ -108,13 +149,40 @@ class Order(db.Model):
             'createdAt': self.created_at.isoformat() if self.created_at else None,
             'updatedAt': self.updated_at.isoformat() if self.updated_at else None,
             'customer': {
-                'name': self.user.name if self.user else 'Unknown',
-                'email': self.user.email if self.user else 'unknown@example.com',
-                'phone': self.user.phone if hasattr(self.user, 'phone') and self.user.phone else 'N/A'
+                'name': getattr(user, 'name', None) or 'Unknown',
+                'email': user.email if user else 'unknown@example.com',
+                'phone': getattr(user, 'phone', None) or 'N/A'
             },
             'shippingAddress': self.address_dict
         }
     
+    @staticmethod
+    def to_dict_list(orders):
+        """
+        Serialize a list of orders, loading all their customers in one query
+        instead of one lazy load per order.
+        """
+        from models.user import User
+        user_ids = {
+            order.user_id for order in orders
+            if order.user_id is not None and 'user' in db.inspect(order).unloaded
+        }
+        users = {}
+        if user_ids:
+            users = {user.id: user for user in User.query.filter(User.id.in_(user_ids))}
+        return [order.to_dict(user=users.get(order.user_id)) for order in orders]
+    
+    def to_summary_dict(self):
+        """Lightweight representation for order history lists, without item or address payloads"""
+        return {
+            'id': self.id,
+            'invoice_number': self.invoice_number,
+            'totalAmount': float(self.total_amount),
+            'status': self.status,
+            'paymentStatus': self.payment_status,
+            'createdAt': self.created_at.isoformat() if self.created_at else None
+        }
+    
     def calculate_totals(self):
         """Calculate subtotal and total_amount from order_items"""
         if self.order_items:
@@ -122,59 +190,91 @@ class Order(db.Model):
             self.total_amount = self.subtotal + (self.shipping_fee or 0)
     
     @staticmethod
-    def create_from_cart(user_id, cart_items, shipping_address=None, payment_method=None):
+    def _build_from_cart(cart_items):
         """
-        Create an order from cart items
-        cart_items should be a list of dictionaries with:
-        - product_id
-        - product_name
-        - quantity
-        - unit_price
-        - category_name
+        Single pass over cart data producing the subtotal, the JSON
+        snapshot stored in `items` and plain row dicts for `order_items`
         """
-        # Calculate totals
-        subtotal = sum(item['unit_price'] * item['quantity'] for item in cart_items)
+        subtotal = 0
+        items_data = []
+        item_rows = []
+        for item in cart_items:
+            line_total = item['unit_price'] * item['quantity']
+            category_name = item.get('category_name', 'Uncategorized')
+            image = item.get('product_image', '')
+            subtotal += line_total
+            items_data.append({
+                'product_id': item['product_id'],
+                'name': item['product_name'],
+                'price': float(item['unit_price']),
+                'quantity': item['quantity'],
+                'category_name': category_name,
+                'image': image
+            })
+            item_rows.append({
+                'product_id': item['product_id'],
+                'product_name': item['product_name'],
+                'product_image': image,
+                'quantity': item['quantity'],
+                'unit_price': item['unit_price'],
+                'total_price': line_total,
+                'category_name': category_name
+            })
+        return subtotal, json.dumps(items_data), item_rows
+
+    @staticmethod
+    def _new_order(user_id, subtotal, items_json, shipping_address=None, payment_method=None):
         shipping_fee = 0.00
-        total_amount = subtotal + shipping_fee
-        
-        # Prepare items JSON
-        items_json = json.dumps([{
-            'product_id': item['product_id'],
-            'name': item['product_name'],
-            'price': float(item['unit_price']),
-            'quantity': item['quantity'],
-            'category_name': item.get('category_name', 'Uncategorized'),
-            'image': item.get('product_image', '')
-        } for item in cart_items])
-        
-        # Prepare shipping address JSON
-        shipping_address_json = json.dumps(shipping_address) if shipping_address else None
-        
-        # Create order
-        order = Order(
+        return Order(
             user_id=user_id,
             status='pending',
-            total_amount=total_amount,
+            total_amount=subtotal + shipping_fee,
             subtotal=subtotal,
             shipping_fee=shipping_fee,
             items=items_json,
-            shipping_address=shipping_address_json,
+            shipping_address=json.dumps(shipping_address) if shipping_address else None,
             payment_method=payment_method,
             payment_status='pending'
         )
+
+    @staticmethod
+    def create_from_cart(user_id, cart_items, shipping_address=None, payment_method=None):
+        """
+        Create an order from cart items
+        cart_items should be a list of dictionaries with:
+        - product_id
+        - product_name
+        - quantity
+        - unit_price
+        - category_name
+        """
+        subtotal, items_json, item_rows = Order._build_from_cart(cart_items)
+        order = Order._new_order(user_id, subtotal, items_json, shipping_address, payment_method)
         
         # Create order items
-        for item in cart_items:
-            order_item = OrderItem(
-                product_id=item['product_id'],
-                product_name=item['product_name'],
-                product_image=item.get('product_image', ''),
-                quantity=item['quantity'],
-                unit_price=item['unit_price'],
-                total_price=item['unit_price'] * item['quantity'],
-                category_name=item.get('category_name', 'Uncategorized')
-            )
-            order.order_items.append(order_item)
+        for row in item_rows:
+            order.order_items.append(OrderItem(**row))
+        
+        return order
+    
+    @staticmethod
+    def create_from_cart_bulk(user_id, cart_items, shipping_address=None, payment_method=None):
+        """
+        Create an order from cart items, inserting its order_items in bulk
+        Adds and flushes the order to the current session, then writes every
+        line with a single executemany INSERT instead of one ORM object per
+        line. Takes the same cart_items as create_from_cart; the caller
+        still owns the commit.
+        """
+        subtotal, items_json, item_rows = Order._build_from_cart(cart_items)
+        order = Order._new_order(user_id, subtotal, items_json, shipping_address, payment_method)
+        db.session.add(order)
+        db.session.flush()
+        
+        if item_rows:
+            for row in item_rows:
+                row['order_id'] = order.id
+            db.session.execute(OrderItem.__table__.insert(), item_rows)
         
         return order
     
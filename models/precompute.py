@@ -0,0 +1,35 @@
+"""
+Precompute models
+Shared analytics cache entries and the scheduler lease
+"""
+
+from datetime import datetime
+from extensions import db
+
+
+class AnalyticsCacheEntry(db.Model):
+    """A precomputed analytics result (JSON) shared by all workers"""
+    __tablename__ = 'analytics_cache'
+
+    key = db.Column(db.String(255), primary_key=True)
+    value = db.Column(db.Text, nullable=False)
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<AnalyticsCacheEntry {self.key}>'
+
+
+class SchedulerLease(db.Model):
+    """
+    Named lease held by one worker at a time. The holder renews it on
+    every run; once expires_at passes any worker may take it over.
+    """
+    __tablename__ = 'scheduler_leases'
+
+    name = db.Column(db.String(100), primary_key=True)
+    holder = db.Column(db.String(255), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<SchedulerLease {self.name} {self.holder}>'
@@ -0,0 +1,23 @@
+"""
+Rate limit model
+Token buckets shared by all workers when RATE_LIMIT_STORAGE is 'database'
+"""
+
+from extensions import db
+
+
+class RateLimitBucket(db.Model):
+    """
+    One token bucket per limited scope and key, e.g. 'login_email:a@b.com'.
+    Times are unix timestamps. resets_at is when the bucket will be full
+    again; past that the row carries no state and may be purged.
+    """
+    __tablename__ = 'rate_limit_buckets'
+
+    key = db.Column(db.String(255), primary_key=True)
+    tokens = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.Float, nullable=False)
+    resets_at = db.Column(db.Float, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<RateLimitBucket {self.key} {self.tokens:.2f}>'
@@ -0,0 +1,41 @@
+"""
+Daily sales rollup model
+Pre-aggregated order metrics per (date, category, status) for analytics
+"""
+
+from extensions import db
+
+
+class DailySalesRollup(db.Model):
+    """
+    One row per order day, category and order status.
+    Rows with category ALL_CATEGORIES hold order-level totals (order count,
+    total units, order total_amount); the other rows hold the order lines of
+    that category (line count, units, line totals). order_count on a
+    category row is the number of orders containing that category.
+    """
+    __tablename__ = 'daily_sales_rollup'
+
+    ALL_CATEGORIES = '*'
+
+    date = db.Column(db.Date, primary_key=True)
+    category = db.Column(db.String(100), primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    line_count = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'date': self.date.isoformat(),
+            'category': self.category,
+            'status': self.status,
+            'orderCount': self.order_count,
+            'lineCount': self.line_count,
+            'units': self.units,
+            'revenue': float(self.revenue)
+        }
+
+    def __repr__(self):
+        return f'<DailySalesRollup {self.date} {self.category} {self.status}>'
@@ -0,0 +1,46 @@
+"""
+Daily sketch model
+Serialized per-day analytics sketches (see utils/sketches.py) and the
+per-order deltas not yet folded into them
+"""
+
+from datetime import datetime
+from extensions import db
+
+
+class DailySketch(db.Model):
+    """
+    One serialized sketch per order day and metric.
+    CUSTOMERS is a HyperLogLog of ordering user ids; ORDER_VALUE is a
+    DDSketch of order total_amount. Both cover every order placed that
+    day regardless of its later status.
+    """
+    __tablename__ = 'daily_sketches'
+
+    CUSTOMERS = 'customers'
+    ORDER_VALUE = 'order_value'
+
+    date = db.Column(db.Date, primary_key=True)
+    name = db.Column(db.String(50), primary_key=True)
+    data = db.Column(db.LargeBinary, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<DailySketch {self.date} {self.name}>'
+
+
+class SketchDelta(db.Model):
+    """
+    One order's contribution to its day's sketches, written at checkout
+    instead of updating the shared daily_sketches rows. Readers merge
+    pending deltas with the stored sketches; compaction folds them in.
+    """
+    __tablename__ = 'sketch_deltas'
+
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False, index=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    total_amount = db.Column(db.Numeric(10, 2))
+
+    def __repr__(self):
+        return f'<SketchDelta {self.date} {self.user_id}>'
@@ -6,4 +6,6 @@ class TokenBlacklist(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     jti = db.Column(db.String(36), nullable=False, unique=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # The revoked token's own expiry (its `exp` claim); rows past it can be purged
+    expires_at = db.Column(db.DateTime, index=True)
@@ -1,7 +1,13 @@
+from sqlalchemy.orm import validates
 from extensions import db
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 
+def normalize_email(email):
+    """Canonical stored form of an email address: trimmed and lowercase"""
+    return email.strip().lower() if isinstance(email, str) else email
+
+
 class User(db.Model):
     __tablename__ = 'users'
     
@@ -10,6 +16,20 @@ class User(db.Model):
     password = db.Column(db.String(255), nullable=False)
     role = db.Column(db.String(20), default="customer")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Bumped on role changes so that tokens issued earlier stop working
+    security_epoch = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    @validates('email')
+    def _normalize_email(self, key, email):
+        return normalize_email(email)
+
+    @classmethod
+    def find_by_email(cls, email):
+        """Case-insensitive lookup, a single probe of ix_users_email_lower"""
+        email = normalize_email(email)
+        if not email:
+            return None
+        return cls.query.filter(db.func.lower(cls.email) == email).first()
 
     def set_password(self, password):
         self.password = generate_password_hash(password)
@@ -19,4 +39,19 @@ class User(db.Model):
     
     @property
     def is_admin(self):
-        return self.role == 'admin'
\ No newline at end of file
+        return self.role == 'admin'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'email': self.email,
+            'role': self.role,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+# Case-insensitive email uniqueness and lookups: lower(email) = ? and
+# lower(email) LIKE 'prefix%'. text_pattern_ops lets Postgres use the
+# index for LIKE under any collation.
+db.Index('ix_users_email_lower', db.func.lower(User.email).label('email_lower'), unique=True,
+         postgresql_ops={'email_lower': 'text_pattern_ops'})
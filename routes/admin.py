@@ -11,8 +11,13 @@ from models.product import Product
 from models.order import Order
 from models.cart import Cart, CartItem
 from utils.decorators import admin_required
+from utils.replica import read_replica
+from utils.pagination import clamp_limit, check_first_page
+from utils.dates import parse_date_range
+from services.analytics_service import admin_order_listing
+from services.rollup_service import record_status_change
+from services.security_epoch import bump_security_epoch, forget_security_epoch
 from datetime import datetime, timedelta
-from sqlalchemy import func
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
@@ -21,59 +26,70 @@ admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 @admin_bp.route('/users', methods=['GET'])
 @jwt_required()
 @admin_required
+@read_replica
 def get_all_users():
     """
-    Get all users (Admin)
+    Get all users (Admin), newest first
     ---
     tags:
       - Admin
     parameters:
-      - name: page
+      - name: cursor
         in: query
         schema:
-          type: integer
-        example: 1
-      - name: per_page
+          type: string
+        description: Opaque cursor returned as pagination.next_cursor by the previous page
+      - name: limit
         in: query
         schema:
           type: integer
         example: 20
+        description: Page size (per_page is accepted as an alias)
       - name: search
         in: query
         schema:
           type: string
-        example: john@example.com
+        example: john@
+        description: Case-insensitive email prefix
+      - name: role
+        in: query
+        schema:
+          type: string
+        example: customer
+      - name: include_total
+        in: query
+        schema:
+          type: boolean
+        description: Also count all matching users (slower)
     responses:
       200:
-        description: List of users with pagination
+        description: One page of users
+      400:
+        description: Invalid cursor
       500:
         description: Server error
     """
+    from services.user_service import list_users, user_row_to_dict
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
-        search = request.args.get('search')
-        
-        query = User.query
-        if search:
-            query = query.filter(
-                (User.email.ilike(f'%{search}%')) |
-                (User.name.ilike(f'%{search}%'))
-            )
-        
-        pagination = query.order_by(User.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
+        limit = clamp_limit(request.args.get('limit', type=int) or request.args.get('per_page', type=int))
+        include_total = request.args.get('include_total', '').lower() in ('1', 'true', 'yes')
+        users, next_cursor, total = list_users(
+            search=request.args.get('search'),
+            role=request.args.get('role'),
+            cursor=request.args.get('cursor'),
+            limit=limit,
+            include_total=include_total
         )
-        
+        pagination = {'limit': limit, 'next_cursor': next_cursor}
+        if include_total:
+            pagination['total'] = total
         return jsonify({
             'success': True,
-            'data': [user.to_dict() for user in pagination.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': pagination.total
-            }
+            'data': [user_row_to_dict(user) for user in users],
+            'pagination': pagination
         }), 200
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
@@ -149,8 +165,12 @@ def update_user(user_id):
         if 'is_active' in data:
             user.is_active = data['is_active']
         if 'is_admin' in data:
-            user.is_admin = data['is_admin']
+            role = 'admin' if data['is_admin'] else 'customer'
+            if role != user.role:
+                user.role = role
+                bump_security_epoch(user)
         db.session.commit()
+        forget_security_epoch(user.id)
         return jsonify({'success': True, 'message': 'User updated', 'data': user.to_dict()}), 200
     except Exception as e:
         db.session.rollback()
@@ -183,10 +203,11 @@ def delete_user(user_id):
     user = User.query.get_or_404(user_id)
     try:
         current_user_id = get_jwt_identity()
-        if user.id == current_user_id:
+        if str(user.id) == str(current_user_id):
             return jsonify({'success': False, 'message': 'Cannot delete your own account'}), 400
         db.session.delete(user)
         db.session.commit()
+        forget_security_epoch(user_id)
         return jsonify({'success': True, 'message': 'User deleted'}), 200
     except Exception as e:
         db.session.rollback()
@@ -348,13 +369,14 @@ def update_user_roles(user_id):
     user = User.query.get_or_404(user_id)
     data = request.get_json()
     try:
-        role_names = data.get('roles', [])
-        user.roles = []  # Clear existing roles
-        for role_name in role_names:
-            role = Role.query.filter_by(name=role_name).first()
-            if role:
-                user.roles.append(role)
+        # Users have a single role column; any 'admin' entry makes them an admin
+        role_names = {name.lower() for name in data.get('roles', [])}
+        role = 'admin' if 'admin' in role_names else 'customer'
+        if role != user.role:
+            user.role = role
+            bump_security_epoch(user)
         db.session.commit()
+        forget_security_epoch(user.id)
         return jsonify({
             'success': True,
             'message': 'User roles updated',
@@ -370,13 +392,15 @@ def update_user_roles(user_id):
 @admin_bp.route('/orders', methods=['GET'])
 @jwt_required()
 @admin_required
+@read_replica
 def get_all_orders():
     """
     Get all customer orders with optional filtering (Admin)
     ---
     tags:
       - Order Management
-    summary: Retrieve orders with optional status filter and pagination
+    summary: Retrieve orders with optional filters and cursor pagination
+    description: Same listing as /api/orders/admin/all.
     parameters:
       - name: status
         in: query
@@ -384,16 +408,40 @@ def get_all_orders():
           type: string
           description: Filter orders by status
           example: "pending"
-      - name: page
+      - name: payment_status
+        in: query
+        schema:
+          type: string
+          example: "paid"
+      - name: user_id
         in: query
         schema:
           type: integer
-          example: 1
-      - name: per_page
+          example: 5
+      - name: start_date
+        in: query
+        schema:
+          type: string
+          example: "2026-01-01"
+      - name: end_date
+        in: query
+        schema:
+          type: string
+          example: "2026-01-31"
+      - name: cursor
+        in: query
+        schema:
+          type: string
+      - name: limit
         in: query
         schema:
           type: integer
           example: 20
+      - name: include_total
+        in: query
+        schema:
+          type: boolean
+          example: false
     responses:
       200:
         description: List of orders
@@ -403,33 +451,34 @@ def get_all_orders():
               success: true
               data:
                 - id: 10
-                  user_id: 5
+                  customerId: 5
                   status: "pending"
-                  total_amount: 150.5
+                  totalAmount: 150.5
+              count: 1
               pagination:
-                page: 1
-                per_page: 20
-                total: 50
+                limit: 20
+                next_cursor: null
+      400:
+        description: Invalid date or cursor, or page beyond 1
       500:
         description: Internal server error
     """
     try:
-        status = request.args.get('status')
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
-        query = Order.query
-        if status:
-            query = query.filter_by(status=status)
-        pagination = query.order_by(Order.created_at.desc()).paginate(page=page, per_page=per_page, error_out=False)
-        return jsonify({
-            'success': True,
-            'data': [order.to_dict() for order in pagination.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': pagination.total
-            }
-        }), 200
+        check_first_page(request.args.get('page', type=int))
+        start_date, end_date = parse_date_range(request.args.get('start_date'), request.args.get('end_date'))
+        data = admin_order_listing(
+            status=request.args.get('status'),
+            start_date=start_date,
+            end_date=end_date,
+            user_id=request.args.get('user_id', type=int),
+            payment_status=request.args.get('payment_status'),
+            cursor=request.args.get('cursor'),
+            limit=clamp_limit(request.args.get('limit', type=int) or request.args.get('per_page', type=int)),
+            include_total=request.args.get('include_total', '').lower() in ('1', 'true', 'yes')
+        )
+        return jsonify(data), 200
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
@@ -488,7 +537,9 @@ def update_order_status(order_id):
         return jsonify({'success': False, 'message': f'Invalid status. Valid: {valid_statuses}'}), 400
     order = Order.query.get_or_404(order_id)
     try:
+        old_status = order.status
         order.status = new_status
+        record_status_change(order, old_status)
         db.session.commit()
         return jsonify({
             'success': True,
@@ -504,6 +555,7 @@ def update_order_status(order_id):
 @admin_bp.route('/analytics/products', methods=['GET'])
 @jwt_required()
 @admin_required
+@read_replica
 def get_product_analytics():
     """
     Get product analytics (Admin)
@@ -511,7 +563,7 @@ def get_product_analytics():
     tags:
       - Product Analytics
     summary: Get product statistics for admin dashboard
-    description: Returns counts of products, stock levels, most viewed products, featured products, and products by category.
+    description: Returns product and stock counts, top-selling products by units sold, and products by category.
     responses:
       200:
         description: Product analytics data
@@ -521,17 +573,17 @@ def get_product_analytics():
               success: true
               data:
                 totalProducts: 120
-                activeProducts: 100
                 lowStock: 15
                 outOfStock: 5
-                featuredCount: 10
-                mostViewed:
-                  - id: 1
+                topSelling:
+                  - productId: 1
                     name: "Product 1"
-                    view_count: 150
-                  - id: 2
+                    units: 150
+                    revenue: 45000.0
+                  - productId: 2
                     name: "Product 2"
-                    view_count: 140
+                    units: 140
+                    revenue: 28000.0
                 byCategory:
                   - category: "Electronics"
                     count: 50
@@ -540,31 +592,77 @@ def get_product_analytics():
       500:
         description: Internal server error
     """
+    from services.analytics_service import get_cached_product_analytics
     try:
-        total_products = Product.query.count()
-        active_products = Product.query.filter_by(is_active=True).count()
-        low_stock = Product.query.filter(Product.stock_quantity > 0, Product.stock_quantity <= 10).count()
-        out_of_stock = Product.query.filter_by(stock_quantity=0).count()
-        most_viewed = Product.query.order_by(Product.view_count.desc()).limit(10).all()
-        featured_count = Product.query.filter_by(is_featured=True, is_active=True).count()
-
-        from models.product import Category
-        products_by_category = db.session.query(
-            Category.name, func.count(Product.id)
-        ).join(Product).group_by(Category.name).all()
+        return jsonify({'success': True, 'data': get_cached_product_analytics()}), 200
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
 
-        return jsonify({
-            'success': True,
-            'data': {
-                'totalProducts': total_products,
-                'activeProducts': active_products,
-                'lowStock': low_stock,
-                'outOfStock': out_of_stock,
-                'featuredCount': featured_count,
-                'mostViewed': [p.to_dict() for p in most_viewed],
-                'byCategory': [{'category': c, 'count': n} for c, n in products_by_category]
-            }
-        }), 200
+
+@admin_bp.route('/analytics/range', methods=['GET'])
+@jwt_required()
+@admin_required
+@read_replica
+def get_range_analytics():
+    """
+    Revenue, order and unit totals for an arbitrary date range (Admin)
+    ---
+    tags:
+      - Product Analytics
+    summary: Range totals from the prefix-sum revenue index
+    description: Answers any day range with two lookups per category. Totals include every order status.
+    parameters:
+      - name: from
+        in: query
+        schema:
+          type: string
+          example: "2026-11-27"
+        description: First day of the range. Defaults to 30 days before `to`
+      - name: to
+        in: query
+        schema:
+          type: string
+          example: "2026-12-01"
+        description: Last day of the range (inclusive). Defaults to today
+      - name: breakdown
+        in: query
+        schema:
+          type: boolean
+        description: Include per-category totals
+    responses:
+      200:
+        description: Range totals
+        content:
+          application/json:
+            example:
+              success: true
+              data:
+                from: "2026-11-27"
+                to: "2026-12-01"
+                total:
+                  orders: 120
+                  units: 310
+                  revenue: 452000.0
+      400:
+        description: Invalid date
+      500:
+        description: Internal server error
+    """
+    from services.revenue_index import range_totals, day_range
+    try:
+        start, end = parse_date_range(request.args.get('from'), request.args.get('to'))
+        if end is None:
+            end = datetime.combine(datetime.utcnow().date() + timedelta(days=1), datetime.min.time())
+        if start is None:
+            start = end - timedelta(days=30)
+        first_day, end_day = day_range(start, end)
+        breakdown = request.args.get('breakdown', '').lower() in ('1', 'true', 'yes')
+        data = range_totals(first_day, end_day, breakdown=breakdown)
+        data['from'] = first_day.isoformat()
+        data['to'] = (end_day - timedelta(days=1)).isoformat()
+        return jsonify({'success': True, 'data': data}), 200
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
@@ -574,6 +672,7 @@ def get_product_analytics():
 @admin_bp.route('/analytics/dashboard', methods=['GET'])
 @jwt_required()
 @admin_required
+@read_replica
 def get_admin_dashboard():
     """
     Admin dashboard analytics (Admin)
@@ -581,7 +680,7 @@ def get_admin_dashboard():
     tags:
       - Admin Dashboard
     summary: Get overall system metrics for dashboard
-    description: Returns user stats, order stats, revenue stats, order status distribution, and recent orders.
+    description: Returns user stats, order stats, revenue stats, order status distribution, and recent orders. Cached per worker for ANALYTICS_CACHE_TTL seconds.
     responses:
       200:
         description: Admin dashboard analytics
@@ -611,41 +710,79 @@ def get_admin_dashboard():
       500:
         description: Internal server error
     """
+    from services.analytics_service import get_cached_admin_dashboard
     try:
-        today = datetime.utcnow()
-        thirty_days_ago = today - timedelta(days=30)
+        return jsonify({'success': True, 'data': get_cached_admin_dashboard()}), 200
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
 
-        total_users = User.query.count()
-        new_users_30d = User.query.filter(User.created_at >= thirty_days_ago).count()
 
-        total_orders = Order.query.count()
-        orders_30d = Order.query.filter(Order.created_at >= thirty_days_ago).count()
-        pending_orders = Order.query.filter_by(status='pending').count()
+# ===== AUTH METRICS =====
 
-        total_revenue = db.session.query(func.coalesce(func.sum(Order.total_amount), 0)).scalar() or 0
-        revenue_30d = db.session.query(func.coalesce(func.sum(Order.total_amount), 0)).filter(Order.created_at >= thirty_days_ago).scalar() or 0
+@admin_bp.route('/metrics/auth', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_auth_metrics():
+    """
+    Per-worker token cache metrics (Admin)
+    ---
+    tags:
+      - Admin
+    summary: Verified JWT cache size and hit rate on the answering worker
+    responses:
+      200:
+        description: Cache metrics
+        content:
+          application/json:
+            example:
+              success: true
+              data:
+                jwtDecodeCache:
+                  size: 120
+                  maxsize: 10000
+                  hits: 5400
+                  misses: 130
+                  expired: 10
+                  evictions: 0
+                  hitRate: 0.9765
+    """
+    from utils.jwt_cache import get_verified_token_cache
+    return jsonify({'success': True, 'data': {'jwtDecodeCache': get_verified_token_cache().stats()}}), 200
 
-        status_dist = db.session.query(Order.status, func.count(Order.id)).group_by(Order.status).all()
-        recent_orders = Order.query.order_by(Order.created_at.desc()).limit(10).all()
 
-        return jsonify({
-            'success': True,
-            'data': {
-                'overview': {
-                    'totalUsers': total_users,
-                    'newUsers30d': new_users_30d,
-                    'totalOrders': total_orders,
-                    'orders30d': orders_30d,
-                    'pendingOrders': pending_orders,
-                    'totalRevenue': float(total_revenue),
-                    'revenue30d': float(revenue_30d)
-                },
-                'orderStatus': [{'status': s, 'count': c} for s, c in status_dist],
-                'recentOrders': [o.to_dict() for o in recent_orders]
-            }
-        }), 200
-    except Exception as e:
-        return jsonify({'success': False, 'message': str(e)}), 500
+@admin_bp.route('/metrics/db-pool', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_db_pool_metrics():
+    """
+    Per-worker database connection pool metrics (Admin)
+    ---
+    tags:
+      - Admin
+    summary: Pool occupancy, checkout latency and hold time histograms on the answering worker
+    responses:
+      200:
+        description: Pool metrics per engine
+        content:
+          application/json:
+            example:
+              success: true
+              data:
+                primary:
+                  class: InstrumentedQueuePool
+                  size: 5
+                  checkedIn: 4
+                  checkedOut: 1
+                  overflow: 0
+                  maxOverflow: 5
+                  timeout: 10
+                  checkouts: 1520
+                  waits: 3
+                  timeouts: 0
+    """
+    from utils.db_pool import pool_status
+    pools = {name or 'primary': pool_status(engine) for name, engine in db.engines.items()}
+    return jsonify({'success': True, 'data': pools}), 200
 
 
 # ===== INVENTORY MANAGEMENT =====
@@ -3,10 +3,11 @@ Analytics routes
 Provides admin analytics dashboard
 """
 
-from flask import Blueprint, jsonify
+from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from utils.decorators import admin_required
-from services.analytics_service import get_admin_analytics
+from utils.replica import read_replica
+from services.analytics_service import get_cached_admin_analytics, parse_analytics_params
 
 analytics_bp = Blueprint('analytics', __name__, url_prefix='/api/orders/admin')
 
@@ -14,6 +15,7 @@ analytics_bp = Blueprint('analytics', __name__, url_prefix='/api/orders/admin')
 @analytics_bp.route('/analytics', methods=['GET'])
 @jwt_required()
 @admin_required
+@read_replica
 def get_analytics():
     """
     Admin: Get comprehensive analytics dashboard
@@ -22,6 +24,23 @@ def get_analytics():
       - Analytics
     summary: Get admin analytics dashboard
     description: Returns comprehensive analytics data including revenue trends, orders trends, and category statistics.
+    parameters:
+      - name: from
+        in: query
+        schema:
+          type: string
+        description: Window start (YYYY-MM-DD or ISO 8601). Defaults to 30 days before `to`
+      - name: to
+        in: query
+        schema:
+          type: string
+        description: Window end, inclusive for a bare date. Defaults to now
+      - name: granularity
+        in: query
+        schema:
+          type: string
+          enum: [hour, day, week, month]
+          default: day
     responses:
       200:
         description: Analytics data retrieved successfully
@@ -92,11 +111,16 @@ def get_analytics():
                   example: "Database connection error"
     """
     try:
-        analytics_data = get_admin_analytics()
+        analytics_data = get_cached_admin_analytics(**parse_analytics_params(request.args))
         return jsonify({
             'success': True,
             'data': analytics_data
         }), 200
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -1,14 +1,29 @@
 from flask import Blueprint, request, jsonify
 from extensions import db
-from models.user import User
+from models.user import User, normalize_email
 from models.tokenblacklist import TokenBlacklist
+from services.token_revocation import token_revoked
+from services.security_epoch import token_claims
+from services.password_service import HashingBusy, HashTimeout, hash_password, verify_password
+from services.user_service import list_users, user_row_to_dict
+from utils.pagination import clamp_limit
+from utils.rate_limit import rate_limit, client_ip, request_email
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.exc import IntegrityError
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
 
+def server_busy():
+    """503 for when this worker's password hashing queue is full or too slow"""
+    response = jsonify({"message": "Server busy, please retry shortly"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+
 @auth_bp.route('/register', methods=['POST'])
+@rate_limit('RATE_LIMIT_REGISTER_IP', client_ip)
 def register():
     """
     Register a new user
@@ -71,10 +86,12 @@ def register():
             message:
               type: string
               example: "Email and password required"
+      429:
+        description: Too many registrations from this address; retry after the Retry-After delay
     """
     try:
         data = request.get_json()
-        email = data.get("email")
+        email = normalize_email(data.get("email"))
         password = data.get("password")
         role = data.get("role", "customer")
 
@@ -84,23 +101,31 @@ def register():
         if role not in ["customer", "admin"]:
             return jsonify({"message": "Invalid role"}), 400
 
-        if User.query.filter_by(email=email).first():
+        if User.find_by_email(email):
             return jsonify({"message": "User already exists"}), 400
 
         user = User(email=email, role=role)
-        user.set_password(password)
+        user.password = hash_password(password)
 
         db.session.add(user)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Lost a race with a concurrent registration of the same email
+            db.session.rollback()
+            return jsonify({"message": "User already exists"}), 400
 
-        access_token = create_access_token(identity=user.id, additional_claims={"role": user.role}, expires_delta=timedelta(hours=1))
-        refresh_token = create_refresh_token(identity=user.id, additional_claims={"role": user.role})
+        access_token = create_access_token(identity=str(user.id), additional_claims=token_claims(user), expires_delta=timedelta(hours=1))
+        refresh_token = create_refresh_token(identity=str(user.id), additional_claims=token_claims(user))
 
         return jsonify({
             "user": {"id": user.id, "email": user.email, "role": user.role},
             "access_token": access_token,
             "refresh_token": refresh_token
         }), 201
+    except (HashingBusy, HashTimeout):
+        db.session.rollback()
+        return server_busy()
     except Exception as e:
         db.session.rollback()
         print(f"Registration error: {str(e)}")
@@ -108,6 +133,8 @@ def register():
 
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limit('RATE_LIMIT_LOGIN_IP', client_ip)
+@rate_limit('RATE_LIMIT_LOGIN_EMAIL', request_email)
 def login():
     """
     Login user
@@ -164,24 +191,32 @@ def login():
             message:
               type: string
               example: "Invalid credentials"
+      429:
+        description: Too many attempts from this address or for this email; retry after the Retry-After delay
+      503:
+        description: Too many concurrent logins on this worker; retry after the Retry-After delay
     """
     try:
         data = request.get_json()
         email = data.get("email")
         password = data.get("password")
 
-        user = User.query.filter_by(email=email).first()
-        if not user or not user.check_password(password):
+        user = User.find_by_email(email)
+        if not user or not verify_password(user, password):
             return jsonify({"message": "Invalid credentials"}), 401
+        # Persists a hash upgraded to the current policy, if any
+        db.session.commit()
 
-        access_token = create_access_token(identity=user.id, additional_claims={"role": user.role}, expires_delta=timedelta(hours=1))
-        refresh_token = create_refresh_token(identity=user.id, additional_claims={"role": user.role})
+        access_token = create_access_token(identity=str(user.id), additional_claims=token_claims(user), expires_delta=timedelta(hours=1))
+        refresh_token = create_refresh_token(identity=str(user.id), additional_claims=token_claims(user))
 
         return jsonify({
             "user": {"id": user.id, "email": user.email, "role": user.role},
             "access_token": access_token,
             "refresh_token": refresh_token
         }), 200
+    except (HashingBusy, HashTimeout):
+        return server_busy()
     except Exception as e:
         print(f"Login error: {str(e)}")
         import traceback
@@ -209,8 +244,10 @@ def refresh():
     """
     user_id = get_jwt_identity()
     claims = get_jwt()
-    role = claims.get('role', 'customer')
-    new_access = create_access_token(identity=user_id, additional_claims={"role": role}, expires_delta=timedelta(hours=1))
+    user = db.session.get(User, user_id)
+    if not user or claims.get('epoch', 0) < (user.security_epoch or 0):
+        return jsonify({"message": "Token is no longer valid, please log in again"}), 401
+    new_access = create_access_token(identity=str(user.id), additional_claims=token_claims(user), expires_delta=timedelta(hours=1))
     return jsonify({"access_token": new_access}), 200
 
 
@@ -240,9 +277,13 @@ def logout():
         user_id = get_jwt_identity()
         print(f"Logout - User ID: {user_id}, JTI: {jti}", flush=True)
         sys.stdout.flush()
-        blocked_token = TokenBlacklist(jti=jti)
+        blocked_token = TokenBlacklist(
+            jti=jti,
+            expires_at=datetime.fromtimestamp(get_jwt()["exp"], timezone.utc).replace(tzinfo=None)
+        )
         db.session.add(blocked_token)
         db.session.commit()
+        token_revoked(jti)
         return jsonify({"message": "Logged out successfully"}), 200
     except Exception as e:
         db.session.rollback()
@@ -258,13 +299,26 @@ def logout():
 @jwt_required()
 def get_users():
     """
-    Get all users (admin only)
+    Get all users (admin only), newest first
     ---
     tags:
       - Auth
+    parameters:
+      - name: cursor
+        in: query
+        type: string
+        description: Opaque cursor returned as pagination.next_cursor by the previous page
+      - name: limit
+        in: query
+        type: integer
+        example: 20
+      - name: search
+        in: query
+        type: string
+        description: Case-insensitive email prefix
     responses:
       200:
-        description: List of users
+        description: One page of users
         schema:
           type: object
           properties:
@@ -285,6 +339,16 @@ def get_users():
                   created_at:
                     type: string
                     example: "2026-02-12T12:34:56"
+            pagination:
+              type: object
+              properties:
+                limit:
+                  type: integer
+                  example: 20
+                next_cursor:
+                  type: string
+      400:
+        description: Invalid cursor
       403:
         description: Admins only
         schema:
@@ -294,14 +358,20 @@ def get_users():
               type: string
               example: "Admins only"
     """
-    user_id = get_jwt_identity()
     claims = get_jwt()
     if claims.get("role") != "admin":
         return jsonify({"message": "Admins only"}), 403
 
-    users = User.query.all()
-    users_list = [
-        {"id": u.id, "email": u.email, "role": u.role, "created_at": u.created_at.isoformat()}
-        for u in users
-    ]
-    return jsonify({"users": users_list}), 200
\ No newline at end of file
+    limit = clamp_limit(request.args.get("limit", type=int))
+    try:
+        users, next_cursor, _ = list_users(
+            search=request.args.get("search"),
+            cursor=request.args.get("cursor"),
+            limit=limit
+        )
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    return jsonify({
+        "users": [user_row_to_dict(u) for u in users],
+        "pagination": {"limit": limit, "next_cursor": next_cursor}
+    }), 200
\ No newline at end of file
@@ -3,13 +3,19 @@ Cart and checkout routes
 Implements cart operations, checkout flow, payment simulation
 """
 
-from flask import Blueprint, request, jsonify
+import logging
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import db
 from models.cart import Cart, CartItem
 from models.product import Product
 from models.order import Order, OrderItem
 from models.user import User
+from services.rollup_service import record_new_order, record_status_change
+from services import revenue_index, sketch_service
+from utils.rate_limit import rate_limit, jwt_user
+
+logger = logging.getLogger(__name__)
 
 cart_bp = Blueprint('cart', __name__, url_prefix='/api/cart')
 
@@ -323,6 +329,7 @@ def clear_cart():
 
 @cart_bp.route('/checkout', methods=['POST'])
 @jwt_required()
+@rate_limit('RATE_LIMIT_CHECKOUT_USER', jwt_user)
 def checkout():
     """
     Process checkout and create order
@@ -349,6 +356,8 @@ def checkout():
         description: Order created successfully
       400:
         description: Invalid request
+      429:
+        description: Too many checkouts by this user; retry after the Retry-After delay
       500:
         description: Server error
     """
@@ -388,18 +397,17 @@ def checkout():
                     'category_name': product.category.name if product.category else 'Uncategorized'
                 })
 
-        order = Order.create_from_cart(
+        order = Order.create_from_cart_bulk(
             user_id=user_id,
             cart_items=cart_items_data,
             shipping_address=data['shipping_address'],
             payment_method=payment_method
         )
-        db.session.add(order)
-        db.session.flush()
         order.generate_invoice_number()
+        record_new_order(order, cart_items_data)
+        sketch_service.record_new_order(order)
         CartItem.query.filter_by(cart_id=cart.id).delete()
         db.session.commit()
-        return jsonify({'success': True, 'message': 'Order created successfully', 'data': {'order': order.to_dict()}}), 201
     except Exception as e:
         db.session.rollback()
         print(f"Checkout error: {str(e)}")
@@ -407,6 +415,21 @@ def checkout():
         traceback.print_exc()
         return jsonify({'success': False, 'message': str(e)}), 500
 
+    # The order is committed; the in-memory index and sketch compaction
+    # are best effort and must not turn that into an error the client
+    # would retry
+    try:
+        revenue_index.record_order(order, cart_items_data)
+    except Exception:
+        logger.exception('Could not add order %s to the revenue index; rebuilding it', order.id)
+        current_app.extensions.pop('revenue_index', None)
+    try:
+        sketch_service.compact_if_due()
+    except Exception:
+        db.session.rollback()
+        logger.exception('Sketch compaction after checkout failed')
+    return jsonify({'success': True, 'message': 'Order created successfully', 'data': {'order': order.to_dict()}}), 201
+
 
 @cart_bp.route('/payment/simulate', methods=['POST'])
 @jwt_required()
@@ -443,8 +466,10 @@ def simulate_payment():
         if not order_id:
             return jsonify({'success': False, 'message': 'Order ID required'}), 400
         order = Order.query.filter_by(id=order_id, user_id=user_id).first_or_404()
+        old_status = order.status
         order.payment_status = 'paid'
         order.status = 'processing'
+        record_status_change(order, old_status)
         db.session.commit()
         return jsonify({
             'success': True,
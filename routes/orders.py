@@ -3,10 +3,15 @@ Orders routes
 Handles customer order history, admin order management, and analytics
 """
 
-from flask import Blueprint, request, jsonify
+from datetime import datetime
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from utils.decorators import admin_required
-from services.analytics_service import get_user_orders, get_all_orders_admin
+from utils.replica import read_replica
+from utils.pagination import clamp_limit, check_first_page
+from utils.dates import parse_date_range
+from services.analytics_service import get_user_orders, admin_order_listing
+from services.rollup_service import record_status_change
 from models.order import Order
 from extensions import db
 
@@ -19,23 +24,50 @@ orders_bp = Blueprint('orders', __name__, url_prefix='/api/orders')
 @jwt_required()
 def get_my_orders():
     """
-    Get own order history (Customer)
+    Get own order history (Customer), newest first
     ---
     tags:
       - Orders
+    parameters:
+      - name: cursor
+        in: query
+        schema:
+          type: string
+        description: Opaque cursor returned as pagination.next_cursor by the previous page
+      - name: limit
+        in: query
+        schema:
+          type: integer
+        example: 20
+      - name: summary
+        in: query
+        schema:
+          type: boolean
+        description: Return order summaries without items and shipping address
     responses:
       200:
-        description: List of customer's orders
+        description: One page of the customer's orders
+      400:
+        description: Invalid cursor
       500:
         description: Server error
     """
     user_id = get_jwt_identity()
+    cursor = request.args.get('cursor')
+    limit = clamp_limit(request.args.get('limit', type=int))
+    summary = request.args.get('summary', '').lower() in ('1', 'true', 'yes')
     try:
-        orders = get_user_orders(user_id)
+        orders, next_cursor = get_user_orders(user_id, cursor=cursor, limit=limit, summary=summary)
         return jsonify({
             'success': True,
-            'data': [order.to_dict() for order in orders]
+            'data': [order.to_summary_dict() for order in orders] if summary else Order.to_dict_list(orders),
+            'pagination': {
+                'limit': limit,
+                'next_cursor': next_cursor
+            }
         }), 200
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
@@ -75,9 +107,10 @@ def get_order(order_id):
 @orders_bp.route('/admin/all', methods=['GET'])
 @jwt_required()
 @admin_required
+@read_replica
 def get_all_orders_admin_route():
     """
-    Get all customer orders (Admin) with optional filtering
+    Get customer orders (Admin) with optional filtering, newest first
     ---
     tags:
       - Orders
@@ -87,36 +120,126 @@ def get_all_orders_admin_route():
         schema:
           type: string
         description: Filter by order status
+      - name: payment_status
+        in: query
+        schema:
+          type: string
+        description: Filter by payment status
+      - name: user_id
+        in: query
+        schema:
+          type: integer
+        description: Filter by customer
       - name: start_date
         in: query
         schema:
           type: string
-        description: Filter orders created after this date (YYYY-MM-DD)
+        description: Filter orders created on or after this date (YYYY-MM-DD)
       - name: end_date
         in: query
         schema:
           type: string
-        description: Filter orders created before this date (YYYY-MM-DD)
+        description: Filter orders created up to and including this date (YYYY-MM-DD)
+      - name: cursor
+        in: query
+        schema:
+          type: string
+        description: Opaque cursor returned as pagination.next_cursor by the previous page
+      - name: limit
+        in: query
+        schema:
+          type: integer
+        example: 20
+      - name: include_total
+        in: query
+        schema:
+          type: boolean
+        description: Also count all matching orders (slower on large tables)
     responses:
       200:
-        description: List of orders
+        description: One page of orders
+      400:
+        description: Invalid date or cursor, or page beyond 1
       500:
         description: Server error
     """
     try:
-        status = request.args.get('status')
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
-        orders = get_all_orders_admin(status, start_date, end_date)
-        return jsonify({
-            'success': True,
-            'data': [order.to_dict() for order in orders],
-            'count': len(orders)
-        }), 200
+        check_first_page(request.args.get('page', type=int))
+        start_date, end_date = parse_date_range(request.args.get('start_date'), request.args.get('end_date'))
+        data = admin_order_listing(
+            status=request.args.get('status'),
+            start_date=start_date,
+            end_date=end_date,
+            user_id=request.args.get('user_id', type=int),
+            payment_status=request.args.get('payment_status'),
+            cursor=request.args.get('cursor'),
+            limit=clamp_limit(request.args.get('limit', type=int) or request.args.get('per_page', type=int)),
+            include_total=request.args.get('include_total', '').lower() in ('1', 'true', 'yes')
+        )
+        return jsonify(data), 200
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
+@orders_bp.route('/admin/export', methods=['GET'])
+@jwt_required()
+@admin_required
+@read_replica
+def export_orders_admin():
+    """
+    Stream an order export, one row per order line (Admin)
+    ---
+    tags:
+      - Orders
+    parameters:
+      - name: format
+        in: query
+        schema:
+          type: string
+          enum: [csv, ndjson]
+          default: csv
+      - name: status
+        in: query
+        schema:
+          type: string
+        description: Filter by order status
+      - name: start_date
+        in: query
+        schema:
+          type: string
+        description: Include orders created on or after this date (YYYY-MM-DD or ISO 8601)
+      - name: end_date
+        in: query
+        schema:
+          type: string
+        description: Include orders created up to and including this date (YYYY-MM-DD), or before this timestamp
+    responses:
+      200:
+        description: Streamed CSV or NDJSON export
+      400:
+        description: Invalid format or date
+    """
+    from services.export_service import stream_order_export, EXPORT_FORMATS
+
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'success': False, 'message': f'Invalid format. Valid: {list(EXPORT_FORMATS)}'}), 400
+    try:
+        start_date, end_date = parse_date_range(request.args.get('start_date'), request.args.get('end_date'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    chunks = stream_order_export(fmt, request.args.get('status'), start_date, end_date)
+    filename = f"orders-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.{fmt}"
+    return Response(
+        stream_with_context(chunks),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+
 @orders_bp.route('/admin/<int:order_id>/status', methods=['PATCH'])
 @jwt_required()
 @admin_required
@@ -158,8 +281,10 @@ def update_order_status(order_id):
         return jsonify({'success': False, 'message': 'Invalid status'}), 400
 
     order = Order.query.get_or_404(order_id)
+    old_status = order.status
     order.status = new_status
     order.updated_at = db.func.now()
+    record_status_change(order, old_status)
     db.session.commit()
 
     return jsonify({'success': True, 'data': order.to_dict()}), 200
@@ -170,21 +295,41 @@ def update_order_status(order_id):
 @orders_bp.route('/analytics/total', methods=['GET'])
 @jwt_required()
 @admin_required
+@read_replica
 def get_total_orders():
     """
     Get total orders over time analytics (Admin)
     ---
     tags:
       - Analytics
+    parameters:
+      - name: from
+        in: query
+        schema:
+          type: string
+        description: Window start (YYYY-MM-DD or ISO 8601). Defaults to 30 days before `to`
+      - name: to
+        in: query
+        schema:
+          type: string
+        description: Window end, inclusive for a bare date. Defaults to now
+      - name: granularity
+        in: query
+        schema:
+          type: string
+          enum: [hour, day, week, month]
+          default: day
     responses:
       200:
         description: Orders trend data
+      400:
+        description: Invalid window or granularity
       500:
         description: Server error
     """
-    from services.analytics_service import get_admin_analytics
+    from services.analytics_service import get_cached_admin_analytics, parse_analytics_params
     try:
-        analytics = get_admin_analytics()
+        analytics = get_cached_admin_analytics(**parse_analytics_params(request.args))
         return jsonify({
             'success': True,
             'data': {
@@ -194,6 +339,8 @@ def get_total_orders():
                 }
             }
         }), 200
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
@@ -201,31 +348,55 @@ def get_total_orders():
 @orders_bp.route('/analytics/revenue', methods=['GET'])
 @jwt_required()
 @admin_required
+@read_replica
 def get_revenue_analytics():
     """
     Get revenue simulation analytics (Admin)
     ---
     tags:
       - Analytics
+    parameters:
+      - name: from
+        in: query
+        schema:
+          type: string
+        description: Window start (YYYY-MM-DD or ISO 8601). Defaults to 30 days before `to`
+      - name: to
+        in: query
+        schema:
+          type: string
+        description: Window end, inclusive for a bare date. Defaults to now
+      - name: granularity
+        in: query
+        schema:
+          type: string
+          enum: [hour, day, week, month]
+          default: day
     responses:
       200:
-        description: Revenue trend and summary
+        description: Revenue trend and summary. distinctCustomers and orderValuePercentiles are sketch estimates, null for hourly windows
+      400:
+        description: Invalid window or granularity
       500:
         description: Server error
     """
-    from services.analytics_service import get_admin_analytics
+    from services.analytics_service import get_cached_admin_analytics, parse_analytics_params
     try:
-        analytics = get_admin_analytics()
+        analytics = get_cached_admin_analytics(**parse_analytics_params(request.args))
         return jsonify({
             'success': True,
             'data': {
                 'revenueTrend': analytics['revenueTrend'],
                 'summary': {
                     'totalRevenue': analytics['summary']['totalRevenue'],
-                    'avgOrderValue': analytics['summary']['avgOrderValue']
+                    'avgOrderValue': analytics['summary']['avgOrderValue'],
+                    'distinctCustomers': analytics['summary'].get('distinctCustomers'),
+                    'orderValuePercentiles': analytics['summary'].get('orderValuePercentiles')
                 }
             }
         }), 200
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
@@ -233,27 +404,49 @@ def get_revenue_analytics():
 @orders_bp.route('/analytics/categories', methods=['GET'])
 @jwt_required()
 @admin_required
+@read_replica
 def get_category_analytics():
     """
     Get category-level order statistics (Admin)
     ---
     tags:
       - Analytics
+    parameters:
+      - name: from
+        in: query
+        schema:
+          type: string
+        description: Window start (YYYY-MM-DD or ISO 8601). Defaults to 30 days before `to`
+      - name: to
+        in: query
+        schema:
+          type: string
+        description: Window end, inclusive for a bare date. Defaults to now
+      - name: granularity
+        in: query
+        schema:
+          type: string
+          enum: [hour, day, week, month]
+          default: day
     responses:
       200:
         description: Category statistics
+      400:
+        description: Invalid window or granularity
       500:
         description: Server error
     """
-    from services.analytics_service import get_admin_analytics
+    from services.analytics_service import get_cached_admin_analytics, parse_analytics_params
     try:
-        analytics = get_admin_analytics()
+        analytics = get_cached_admin_analytics(**parse_analytics_params(request.args))
         return jsonify({
             'success': True,
             'data': {
                 'categoryStatistics': analytics['categoryStatistics']
             }
         }), 200
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
@@ -261,21 +454,43 @@ def get_category_analytics():
 @orders_bp.route('/admin/analytics', methods=['GET'])
 @jwt_required()
 @admin_required
+@read_replica
 def get_admin_analytics_endpoint():
     """
     Get comprehensive analytics dashboard (Admin)
     ---
     tags:
       - Analytics
+    parameters:
+      - name: from
+        in: query
+        schema:
+          type: string
+        description: Window start (YYYY-MM-DD or ISO 8601). Defaults to 30 days before `to`
+      - name: to
+        in: query
+        schema:
+          type: string
+        description: Window end, inclusive for a bare date. Defaults to now
+      - name: granularity
+        in: query
+        schema:
+          type: string
+          enum: [hour, day, week, month]
+          default: day
     responses:
       200:
         description: Full admin analytics dashboard
+      400:
+        description: Invalid window or granularity
       500:
         description: Server error
     """
-    from services.analytics_service import get_admin_analytics
+    from services.analytics_service import get_cached_admin_analytics, parse_analytics_params
     try:
-        analytics = get_admin_analytics()
+        analytics = get_cached_admin_analytics(**parse_analytics_params(request.args))
         return jsonify({'success': True, 'data': analytics}), 200
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
\ No newline at end of file
@@ -1,19 +1,22 @@
 from flask import Flask
 from flask_migrate import Migrate
-from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flasgger import Swagger
 from config import Config
 from extensions import db
+from utils.jwt_cache import CachingJWTManager
 from models.tokenblacklist import TokenBlacklist
 
-jwt = JWTManager()
+jwt = CachingJWTManager()
 migrate = Migrate()
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
+    from utils.db_pool import init_pool_metrics
+    init_pool_metrics(app)
+
     db.init_app(app)
     jwt.init_app(app)
     migrate.init_app(app, db)
@@ -70,8 +73,8 @@ def create_app():
 
     @jwt.token_in_blocklist_loader
     def check_if_token_revoked(jwt_header, jwt_payload):
-        jti = jwt_payload["jti"]
-        return TokenBlacklist.query.filter_by(jti=jti).first() is not None
+        from services.token_revocation import is_token_revoked
+        return is_token_revoked(jwt_payload)
 
     return app
 
@@ -1,111 +1,425 @@
-from datetime import datetime, timedelta
-from sqlalchemy import func, cast, Numeric, extract, text
+from datetime import datetime, timedelta, time
+from sqlalchemy import func, case
+from flask import current_app
 from extensions import db
-from models.order import Order
-import json
+from sqlalchemy.orm import defer, joinedload
+from models.order import Order, OrderItem
+from models.user import User
+from models.product import Product, Category
+from services.shared_cache import shared_key, shared_or_compute
+from models.rollup import DailySalesRollup
+from services.sketch_service import get_sketch_stats
+from utils.pagination import keyset_paginate, DEFAULT_PAGE_SIZE
+from utils.cache import app_cache
+from utils.dates import parse_date_range
 
-def get_admin_analytics():
-    """Generate comprehensive analytics compatible with SQLite and PostgreSQL"""
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    
-    # ===== 1. SUMMARY STATISTICS =====
-    summary = db.session.query(
-        func.count(Order.id).label('total_orders'),
-        func.coalesce(func.sum(Order.total_amount), 0).label('total_revenue'),
-        func.coalesce(func.avg(Order.total_amount), 0).label('avg_order_value')
-    ).filter(Order.created_at >= thirty_days_ago).first()
-    
-    pending_count = Order.query.filter(
-        Order.created_at >= thirty_days_ago,
-        Order.status == 'pending'
-    ).count()
-    
-    # ===== 2. ORDERS TREND (Last 30 days) =====
-    orders_trend = db.session.query(
-        func.date(Order.created_at).label('date'),
-        func.count(Order.id).label('count')
+ANALYTICS_WINDOW_DAYS = 30
+# Shared cache keys of the window-independent reports
+ADMIN_DASHBOARD_KEY = 'admin_dashboard'
+PRODUCT_ANALYTICS_KEY = 'product_analytics'
+GRANULARITIES = ('hour', 'day', 'week', 'month')
+# Upper bound on buckets per series, e.g. a year of hourly data is 8784
+MAX_BUCKETS = 10000
+BUCKET_MIN_LENGTH = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+    'week': timedelta(weeks=1),
+    'month': timedelta(days=28)
+}
+
+
+# ===== TIME BUCKETS =====
+
+def floor_bucket(moment, granularity):
+    """Start of the bucket containing `moment` (weeks start on Monday)"""
+    if granularity == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    day = datetime.combine(moment.date(), time.min)
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start, granularity):
+    if granularity == 'hour':
+        return start + timedelta(hours=1)
+    if granularity == 'week':
+        return start + timedelta(weeks=1)
+    if granularity == 'month':
+        return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return start + timedelta(days=1)
+
+
+def bucket_label(start, granularity):
+    if granularity == 'hour':
+        return start.strftime('%Y-%m-%d %H:00')
+    return start.strftime('%Y-%m-%d')
+
+
+def bucket_starts(start, end, granularity):
+    """Every bucket start covering the half-open range [start, end)"""
+    current = floor_bucket(start, granularity)
+    buckets = []
+    while current < end:
+        buckets.append(current)
+        if len(buckets) > MAX_BUCKETS:
+            raise ValueError(f'Range too large for {granularity} granularity (max {MAX_BUCKETS} buckets)')
+        current = next_bucket(current, granularity)
+    return buckets
+
+
+def bucket_expression(column, granularity):
+    """SQL expression truncating `column` to the start of its bucket"""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return func.date_trunc(granularity, column)
+    if granularity == 'hour':
+        return func.strftime('%Y-%m-%d %H:00:00', column)
+    if granularity == 'week':
+        # Monday on or before the date
+        return func.date(column, '-6 days', 'weekday 1')
+    if granularity == 'month':
+        return func.strftime('%Y-%m-01', column)
+    return func.date(column)
+
+
+def _bucket_key(value, granularity):
+    """Normalize a bucket value returned by either dialect to its start datetime"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    elif not isinstance(value, datetime):
+        value = datetime.combine(value, time.min)
+    return floor_bucket(value, granularity)
+
+
+def parse_analytics_params(args):
+    """
+    Read from/to/granularity query parameters.
+    Defaults to the last ANALYTICS_WINDOW_DAYS days at daily granularity.
+    Bounds are aligned to whole buckets so that equivalent requests share a
+    cache entry. Raises ValueError on bad input.
+    """
+    granularity = (args.get('granularity') or 'day').lower()
+    if granularity not in GRANULARITIES:
+        raise ValueError(f'Invalid granularity. Valid: {list(GRANULARITIES)}')
+
+    start, end = parse_date_range(args.get('from'), args.get('to'))
+    if end is None:
+        end = datetime.utcnow()
+    # Day-level series read the daily rollup, so widen to whole days
+    unit = 'hour' if granularity == 'hour' else 'day'
+    if floor_bucket(end, unit) != end:
+        end = next_bucket(floor_bucket(end, unit), unit)
+    if start is None:
+        start = end - timedelta(days=ANALYTICS_WINDOW_DAYS)
+    start = floor_bucket(start, unit)
+    if (end - start) / BUCKET_MIN_LENGTH[granularity] > MAX_BUCKETS:
+        raise ValueError(f'Range too large for {granularity} granularity (max {MAX_BUCKETS} buckets)')
+    return {'start': start, 'end': end, 'granularity': granularity}
+
+
+# ===== ADMIN ANALYTICS =====
+
+def _series_source(start, end, granularity):
+    """
+    Columns for order-level series over [start, end).
+    Hourly series read orders directly; coarser ones read the '*' rows
+    of the daily rollup, so their cost depends on days, not orders.
+    """
+    if granularity == 'hour':
+        return {
+            'time': Order.created_at,
+            'orders': func.count(Order.id),
+            'revenue': func.coalesce(func.sum(Order.total_amount), 0),
+            'status': Order.status,
+            'filters': [Order.created_at >= start, Order.created_at < end]
+        }
+    return {
+        'time': DailySalesRollup.date,
+        'orders': func.coalesce(func.sum(DailySalesRollup.order_count), 0),
+        'revenue': func.coalesce(func.sum(DailySalesRollup.revenue), 0),
+        'status': DailySalesRollup.status,
+        'filters': [
+            DailySalesRollup.date >= start.date(),
+            DailySalesRollup.date < end.date(),
+            DailySalesRollup.category == DailySalesRollup.ALL_CATEGORIES
+        ]
+    }
+
+
+def _category_query(start, end, granularity):
+    if granularity == 'hour':
+        category = func.coalesce(OrderItem.category_name, 'Uncategorized')
+        revenue = func.coalesce(func.sum(OrderItem.total_price), 0)
+        return db.session.query(
+            category.label('category'),
+            func.count(OrderItem.id).label('count'),
+            revenue.label('revenue')
+        ).join(
+            Order, Order.id == OrderItem.order_id
+        ).filter(
+            Order.created_at >= start, Order.created_at < end
+        ).group_by(category).order_by(revenue.desc())
+
+    revenue = func.coalesce(func.sum(DailySalesRollup.revenue), 0)
+    return db.session.query(
+        DailySalesRollup.category.label('category'),
+        func.sum(DailySalesRollup.line_count).label('count'),
+        revenue.label('revenue')
     ).filter(
-        Order.created_at >= thirty_days_ago
+        DailySalesRollup.date >= start.date(),
+        DailySalesRollup.date < end.date(),
+        DailySalesRollup.category != DailySalesRollup.ALL_CATEGORIES
     ).group_by(
-        func.date(Order.created_at)
-    ).order_by(
-        func.date(Order.created_at)
-    ).all()
+        DailySalesRollup.category
+    ).having(
+        func.sum(DailySalesRollup.line_count) > 0
+    ).order_by(revenue.desc())
+
+
+def get_admin_analytics(start=None, end=None, granularity='day'):
+    """
+    Generate comprehensive analytics compatible with SQLite and PostgreSQL.
+    Covers [start, end), by default the last ANALYTICS_WINDOW_DAYS days.
+    One query grouped by bucket and status yields the summary, both trend
+    series and the status distribution; trends are gap-filled with zeros.
+    Day-aligned windows also get approximate distinct customers and order
+    value percentiles from the daily sketches.
+    """
+    if start is None or end is None:
+        window = parse_analytics_params({'granularity': granularity})
+        start, end = start or window['start'], end or window['end']
+    source = _series_source(start, end, granularity)
     
-    # ===== 3. REVENUE TREND (Last 30 days) =====
-    revenue_trend = db.session.query(
-        func.date(Order.created_at).label('date'),
-        func.coalesce(func.sum(Order.total_amount), 0).label('revenue')
+    # ===== 1. ONE GROUPED SCAN: BUCKET x STATUS =====
+    bucket = bucket_expression(source['time'], granularity)
+    rows = db.session.query(
+        bucket.label('bucket'),
+        source['status'].label('status'),
+        source['orders'].label('count'),
+        source['revenue'].label('revenue')
     ).filter(
-        Order.created_at >= thirty_days_ago
-    ).group_by(
-        func.date(Order.created_at)
-    ).order_by(
-        func.date(Order.created_at)
-    ).all()
+        *source['filters']
+    ).group_by(bucket, source['status']).all()
     
-    # ===== 4. STATUS DISTRIBUTION =====
-    status_dist = db.session.query(
-        Order.status,
-        func.count(Order.id).label('count')
-    ).filter(
-        Order.created_at >= thirty_days_ago
-    ).group_by(Order.status).all()
+    # ===== 2. SUMMARY, TRENDS AND STATUS DISTRIBUTION =====
+    total_orders = 0
+    total_revenue = 0.0
+    by_bucket = {}
+    by_status = {}
+    for r in rows:
+        count, revenue = int(r.count), float(r.revenue)
+        total_orders += count
+        total_revenue += revenue
+        totals = by_bucket.setdefault(_bucket_key(r.bucket, granularity), [0, 0.0])
+        totals[0] += count
+        totals[1] += revenue
+        by_status[r.status] = by_status.get(r.status, 0) + count
+    avg_order_value = total_revenue / total_orders if total_orders else 0
+    
+    orders_trend = []
+    revenue_trend = []
+    for b in bucket_starts(start, end, granularity):
+        count, revenue = by_bucket.get(b, (0, 0.0))
+        label = bucket_label(b, granularity)
+        orders_trend.append({'date': label, 'count': count})
+        revenue_trend.append({'date': label, 'revenue': round(revenue, 2)})
     
-    # ===== 5. CATEGORY-LEVEL STATISTICS (Python-based for SQLite compatibility) =====
-    orders = Order.query.filter(Order.created_at >= thirty_days_ago).all()
-    category_stats = {}
+    # ===== 3. CATEGORY-LEVEL STATISTICS =====
+    category_stats = _category_query(start, end, granularity).all()
     
-    for order in orders:
-        items = json.loads(order.items) if isinstance(order.items, str) else order.items
-        for item in items:
-            category = item.get('category_name', 'Uncategorized')
-            if category not in category_stats:
-                category_stats[category] = {'count': 0, 'revenue': 0}
-            category_stats[category]['count'] += 1
-            category_stats[category]['revenue'] += float(item.get('price', 0)) * int(item.get('quantity', 0))
+    # ===== 4. SKETCHES (day-aligned windows only) =====
+    sketch_stats = {}
+    if granularity != 'hour':
+        sketch_stats = get_sketch_stats(start.date(), end.date())
     
     # Format results for frontend
     return {
+        'window': {
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'granularity': granularity
+        },
         'summary': {
-            'totalOrders': int(summary.total_orders),
-            'totalRevenue': float(summary.total_revenue),
-            'avgOrderValue': float(round(summary.avg_order_value, 2)),
-            'pendingOrders': pending_count
+            'totalOrders': total_orders,
+            'totalRevenue': round(total_revenue, 2),
+            'avgOrderValue': round(avg_order_value, 2),
+            'pendingOrders': by_status.get('pending', 0),
+            **sketch_stats
         },
-        'ordersTrend': [
-            {'date': str(r.date), 'count': r.count} 
-            for r in orders_trend
-        ],
-        'revenueTrend': [
-            {'date': str(r.date), 'revenue': float(r.revenue)} 
-            for r in revenue_trend
-        ],
+        'ordersTrend': orders_trend,
+        'revenueTrend': revenue_trend,
         'statusDistribution': [
-            {'status': r.status, 'count': r.count} 
-            for r in status_dist
+            {'status': status, 'count': count}
+            for status, count in by_status.items() if count > 0
         ],
         'categoryStatistics': [
-            {'category': cat, 'count': stats['count'], 'revenue': stats['revenue']}
-            for cat, stats in sorted(category_stats.items(), key=lambda x: x[1]['revenue'], reverse=True)
+            {'category': r.category, 'count': int(r.count), 'revenue': float(r.revenue)}
+            for r in category_stats
         ]
     }
 
-def get_user_orders(user_id):
-    """Get orders for specific user (customer view)"""
-    return Order.query.filter_by(user_id=user_id)\
-        .order_by(Order.created_at.desc())\
-        .all()
+def get_cached_admin_analytics(start=None, end=None, granularity='day'):
+    """
+    get_admin_analytics() through the per-worker TTL cache.
+    All analytics endpoints share one entry per window and granularity,
+    and concurrent misses wait for a single computation.
+    """
+    if start is None or end is None:
+        window = parse_analytics_params({'granularity': granularity})
+        start, end = start or window['start'], end or window['end']
+    cache = app_cache('admin_analytics', current_app.config.get('ANALYTICS_CACHE_TTL', 30))
+    return cache.get_or_compute(
+        ('admin_analytics', start, end, granularity),
+        lambda: shared_or_compute(
+            admin_analytics_key(start, end, granularity),
+            lambda: get_admin_analytics(start, end, granularity)
+        )
+    )
+
+def admin_analytics_key(start, end, granularity):
+    """Shared cache key of one analytics window"""
+    return shared_key('admin_analytics', start, end, granularity)
 
-def get_all_orders_admin(status=None, start_date=None, end_date=None):
-    """Get all orders with optional filters (admin view)"""
+def get_admin_dashboard(recent_limit=10):
+    """
+    Overview metrics, status distribution and recent orders for the admin
+    dashboard in three statements: one conditional aggregate over users,
+    one over orders grouped by status, and the recent orders with their
+    customers joined in.
+    """
+    since = datetime.utcnow() - timedelta(days=ANALYTICS_WINDOW_DAYS)
+
+    users = db.session.query(
+        func.count(User.id).label('total'),
+        func.coalesce(func.sum(case((User.created_at >= since, 1), else_=0)), 0).label('recent')
+    ).one()
+
+    recent = Order.created_at >= since
+    by_status = db.session.query(
+        Order.status,
+        func.count(Order.id).label('orders'),
+        func.coalesce(func.sum(Order.total_amount), 0).label('revenue'),
+        func.coalesce(func.sum(case((recent, 1), else_=0)), 0).label('recent_orders'),
+        func.coalesce(func.sum(case((recent, Order.total_amount), else_=0)), 0).label('recent_revenue')
+    ).group_by(Order.status).all()
+
+    recent_orders = Order.query.options(
+        joinedload(Order.user)
+    ).order_by(Order.created_at.desc()).limit(recent_limit).all()
+
+    return {
+        'overview': {
+            'totalUsers': int(users.total),
+            'newUsers30d': int(users.recent),
+            'totalOrders': sum(int(r.orders) for r in by_status),
+            'orders30d': sum(int(r.recent_orders) for r in by_status),
+            'pendingOrders': sum(int(r.orders) for r in by_status if r.status == 'pending'),
+            'totalRevenue': float(sum(r.revenue for r in by_status)),
+            'revenue30d': float(sum(r.recent_revenue for r in by_status))
+        },
+        'orderStatus': [{'status': r.status, 'count': int(r.orders)} for r in by_status],
+        'recentOrders': Order.to_dict_list(recent_orders)
+    }
+
+def get_cached_admin_dashboard():
+    """get_admin_dashboard() through the per-worker TTL cache and shared cache"""
+    cache = app_cache('admin_dashboard', current_app.config.get('ANALYTICS_CACHE_TTL', 30))
+    return cache.get_or_compute(
+        'admin_dashboard',
+        lambda: shared_or_compute(ADMIN_DASHBOARD_KEY, get_admin_dashboard)
+    )
+
+def get_product_analytics(top_limit=10):
+    """Catalogue and stock counts, top-selling products and products per category"""
+    stock = db.session.query(
+        func.count(Product.id).label('total'),
+        func.coalesce(func.sum(case(((Product.stock > 0) & (Product.stock <= 10), 1), else_=0)), 0).label('low'),
+        func.coalesce(func.sum(case((func.coalesce(Product.stock, 0) <= 0, 1), else_=0)), 0).label('out')
+    ).one()
+
+    units = func.sum(OrderItem.quantity)
+    top_selling = db.session.query(
+        OrderItem.product_id,
+        func.max(OrderItem.product_name).label('name'),
+        units.label('units'),
+        func.coalesce(func.sum(OrderItem.total_price), 0).label('revenue')
+    ).group_by(OrderItem.product_id).order_by(units.desc()).limit(top_limit).all()
+
+    products_by_category = db.session.query(
+        Category.name, func.count(Product.id)
+    ).join(Product).group_by(Category.name).all()
+    return {
+        'totalProducts': int(stock.total),
+        'lowStock': int(stock.low),
+        'outOfStock': int(stock.out),
+        'topSelling': [
+            {'productId': r.product_id, 'name': r.name, 'units': int(r.units), 'revenue': float(r.revenue)}
+            for r in top_selling
+        ],
+        'byCategory': [{'category': c, 'count': n} for c, n in products_by_category]
+    }
+
+def get_cached_product_analytics():
+    """get_product_analytics() through the per-worker TTL cache and shared cache"""
+    cache = app_cache('product_analytics', current_app.config.get('ANALYTICS_CACHE_TTL', 30))
+    return cache.get_or_compute(
+        'product_analytics',
+        lambda: shared_or_compute(PRODUCT_ANALYTICS_KEY, get_product_analytics)
+    )
+
+def get_user_orders(user_id, cursor=None, limit=DEFAULT_PAGE_SIZE, summary=False):
+    """
+    Get one page of orders for specific user (customer view), newest first.
+    Returns (orders, next_cursor). In summary mode the item and address
+    JSON columns are not loaded.
+    """
+    query = Order.query.filter_by(user_id=user_id)
+    if summary:
+        query = query.options(defer(Order.items), defer(Order.shipping_address))
+    return keyset_paginate(query, Order.created_at, Order.id, cursor=cursor, limit=limit)
+
+def get_all_orders_admin(status=None, start_date=None, end_date=None, user_id=None,
+                         payment_status=None, cursor=None, limit=DEFAULT_PAGE_SIZE,
+                         include_total=False):
+    """
+    Get one page of orders with optional filters (admin view), newest first.
+    start_date/end_date are datetimes bounding a half-open range, see
+    utils.dates.parse_date_range. Returns (orders, next_cursor, total);
+    total is only counted when include_total is set, since COUNT(*) has to
+    visit every matching row.
+    """
     query = Order.query
     
     if status:
         query = query.filter(Order.status == status)
+    if payment_status:
+        query = query.filter(Order.payment_status == payment_status)
+    if user_id:
+        query = query.filter(Order.user_id == user_id)
     if start_date:
         query = query.filter(Order.created_at >= start_date)
     if end_date:
-        query = query.filter(Order.created_at <= end_date)
+        query = query.filter(Order.created_at < end_date)
     
-    return query.order_by(Order.created_at.desc()).all()
\ No newline at end of file
+    total = query.order_by(None).count() if include_total else None
+    orders, next_cursor = keyset_paginate(query, Order.created_at, Order.id, cursor=cursor, limit=limit)
+    return orders, next_cursor, total
+
+
+def admin_order_listing(limit=DEFAULT_PAGE_SIZE, include_total=False, **filters):
+    """
+    Response body of the admin order listings (/api/orders/admin/all and
+    /api/admin/orders); filters are those of get_all_orders_admin
+    """
+    orders, next_cursor, total = get_all_orders_admin(limit=limit, include_total=include_total, **filters)
+    pagination = {'limit': limit, 'next_cursor': next_cursor}
+    if include_total:
+        pagination['total'] = total
+    return {
+        'success': True,
+        'data': Order.to_dict_list(orders),
+        'count': len(orders),
+        'pagination': pagination
+    }
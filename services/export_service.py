@@ -0,0 +1,112 @@
+"""
+Order export service
+Streams orders flattened to one row per order line as CSV or NDJSON
+"""
+
+import csv
+import io
+import json
+from sqlalchemy import select
+from extensions import db
+from models.order import Order, OrderItem
+from models.user import User
+
+EXPORT_COLUMNS = [
+    'order_id', 'invoice_number', 'created_at', 'status', 'payment_status',
+    'customer_id', 'customer_email', 'order_total', 'product_id', 'product_name',
+    'category_name', 'quantity', 'unit_price', 'line_total'
+]
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+# Rows fetched per round-trip from the server-side cursor
+EXPORT_BATCH_SIZE = 1000
+
+
+def _export_statement(status=None, start=None, end=None):
+    stmt = select(
+        Order.id.label('order_id'),
+        Order.invoice_number,
+        Order.created_at,
+        Order.status,
+        Order.payment_status,
+        Order.user_id.label('customer_id'),
+        User.email.label('customer_email'),
+        Order.total_amount.label('order_total'),
+        OrderItem.product_id,
+        OrderItem.product_name,
+        OrderItem.category_name,
+        OrderItem.quantity,
+        OrderItem.unit_price,
+        OrderItem.total_price.label('line_total')
+    ).select_from(Order).outerjoin(
+        OrderItem, OrderItem.order_id == Order.id
+    ).outerjoin(
+        User, User.id == Order.user_id
+    )
+
+    if status:
+        stmt = stmt.where(Order.status == status)
+    if start:
+        stmt = stmt.where(Order.created_at >= start)
+    if end:
+        stmt = stmt.where(Order.created_at < end)
+
+    return stmt.order_by(Order.created_at, Order.id, OrderItem.id)
+
+
+def _json_value(value):
+    if value is None or isinstance(value, (int, str)):
+        return value
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return float(value)
+
+
+def iter_order_rows(status=None, start=None, end=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Yield export rows as dicts, oldest order first.
+    Uses a server-side cursor (stream_results) so only one batch of rows
+    is held in memory at a time.
+    """
+    stmt = _export_statement(status, start, end).execution_options(
+        stream_results=True, yield_per=batch_size
+    )
+    result = db.session.execute(stmt)
+    try:
+        for row in result:
+            yield {column: _json_value(row._mapping[column]) for column in EXPORT_COLUMNS}
+    finally:
+        result.close()
+
+
+def stream_orders_csv(rows):
+    """Encode rows as CSV, one chunk per line, header first"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    remaining = buffer.getvalue()
+    if remaining:
+        yield remaining
+
+
+def stream_orders_ndjson(rows):
+    """Encode rows as newline-delimited JSON"""
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+
+def stream_order_export(fmt, status=None, start=None, end=None):
+    """Return a chunk generator for the requested export format"""
+    rows = iter_order_rows(status, start, end)
+    if fmt == 'csv':
+        return stream_orders_csv(rows)
+    return stream_orders_ndjson(rows)
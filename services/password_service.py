@@ -0,0 +1,85 @@
+"""
+Password hashing service
+Runs the slow KDF on a bounded per-worker thread pool. Callers beyond
+the pool size plus PASSWORD_HASH_QUEUE_LIMIT are refused with
+HashingBusy instead of piling up, so a login burst cannot starve the
+worker's other requests; a hash not done within the timeout raises
+HashTimeout. hashlib's scrypt and pbkdf2 release the GIL, so pool
+threads hash in parallel.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as HashTimeout
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+
+
+class HashingBusy(Exception):
+    """Too many password hashes already queued on this worker"""
+
+
+class PasswordHasher:
+    def __init__(self, method=DEFAULT_METHOD, workers=4, queue_limit=32, timeout=30):
+        self.method = method
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + queue_limit)
+        # Stored hashes start with the fully expanded method, e.g. 'pbkdf2:sha256:600000'
+        self.prefix = generate_password_hash('', method).split('$', 1)[0]
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy('Password hashing queue is full')
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result(self.timeout)
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        return pwhash.split('$', 1)[0] != self.prefix
+
+
+def get_password_hasher():
+    hasher = current_app.extensions.get('password_hasher')
+    if hasher is None:
+        config = current_app.config
+        hasher = current_app.extensions.setdefault('password_hasher', PasswordHasher(
+            method=config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD),
+            workers=config.get('PASSWORD_HASH_WORKERS', 4),
+            queue_limit=config.get('PASSWORD_HASH_QUEUE_LIMIT', 32)
+        ))
+    return hasher
+
+
+def hash_password(password):
+    """Hash with the configured policy on the hashing pool"""
+    return get_password_hasher().hash(password)
+
+
+def verify_password(user, password):
+    """
+    Check password against user's hash on the hashing pool. On success,
+    a hash made under an older policy is replaced (the caller commits)
+    if the pool has room; otherwise the old hash is kept until a later
+    login.
+    """
+    hasher = get_password_hasher()
+    if not hasher.verify(user.password, password):
+        return False
+    if hasher.needs_rehash(user.password):
+        try:
+            user.password = hasher.hash(password)
+        except (HashingBusy, HashTimeout):
+            pass
+    return True
@@ -0,0 +1,158 @@
+"""
+Analytics precompute scheduler
+A daemon thread per worker wakes every ANALYTICS_PRECOMPUTE_INTERVAL
+seconds. The worker that holds the 'analytics_precompute' lease
+folds pending sketch deltas into daily_sketches and recomputes the
+configured analytics windows, the admin dashboard and the product
+analytics into the shared analytics_cache table.
+"""
+
+import logging
+import os
+import random
+import socket
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from models.precompute import SchedulerLease
+from services import analytics_service, sketch_service
+from services.shared_cache import set_shared, purge_expired
+
+LEASE_NAME = 'analytics_precompute'
+
+logger = logging.getLogger(__name__)
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def acquire_lease(name, holder, ttl):
+    """
+    Take or renew the named lease for ttl seconds.
+    Returns True if holder now owns it. The conditional UPDATE lets only
+    one contender win; a missing row is created, and a concurrent insert
+    loses on the primary key.
+    """
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=ttl)
+    table = SchedulerLease.__table__
+    updated = db.session.execute(
+        table.update().where(
+            table.c.name == name,
+            or_(table.c.holder == holder, table.c.expires_at < now)
+        ).values(holder=holder, expires_at=expires_at)
+    ).rowcount
+    if not updated:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(table.insert().values(name=name, holder=holder, expires_at=expires_at))
+        except IntegrityError:
+            db.session.commit()
+            return False
+    db.session.commit()
+    return True
+
+
+def parse_windows(spec):
+    """
+    'day,2:hour,7' -> [(None, 'day'), (2, 'hour'), (7, 'day')]
+    A bare granularity stands for the window the endpoints use when the
+    request gives no bounds; days:granularity for the last `days` days.
+    """
+    windows = []
+    for part in filter(None, (p.strip() for p in (spec or '').split(','))):
+        if part.isdigit():
+            days, granularity = int(part), 'day'
+        elif ':' in part:
+            days, _, granularity = part.partition(':')
+            days = int(days)
+        else:
+            days, granularity = None, part
+        if granularity not in analytics_service.GRANULARITIES:
+            raise ValueError(f'Invalid precompute granularity: {granularity}')
+        windows.append((days, granularity))
+    return windows
+
+
+def window_params(days, granularity):
+    """
+    The aligned window an endpoint would request for the last `days` days,
+    or with days None its default window (the same parse_analytics_params
+    call as a request without from/to)
+    """
+    params = analytics_service.parse_analytics_params({'granularity': granularity})
+    if days is not None:
+        params['start'] = params['end'] - timedelta(days=days)
+    return params
+
+
+def run_precompute(app_config):
+    """
+    Recompute every configured report into the shared cache.
+    Returns the number of entries written.
+    """
+    ttl = max(2 * app_config.get('ANALYTICS_PRECOMPUTE_INTERVAL', 0), app_config.get('ANALYTICS_CACHE_TTL', 30))
+    jobs = [(analytics_service.ADMIN_DASHBOARD_KEY, analytics_service.get_admin_dashboard),
+            (analytics_service.PRODUCT_ANALYTICS_KEY, analytics_service.get_product_analytics)]
+    for days, granularity in parse_windows(app_config.get('ANALYTICS_PRECOMPUTE_WINDOWS')):
+        params = window_params(days, granularity)
+        jobs.append((analytics_service.admin_analytics_key(**params),
+                     lambda params=params: analytics_service.get_admin_analytics(**params)))
+
+    try:
+        sketch_service.compact_sketches()
+    except Exception:
+        db.session.rollback()
+        logger.exception('Sketch compaction failed')
+
+    written = 0
+    for key, compute in jobs:
+        try:
+            set_shared(key, compute(), ttl)
+            db.session.commit()
+            written += 1
+        except Exception:
+            db.session.rollback()
+            logger.exception('Precompute of %s failed', key)
+    purge_expired()
+    db.session.commit()
+    return written
+
+
+def _scheduler_loop(app, interval, stop):
+    holder = worker_id()
+    # Spread the first run so that workers booting together do not collide
+    delay = random.uniform(0, min(interval, 5))
+    while not stop.wait(delay):
+        with app.app_context():
+            try:
+                if acquire_lease(LEASE_NAME, holder, 2 * interval):
+                    run_precompute(app.config)
+            except Exception:
+                logger.exception('Analytics precompute run failed')
+                db.session.rollback()
+            finally:
+                db.session.remove()
+        delay = interval * random.uniform(0.9, 1.1)
+
+
+def start_scheduler(app):
+    """
+    Start the precompute thread for this process if enabled and not
+    already running. Returns the stop Event, or None when disabled.
+    """
+    interval = app.config.get('ANALYTICS_PRECOMPUTE_INTERVAL', 0)
+    if interval <= 0:
+        return None
+    running = app.extensions.get('precompute_scheduler')
+    if running and running[0].is_alive():
+        return running[1]
+    stop = threading.Event()
+    thread = threading.Thread(target=_scheduler_loop, args=(app, interval, stop),
+                              name='analytics-precompute', daemon=True)
+    app.extensions['precompute_scheduler'] = (thread, stop)
+    thread.start()
+    return stop
@@ -0,0 +1,178 @@
+"""
+Prefix-sum revenue index
+Per-worker cumulative daily arrays of revenue, order count and units per
+category. Any date range total is two array lookups.
+"""
+
+import threading
+import time
+from array import array
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from flask import current_app
+from sqlalchemy import func
+from extensions import db
+from models.rollup import DailySalesRollup
+
+ALL = DailySalesRollup.ALL_CATEGORIES
+METRICS = ('orders', 'units', 'revenue')
+
+
+class PrefixSumIndex:
+    """
+    Cumulative per-day totals starting at `origin`.
+    For each category and metric, prefix[i] holds the sum over the first i
+    days, so prefix[0] is always 0 and a [start, end) day range is
+    prefix[end - origin] - prefix[start - origin].
+    """
+
+    def __init__(self, origin, days=0):
+        self.origin = origin
+        self.days = days
+        self._series = {}
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def from_daily_totals(cls, rows):
+        """
+        Build from (date, category, orders, units, revenue) rows.
+        All categories share one day axis from the first to the last date.
+        """
+        daily = defaultdict(lambda: defaultdict(dict))
+        first = last = None
+        for day, category, orders, units, revenue in rows:
+            if isinstance(day, str):
+                day = date.fromisoformat(day)
+            daily[category][day] = (orders, units, float(revenue))
+            first = day if first is None or day < first else first
+            last = day if last is None or day > last else last
+
+        if first is None:
+            return cls(datetime.utcnow().date())
+
+        index = cls(first, (last - first).days + 1)
+        for category, by_day in daily.items():
+            for position, metric in enumerate(METRICS):
+                values = [0.0] * index.days
+                for day, totals in by_day.items():
+                    values[(day - first).days] = totals[position]
+                index._series.setdefault(category, {})[metric] = array('d', accumulate(values, initial=0.0))
+        return index
+
+    @property
+    def categories(self):
+        return sorted(c for c in self._series if c != ALL)
+
+    def _prefix(self, category, metric):
+        series = self._series.get(category)
+        if series is None:
+            series = self._series[category] = {
+                m: array('d', [0.0] * (self.days + 1)) for m in METRICS
+            }
+        return series[metric]
+
+    def _extend_to(self, day):
+        """Grow every series so that `day` is covered"""
+        missing = (day - self.origin).days + 1 - self.days
+        if missing <= 0:
+            return
+        for series in self._series.values():
+            for prefix in series.values():
+                prefix.extend([prefix[-1]] * missing)
+        self.days += missing
+
+    def add(self, day, category, orders=0, units=0, revenue=0.0):
+        """Add one day's contribution; O(1) for the latest day"""
+        if day < self.origin:
+            # Re-base is rare (backdated data); let the next rebuild pick it up
+            return
+        self._extend_to(day)
+        offset = (day - self.origin).days + 1
+        for metric, value in zip(METRICS, (orders, units, float(revenue))):
+            prefix = self._prefix(category, metric)
+            for i in range(offset, len(prefix)):
+                prefix[i] += value
+
+    def range_total(self, start, end, category=ALL):
+        """Totals for the half-open day range [start, end)"""
+        lo = min(max((start - self.origin).days, 0), self.days)
+        hi = min(max((end - self.origin).days, 0), self.days)
+        series = self._series.get(category)
+        if series is None or hi <= lo:
+            return {metric: 0 for metric in METRICS}
+        totals = {metric: series[metric][hi] - series[metric][lo] for metric in METRICS}
+        totals['orders'] = int(totals['orders'])
+        totals['units'] = int(totals['units'])
+        totals['revenue'] = round(totals['revenue'], 2)
+        return totals
+
+
+def build_revenue_index():
+    """Build a PrefixSumIndex from the daily sales rollup (all statuses)"""
+    rows = db.session.query(
+        DailySalesRollup.date,
+        DailySalesRollup.category,
+        func.sum(DailySalesRollup.order_count),
+        func.sum(DailySalesRollup.units),
+        func.sum(DailySalesRollup.revenue)
+    ).group_by(
+        DailySalesRollup.date, DailySalesRollup.category
+    ).order_by(DailySalesRollup.date).all()
+    return PrefixSumIndex.from_daily_totals(rows)
+
+
+_index_lock = threading.Lock()
+
+
+def get_revenue_index():
+    """
+    The current app's index, rebuilt once it is older than
+    REVENUE_INDEX_MAX_AGE seconds so that workers pick up each other's
+    checkouts and rollup rebuilds.
+    """
+    max_age = current_app.config.get('REVENUE_INDEX_MAX_AGE', 60)
+    index = current_app.extensions.get('revenue_index')
+    if index is None or time.monotonic() - index.built_at > max_age:
+        with _index_lock:
+            index = current_app.extensions.get('revenue_index')
+            if index is None or time.monotonic() - index.built_at > max_age:
+                index = current_app.extensions['revenue_index'] = build_revenue_index()
+    return index
+
+
+def record_order(order, cart_items):
+    """Add a committed order to this worker's index, if one is built"""
+    index = current_app.extensions.get('revenue_index')
+    if index is None:
+        return
+    day = order.created_at.date()
+    categories = defaultdict(lambda: [0, 0.0])
+    for item in cart_items:
+        entry = categories[item.get('category_name') or 'Uncategorized']
+        entry[0] += item['quantity']
+        entry[1] += item['unit_price'] * item['quantity']
+    with _index_lock:
+        index.add(day, ALL, 1, sum(u for u, _ in categories.values()), order.total_amount)
+        for category, (units, revenue) in categories.items():
+            index.add(day, category, 1, units, revenue)
+
+
+def range_totals(start, end, breakdown=False):
+    """Totals for [start, end) days, optionally per category"""
+    index = get_revenue_index()
+    result = {'total': index.range_total(start, end)}
+    if breakdown:
+        result['categories'] = [
+            dict(category=category, **index.range_total(start, end, category))
+            for category in index.categories
+        ]
+    return result
+
+
+def day_range(start, end):
+    """Whole days [first, last) covering the datetime range [start, end)"""
+    last = end.date()
+    if end != datetime.combine(last, datetime.min.time()):
+        last += timedelta(days=1)
+    return start.date(), last
@@ -0,0 +1,150 @@
+"""
+Daily sales rollup maintenance
+Keeps daily_sales_rollup in step with orders. Every function here only
+adds statements to the current session; callers commit them together
+with the order change that triggered them.
+"""
+
+from collections import defaultdict
+from datetime import datetime, time
+from sqlalchemy import func, select, literal
+from sqlalchemy.dialects import postgresql, sqlite
+from extensions import db
+from models.order import Order, OrderItem
+from models.rollup import DailySalesRollup
+
+ALL = DailySalesRollup.ALL_CATEGORIES
+METRICS = ('order_count', 'line_count', 'units', 'revenue')
+
+
+def _upsert(rows):
+    """Add rows' metrics onto existing rollup rows, inserting missing keys"""
+    if not rows:
+        return
+    table = DailySalesRollup.__table__
+    dialect = db.session.get_bind().dialect.name
+    insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+    stmt = insert(table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.date, table.c.category, table.c.status],
+        set_={name: table.c[name] + stmt.excluded[name] for name in METRICS}
+    )
+    db.session.execute(stmt)
+
+
+def _order_rows(day, status, total_amount, breakdown, sign=1):
+    """
+    Build rollup rows for one order.
+    breakdown maps category -> (line_count, units, revenue).
+    """
+    rows = [{
+        'date': day, 'category': ALL, 'status': status,
+        'order_count': sign,
+        'line_count': sign * sum(b[0] for b in breakdown.values()),
+        'units': sign * sum(b[1] for b in breakdown.values()),
+        'revenue': sign * float(total_amount)
+    }]
+    for category, (lines, units, revenue) in breakdown.items():
+        rows.append({
+            'date': day, 'category': category, 'status': status,
+            'order_count': sign,
+            'line_count': sign * lines,
+            'units': sign * units,
+            'revenue': sign * float(revenue)
+        })
+    return rows
+
+
+def _breakdown_from_order(order_id):
+    rows = db.session.query(
+        func.coalesce(OrderItem.category_name, 'Uncategorized'),
+        func.count(OrderItem.id),
+        func.coalesce(func.sum(OrderItem.quantity), 0),
+        func.coalesce(func.sum(OrderItem.total_price), 0)
+    ).filter(
+        OrderItem.order_id == order_id
+    ).group_by(
+        func.coalesce(OrderItem.category_name, 'Uncategorized')
+    ).all()
+    return {category: (lines, int(units), revenue) for category, lines, units, revenue in rows}
+
+
+def record_new_order(order, cart_items):
+    """Add a freshly created (flushed) order, using the cart data it was built from"""
+    breakdown = defaultdict(lambda: [0, 0, 0])
+    for item in cart_items:
+        entry = breakdown[item.get('category_name') or 'Uncategorized']
+        entry[0] += 1
+        entry[1] += item['quantity']
+        entry[2] += item['unit_price'] * item['quantity']
+    _upsert(_order_rows(order.created_at.date(), order.status, order.total_amount,
+                        {k: tuple(v) for k, v in breakdown.items()}))
+
+
+def record_status_change(order, old_status):
+    """Move an order's contribution from old_status to its current status"""
+    if old_status == order.status:
+        return
+    breakdown = _breakdown_from_order(order.id)
+    day = order.created_at.date()
+    _upsert(
+        _order_rows(day, old_status, order.total_amount, breakdown, sign=-1)
+        + _order_rows(day, order.status, order.total_amount, breakdown)
+    )
+
+
+def rebuild_rollup(since=None):
+    """
+    Recompute daily_sales_rollup from orders and order_items.
+    With `since` (a date) only days on or after it are rebuilt.
+    Returns the number of rollup rows written.
+    """
+    table = DailySalesRollup.__table__
+    day = func.date(Order.created_at)
+    status = func.coalesce(Order.status, 'pending')
+
+    delete = table.delete()
+    if since:
+        delete = delete.where(table.c.date >= since)
+    db.session.execute(delete)
+
+    order_filter = [Order.created_at.isnot(None)]
+    if since:
+        order_filter.append(Order.created_at >= datetime.combine(since, time.min))
+
+    per_order = select(
+        OrderItem.order_id,
+        func.count(OrderItem.id).label('lines'),
+        func.sum(OrderItem.quantity).label('units')
+    ).group_by(OrderItem.order_id).subquery()
+
+    totals = select(
+        day,
+        literal(ALL),
+        status,
+        func.count(Order.id),
+        func.coalesce(func.sum(per_order.c.lines), 0),
+        func.coalesce(func.sum(per_order.c.units), 0),
+        func.coalesce(func.sum(Order.total_amount), 0)
+    ).select_from(Order).outerjoin(
+        per_order, per_order.c.order_id == Order.id
+    ).where(*order_filter).group_by(day, status)
+
+    category = func.coalesce(OrderItem.category_name, 'Uncategorized')
+    by_category = select(
+        day,
+        category,
+        status,
+        func.count(func.distinct(Order.id)),
+        func.count(OrderItem.id),
+        func.coalesce(func.sum(OrderItem.quantity), 0),
+        func.coalesce(func.sum(OrderItem.total_price), 0)
+    ).select_from(OrderItem).join(
+        Order, Order.id == OrderItem.order_id
+    ).where(*order_filter).group_by(day, category, status)
+
+    columns = ['date', 'category', 'status'] + list(METRICS)
+    written = 0
+    for query in (totals, by_category):
+        written += db.session.execute(table.insert().from_select(columns, query)).rowcount
+    return written
@@ -0,0 +1,50 @@
+"""
+Per-user security epochs
+Access tokens carry the user's role and security epoch as claims. Role
+changes and deletions bump the epoch, so the claims of older tokens no
+longer match. Each worker caches epochs for SECURITY_EPOCH_CACHE_TTL
+seconds, which bounds how long a stale token keeps working elsewhere.
+"""
+
+from flask import current_app
+from extensions import db
+from models.user import User
+from utils.cache import app_cache
+
+_MISSING = 'deleted'
+
+
+def _epoch_cache():
+    return app_cache('security_epochs', current_app.config.get('SECURITY_EPOCH_CACHE_TTL', 30))
+
+
+def token_claims(user):
+    """additional_claims for tokens issued to user"""
+    return {'role': user.role, 'epoch': user.security_epoch or 0}
+
+
+def _load_epoch(user_id):
+    row = db.session.query(User.security_epoch).filter_by(id=user_id).first()
+    return _MISSING if row is None else (row[0] or 0)
+
+
+def current_epoch(user_id):
+    """The user's security epoch, or None if the user no longer exists"""
+    epoch = _epoch_cache().get_or_compute(str(user_id), lambda: _load_epoch(user_id))
+    return None if epoch == _MISSING else epoch
+
+
+def claims_are_current(user_id, claims):
+    """True if the token's epoch claim is at least the user's current epoch"""
+    epoch = current_epoch(user_id)
+    return epoch is not None and claims.get('epoch', -1) >= epoch
+
+
+def bump_security_epoch(user):
+    """Invalidate the user's existing tokens; the caller commits, then calls forget_security_epoch"""
+    user.security_epoch = (user.security_epoch or 0) + 1
+
+
+def forget_security_epoch(user_id):
+    """Drop this worker's cached epoch after a committed change"""
+    _epoch_cache().invalidate(str(user_id))
@@ -0,0 +1,53 @@
+"""
+Shared analytics cache
+JSON results in the analytics_cache table, written by the precompute
+scheduler and read by every worker before computing on its own.
+"""
+
+import json
+from datetime import datetime, timedelta
+from sqlalchemy.dialects import postgresql, sqlite
+from extensions import db
+from models.precompute import AnalyticsCacheEntry
+
+
+def shared_key(*parts):
+    """Stable string key from name and parameters (datetimes as ISO)"""
+    return ':'.join(p.isoformat() if hasattr(p, 'isoformat') else str(p) for p in parts)
+
+
+def get_shared(key):
+    """The unexpired value stored under key, or None"""
+    value = db.session.query(AnalyticsCacheEntry.value).filter(
+        AnalyticsCacheEntry.key == key,
+        AnalyticsCacheEntry.expires_at > datetime.utcnow()
+    ).scalar()
+    return json.loads(value) if value is not None else None
+
+
+def set_shared(key, value, ttl):
+    """Insert or replace key; the caller commits"""
+    now = datetime.utcnow()
+    table = AnalyticsCacheEntry.__table__
+    dialect = db.session.get_bind().dialect.name
+    insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+    row = {'key': key, 'value': json.dumps(value, default=str),
+           'computed_at': now, 'expires_at': now + timedelta(seconds=ttl)}
+    stmt = insert(table).values(row)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.key],
+        set_={name: stmt.excluded[name] for name in ('value', 'computed_at', 'expires_at')}
+    ))
+
+
+def purge_expired():
+    """Delete expired entries; returns the number removed"""
+    return AnalyticsCacheEntry.query.filter(
+        AnalyticsCacheEntry.expires_at <= datetime.utcnow()
+    ).delete(synchronize_session=False)
+
+
+def shared_or_compute(key, compute):
+    """The shared value for key if present, else compute() (not stored)"""
+    value = get_shared(key)
+    return value if value is not None else compute()
@@ -0,0 +1,201 @@
+"""
+Daily analytics sketches
+Keeps one HyperLogLog of customers and one DDSketch of order values per
+order day in daily_sketches. Any window is answered by merging its days'
+sketches, without scanning orders.
+
+Checkout only appends a row to sketch_deltas, so concurrent orders never
+contend for a day's sketch rows. Readers add the pending deltas to the
+stored sketches; compact_sketches folds them in and deletes them. It
+runs from the precompute job, from `flask analytics compact-sketches`,
+and after checkout once a worker has recorded SKETCH_COMPACT_THRESHOLD
+deltas, so the backlog stays bounded when precompute is disabled.
+"""
+
+from collections import defaultdict
+from datetime import datetime, time
+from flask import current_app
+from sqlalchemy import func, null, select
+from sqlalchemy.dialects import postgresql, sqlite
+from extensions import db
+from models.order import Order
+from models.sketch import DailySketch, SketchDelta
+from utils.sketches import DDSketch, HyperLogLog
+
+SKETCH_TYPES = {
+    DailySketch.CUSTOMERS: HyperLogLog,
+    DailySketch.ORDER_VALUE: DDSketch
+}
+PERCENTILES = (50, 90, 95, 99)
+
+# Rows fetched per round-trip when rebuilding from orders
+REBUILD_BATCH_SIZE = 5000
+# Deltas folded per compaction transaction
+COMPACT_BATCH_SIZE = 5000
+
+
+def _add_order(sketches, user_id, total_amount):
+    sketches[DailySketch.CUSTOMERS].add(user_id)
+    sketches[DailySketch.ORDER_VALUE].add(total_amount or 0)
+
+
+def record_new_order(order):
+    """
+    Record a freshly created (flushed) order for its day's sketches.
+    This is a plain insert, committed with the order; no sketch row is
+    read or locked.
+    """
+    db.session.execute(SketchDelta.__table__.insert().values(
+        date=order.created_at.date(), user_id=order.user_id, total_amount=order.total_amount
+    ))
+    recorded = current_app.extensions.get('sketch_deltas_recorded', 0) + 1
+    current_app.extensions['sketch_deltas_recorded'] = recorded
+
+
+def compact_if_due():
+    """
+    Compact once this worker has recorded SKETCH_COMPACT_THRESHOLD deltas
+    since its last compaction, so that the backlog stays bounded even
+    without the precompute job. Call after the order is committed.
+    Returns the number of deltas folded.
+    """
+    threshold = current_app.config.get('SKETCH_COMPACT_THRESHOLD', 1000)
+    if threshold <= 0 or current_app.extensions.get('sketch_deltas_recorded', 0) < threshold:
+        return 0
+    current_app.extensions['sketch_deltas_recorded'] = 0
+    return compact_sketches()
+
+
+def _claim_deltas(batch_size):
+    """
+    Delete and return the oldest batch_size deltas. On Postgres rows
+    another compactor has claimed are skipped, so no delta is folded
+    twice; SQLite serializes the writers anyway.
+    """
+    table = SketchDelta.__table__
+    batch = select(table.c.id).order_by(table.c.id).limit(batch_size)
+    if db.session.get_bind().dialect.name == 'postgresql':
+        batch = batch.with_for_update(skip_locked=True)
+    return db.session.execute(
+        table.delete().where(table.c.id.in_(batch.scalar_subquery()))
+        .returning(table.c.date, table.c.user_id, table.c.total_amount)
+    ).all()
+
+
+def compact_sketches(batch_size=COMPACT_BATCH_SIZE):
+    """
+    Fold pending deltas into daily_sketches, batch_size deltas per
+    transaction. Deltas are claimed (deleted) before the sketch rows are
+    locked, so concurrent compactors fold disjoint batches, and only
+    compaction updates sketch rows, so their lock is never held by a
+    checkout. Returns the number of deltas folded.
+    """
+    table = DailySketch.__table__
+    dialect = db.session.get_bind().dialect.name
+    insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+    folded = 0
+    while True:
+        deltas = _claim_deltas(batch_size)
+        if not deltas:
+            db.session.commit()
+            break
+        by_day = defaultdict(list)
+        for day, user_id, total_amount in deltas:
+            by_day[day].append((user_id, total_amount))
+
+        now = datetime.utcnow()
+        db.session.execute(insert(table).values([
+            {'date': day, 'name': name, 'data': sketch_type().to_bytes(), 'updated_at': now}
+            for day in by_day
+            for name, sketch_type in SKETCH_TYPES.items()
+        ]).on_conflict_do_nothing(index_elements=['date', 'name']))
+        rows = DailySketch.query.filter(DailySketch.date.in_(list(by_day))).with_for_update().all()
+        sketches = defaultdict(dict)
+        for row in rows:
+            if row.name in SKETCH_TYPES:
+                sketches[row.date][row.name] = (row, SKETCH_TYPES[row.name].from_bytes(row.data))
+        for day, orders in by_day.items():
+            day_sketches = {name: sketch for name, (_, sketch) in sketches[day].items()}
+            for user_id, total_amount in orders:
+                _add_order(day_sketches, user_id, total_amount)
+            for row, sketch in sketches[day].values():
+                row.data = sketch.to_bytes()
+        db.session.commit()
+        folded += len(deltas)
+        if len(deltas) < batch_size:
+            break
+    return folded
+
+
+def rebuild_sketches(since=None):
+    """
+    Recompute daily_sketches from orders.
+    With `since` (a date) only days on or after it are rebuilt.
+    Returns the number of sketch rows written.
+    """
+    table = DailySketch.__table__
+    delete = table.delete()
+    # Orders are read in full, so their pending deltas are redundant
+    delete_deltas = SketchDelta.__table__.delete()
+    stmt = select(
+        func.date(Order.created_at), Order.user_id, Order.total_amount
+    ).where(Order.created_at.isnot(None))
+    if since:
+        delete = delete.where(table.c.date >= since)
+        delete_deltas = delete_deltas.where(SketchDelta.date >= since)
+        stmt = stmt.where(Order.created_at >= datetime.combine(since, time.min))
+    db.session.execute(delete)
+    db.session.execute(delete_deltas)
+
+    by_day = defaultdict(lambda: {name: sketch_type() for name, sketch_type in SKETCH_TYPES.items()})
+    result = db.session.execute(stmt.execution_options(stream_results=True, yield_per=REBUILD_BATCH_SIZE))
+    try:
+        for day, user_id, total_amount in result:
+            if isinstance(day, str):
+                day = datetime.strptime(day, '%Y-%m-%d').date()
+            _add_order(by_day[day], user_id, total_amount)
+    finally:
+        result.close()
+
+    now = datetime.utcnow()
+    rows = [
+        {'date': day, 'name': name, 'data': sketch.to_bytes(), 'updated_at': now}
+        for day, sketches in by_day.items()
+        for name, sketch in sketches.items()
+    ]
+    if rows:
+        db.session.execute(table.insert(), rows)
+    return len(rows)
+
+
+def merged_sketches(start, end):
+    """Merge the sketches and pending deltas of days [start, end) into one per metric"""
+    merged = {name: sketch_type() for name, sketch_type in SKETCH_TYPES.items()}
+    # One statement, so a compaction committing meanwhile is seen either
+    # entirely or not at all
+    stored = select(
+        DailySketch.name, DailySketch.data, null().label('user_id'), null().label('total_amount')
+    ).where(DailySketch.date >= start, DailySketch.date < end)
+    pending = select(
+        null(), null(), SketchDelta.user_id, SketchDelta.total_amount
+    ).where(SketchDelta.date >= start, SketchDelta.date < end)
+    for name, data, user_id, total_amount in db.session.execute(stored.union_all(pending)):
+        if name is None:
+            _add_order(merged, user_id, total_amount)
+        elif name in merged:
+            merged[name].merge(SKETCH_TYPES[name].from_bytes(data))
+    return merged
+
+
+def get_sketch_stats(start, end):
+    """Approximate distinct customers and order value percentiles for days [start, end)"""
+    sketches = merged_sketches(start, end)
+    order_values = sketches[DailySketch.ORDER_VALUE]
+    percentiles = {}
+    for p in PERCENTILES:
+        value = order_values.quantile(p / 100)
+        percentiles[f'p{p}'] = round(value, 2) if value is not None else None
+    return {
+        'distinctCustomers': sketches[DailySketch.CUSTOMERS].count(),
+        'orderValuePercentiles': percentiles
+    }
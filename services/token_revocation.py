@@ -0,0 +1,179 @@
+"""
+JWT revocation cache
+Answers "is this jti revoked?" from memory on each worker. A bloom filter
+holds every revoked jti; only bloom hits reach the database, and their
+answers are kept in a small LRU. New token_blacklist rows are pulled in
+incrementally by id, so a logout on one worker reaches the others within
+TOKEN_REVOCATION_REFRESH_INTERVAL seconds. Ids from concurrent
+transactions can commit out of order, so each refresh re-reads the last
+REFRESH_ID_OVERLAP ids as well, and the whole table is reloaded every
+TOKEN_REVOCATION_FULL_RELOAD_INTERVAL seconds to bound the delay for
+anything the overlap misses. Rows for tokens that have already expired
+are skipped, since those tokens fail verification anyway.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import or_
+from extensions import db
+from models.tokenblacklist import TokenBlacklist
+from utils.bloom import BloomFilter
+
+MIN_CAPACITY = 10000
+PURGE_BATCH_SIZE = 1000
+# Ids below the high-water mark re-read on every refresh, for rows whose
+# transaction committed after a higher id had already been seen
+REFRESH_ID_OVERLAP = 1000
+
+
+def _unexpired(now=None):
+    return or_(TokenBlacklist.expires_at.is_(None), TokenBlacklist.expires_at > (now or datetime.utcnow()))
+
+
+class RevocationCache:
+    def __init__(self, refresh_interval=5, lru_size=10000, error_rate=0.01, full_reload_interval=300):
+        self.refresh_interval = refresh_interval
+        self.full_reload_interval = full_reload_interval
+        self.lru_size = lru_size
+        self.error_rate = error_rate
+        self.high_water_mark = None
+        self.bloom = None
+        self.refreshed_at = None
+        self.reloaded_at = None
+        self._answers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _reload(self):
+        """Rebuild the filter from the whole table"""
+        rows = db.session.query(TokenBlacklist.id, TokenBlacklist.jti, TokenBlacklist.expires_at).all()
+        # The mark comes from the rows actually read, so a row committed
+        # after this query is still above it on the next refresh
+        high_water_mark = max((row_id for row_id, _, _ in rows), default=0)
+        current = datetime.utcnow()
+        live = [jti for _, jti, expires_at in rows if expires_at is None or expires_at > current]
+        bloom = BloomFilter(max(MIN_CAPACITY, 2 * len(live)), self.error_rate)
+        for jti in live:
+            bloom.add(jti)
+        self.bloom = bloom
+        self.high_water_mark = high_water_mark
+        self.reloaded_at = time.monotonic()
+        self._answers.clear()
+
+    def refresh(self, force=False):
+        """Pull rows added around the high-water mark, at most once per interval"""
+        now = time.monotonic()
+        if not force and self.refreshed_at is not None and now - self.refreshed_at < self.refresh_interval:
+            return
+        with self._lock:
+            if not force and self.refreshed_at is not None and now - self.refreshed_at < self.refresh_interval:
+                return
+            if self.bloom is None or now - self.reloaded_at >= self.full_reload_interval:
+                self._reload()
+            else:
+                rows = db.session.query(
+                    TokenBlacklist.id, TokenBlacklist.jti, TokenBlacklist.expires_at
+                ).filter(
+                    TokenBlacklist.id > self.high_water_mark - REFRESH_ID_OVERLAP
+                ).order_by(TokenBlacklist.id).all()
+                current = datetime.utcnow()
+                for row_id, jti, expires_at in rows:
+                    if expires_at is None or expires_at > current:
+                        self._merge(jti)
+                    self.high_water_mark = max(self.high_water_mark, row_id)
+                if self.bloom.is_full:
+                    self._reload()
+            self.refreshed_at = now
+
+    def _add(self, jti):
+        self.bloom.add(jti)
+        self._answers[jti] = True
+        self._answers.move_to_end(jti)
+        self._trim()
+
+    def _merge(self, jti):
+        # The overlap returns rows already recorded; adding them again
+        # would only churn the LRU
+        if jti not in self.bloom or self._answers.get(jti) is False:
+            self._add(jti)
+
+    def _trim(self):
+        while len(self._answers) > self.lru_size:
+            self._answers.popitem(last=False)
+
+    def add(self, jti):
+        """Record a revocation made by this worker without waiting for a refresh"""
+        self.refresh()
+        with self._lock:
+            self._add(jti)
+
+    def is_revoked(self, jti):
+        self.refresh()
+        if jti not in self.bloom:
+            return False
+        with self._lock:
+            answer = self._answers.get(jti)
+            if answer is not None:
+                self._answers.move_to_end(jti)
+                return answer
+        answer = db.session.query(TokenBlacklist.id).filter_by(jti=jti).first() is not None
+        with self._lock:
+            # A refresh may have recorded a revocation meanwhile; never downgrade it
+            answer = self._answers.get(jti) or answer
+            self._answers[jti] = answer
+            self._trim()
+        return answer
+
+
+def get_revocation_cache():
+    cache = current_app.extensions.get('token_revocation')
+    if cache is None:
+        cache = current_app.extensions.setdefault('token_revocation', RevocationCache(
+            refresh_interval=current_app.config.get('TOKEN_REVOCATION_REFRESH_INTERVAL', 5),
+            lru_size=current_app.config.get('TOKEN_REVOCATION_LRU_SIZE', 10000),
+            full_reload_interval=current_app.config.get('TOKEN_REVOCATION_FULL_RELOAD_INTERVAL', 300)
+        ))
+    return cache
+
+
+def is_token_revoked(jwt_payload):
+    """token_in_blocklist_loader body"""
+    exp = jwt_payload.get('exp')
+    if exp is not None and exp <= time.time():
+        # Expired naturally; its blacklist row may already be purged
+        return False
+    return get_revocation_cache().is_revoked(jwt_payload['jti'])
+
+
+def purge_expired_tokens(batch_size=PURGE_BATCH_SIZE, max_token_age=None):
+    """
+    Delete blacklist rows of tokens that have expired, batch_size rows per
+    transaction so that the table is never locked for long. Rows without
+    an expiry go once they are older than max_token_age, by default the
+    longest configured token lifetime. Returns the number deleted.
+    """
+    if max_token_age is None:
+        max_token_age = max(current_app.config['JWT_ACCESS_TOKEN_EXPIRES'],
+                            current_app.config['JWT_REFRESH_TOKEN_EXPIRES'])
+    now = datetime.utcnow()
+    expired = or_(
+        TokenBlacklist.expires_at <= now,
+        TokenBlacklist.expires_at.is_(None) & (TokenBlacklist.created_at < now - max_token_age)
+    )
+    deleted = 0
+    while True:
+        ids = [row_id for (row_id,) in db.session.query(TokenBlacklist.id).filter(expired).limit(batch_size)]
+        if not ids:
+            break
+        deleted += TokenBlacklist.query.filter(TokenBlacklist.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        if len(ids) < batch_size:
+            break
+    return deleted
+
+
+def token_revoked(jti):
+    """Make a committed token_blacklist row visible on this worker immediately"""
+    get_revocation_cache().add(jti)
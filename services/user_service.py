@@ -0,0 +1,118 @@
+"""
+User listing service
+Keyset-paginated user listings that load only the listed columns, with
+case-insensitive email prefix search on ix_users_email_lower. Also
+resolves accounts whose emails differ only in case, which the unique
+lower(email) index rejects (see `flask users resolve-email-duplicates`).
+"""
+
+from collections import defaultdict
+from sqlalchemy import func
+from extensions import db
+from models.cart import Cart, CartItem, Invoice
+from models.order import Order
+from models.user import User, normalize_email
+from utils.pagination import DEFAULT_PAGE_SIZE, keyset_paginate_by_id
+
+LISTING_COLUMNS = (User.id, User.email, User.role, User.created_at)
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def user_row_to_dict(row):
+    return {
+        'id': row.id,
+        'email': row.email,
+        'role': row.role,
+        'created_at': row.created_at.isoformat() if row.created_at else None
+    }
+
+
+def list_users(search=None, role=None, cursor=None, limit=DEFAULT_PAGE_SIZE, include_total=False):
+    """
+    One page of users, newest first. `search` matches the start of the
+    email, ignoring case. Returns (rows, next_cursor, total); total is only
+    counted when include_total is set.
+    """
+    query = db.session.query(*LISTING_COLUMNS)
+    search = (search or '').strip().lower()
+    if search:
+        query = query.filter(func.lower(User.email).like(f'{_escape_like(search)}%', escape='\\'))
+    if role:
+        query = query.filter(User.role == role)
+
+    total = query.order_by(None).count() if include_total else None
+    rows, next_cursor = keyset_paginate_by_id(query, User.id, cursor=cursor, limit=limit)
+    return rows, next_cursor, total
+
+
+def find_email_duplicates():
+    """
+    Accounts whose emails are equal ignoring case and surrounding
+    whitespace, as lists of rows (id, role, created_at, orders), oldest
+    account first
+    """
+    orders = db.session.query(Order.user_id, func.count(Order.id).label('orders')).group_by(Order.user_id).subquery()
+    rows = db.session.query(
+        User.id, User.email, User.role, User.created_at, func.coalesce(orders.c.orders, 0).label('orders')
+    ).outerjoin(orders, orders.c.user_id == User.id).order_by(User.id).all()
+    groups = defaultdict(list)
+    for row in rows:
+        groups[normalize_email(row.email)].append(row)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def merge_users(keep_id, duplicate_ids):
+    """
+    Move the orders, invoices and (if keep_id has none) the cart of
+    duplicate_ids to keep_id and delete those accounts. All of them must
+    share keep_id's email ignoring case and have the same role; raises
+    ValueError otherwise. The caller commits.
+    """
+    keep = db.session.get(User, keep_id)
+    duplicates = [db.session.get(User, user_id) for user_id in duplicate_ids]
+    if keep is None or None in duplicates:
+        raise ValueError('Unknown user id')
+    for duplicate in duplicates:
+        if duplicate.id == keep.id or normalize_email(duplicate.email) != normalize_email(keep.email):
+            raise ValueError(f'User {duplicate.id} does not share the email of user {keep.id}')
+        if duplicate.role != keep.role:
+            raise ValueError(f'User {duplicate.id} has role {duplicate.role!r}, user {keep.id} has {keep.role!r}; '
+                             f'rename one of them instead')
+
+    has_cart = Cart.query.filter_by(user_id=keep.id).first() is not None
+    for duplicate in duplicates:
+        Order.query.filter_by(user_id=duplicate.id).update({'user_id': keep.id}, synchronize_session=False)
+        Invoice.query.filter_by(user_id=duplicate.id).update({'user_id': keep.id}, synchronize_session=False)
+        cart = Cart.query.filter_by(user_id=duplicate.id).first()
+        if cart is not None:
+            if has_cart:
+                CartItem.query.filter_by(cart_id=cart.id).delete(synchronize_session=False)
+                db.session.delete(cart)
+            else:
+                cart.user_id = keep.id
+                has_cart = True
+        db.session.flush()
+        db.session.delete(duplicate)
+    db.session.flush()
+
+
+def rename_user_email(user_id, email):
+    """
+    Give user_id a new email address, refusing one another account
+    already uses (ignoring case). The caller commits.
+    """
+    user = db.session.get(User, user_id)
+    if user is None:
+        raise ValueError('Unknown user id')
+    email = normalize_email(email)
+    if not email or '@' not in email:
+        raise ValueError('Invalid email address')
+    taken = User.query.filter(func.lower(User.email) == email, User.id != user.id).first()
+    if taken is not None:
+        raise ValueError(f'User {taken.id} already uses that email')
+    user.email = email
+    db.session.flush()
+    return user
@@ -0,0 +1,82 @@
+# Admin order listing tests
+# Covers /api/orders/admin/all and /api/admin/orders
+
+import json
+import unittest
+from datetime import datetime, timedelta
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from models.order import Order
+from models.user import User
+
+
+class TestAdminOrderListing(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            admin = User(email='ops@test.com', role='admin')
+            admin.set_password('ops123')
+            customers = [User(email=f'c{n}@test.com', role='customer') for n in range(2)]
+            for customer in customers:
+                customer.set_password('c123')
+            db.session.add_all([admin] + customers)
+            db.session.commit()
+
+            base = datetime(2026, 3, 1)
+            for i in range(30):
+                db.session.add(Order(
+                    user_id=customers[i % 2].id,
+                    status='pending' if i % 3 == 0 else 'shipped',
+                    payment_status='paid' if i % 5 == 0 else 'pending',
+                    total_amount=10 * i,
+                    items=json.dumps([]),
+                    created_at=base + timedelta(days=i)
+                ))
+            db.session.commit()
+            self.customer_id = customers[1].id
+            self.token = create_access_token(identity=str(admin.id))
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def get(self, url, **params):
+        return self.client.get(url, query_string=params,
+                               headers={'Authorization': f'Bearer {self.token}'})
+
+    def test_status_filter_paginates_newest_first(self):
+        first = self.get('/api/orders/admin/all', status='pending', limit=6).get_json()
+        self.assertEqual(first['count'], 6)
+        self.assertNotIn('total', first['pagination'])
+        second = self.get('/api/orders/admin/all', status='pending', limit=6,
+                          cursor=first['pagination']['next_cursor']).get_json()
+        self.assertEqual(second['count'], 4)
+        self.assertIsNone(second['pagination']['next_cursor'])
+
+        dates = [o['createdAt'] for o in first['data'] + second['data']]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+        self.assertTrue(all(o['status'] == 'pending' for o in first['data'] + second['data']))
+
+    def test_both_endpoints_share_filters_and_optional_total(self):
+        params = dict(payment_status='pending', user_id=self.customer_id,
+                      start_date='2026-03-10', end_date='2026-03-20', include_total='true')
+        a = self.get('/api/orders/admin/all', **params).get_json()
+        b = self.get('/api/admin/orders', **params).get_json()
+        self.assertEqual([o['id'] for o in a['data']], [o['id'] for o in b['data']])
+        self.assertEqual(a['pagination']['total'], a['count'])
+        self.assertTrue(all(o['customerId'] == self.customer_id for o in a['data']))
+
+    def test_only_first_page_parameter_is_accepted(self):
+        for path in ('/api/orders/admin/all', '/api/admin/orders'):
+            self.assertEqual(self.get(path, page=1).status_code, 200)
+            response = self.get(path, page=2)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('cursor', response.get_json()['message'])
+
+if __name__ == '__main__':
+    unittest.main()
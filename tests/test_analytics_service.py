@@ -0,0 +1,217 @@
+# Analytics service tests
+# Covers get_admin_analytics against a small seeded order history
+
+import unittest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import create_app, db
+from models.order import Order
+from models.rollup import DailySalesRollup
+from models.user import User
+from services.analytics_service import get_admin_analytics, get_admin_dashboard, get_cached_admin_dashboard, parse_analytics_params
+from services.rollup_service import rebuild_rollup, record_new_order, record_status_change
+
+
+def cart_line(product_id, category, price, quantity=1):
+    return {'product_id': product_id, 'product_name': f'Product {product_id}',
+            'quantity': quantity, 'unit_price': price, 'category_name': category}
+
+
+class TestAdminAnalytics(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        user = User(email='analyst@test.com', role='customer')
+        user.set_password('analyst123')
+        db.session.add(user)
+        db.session.commit()
+
+        now = datetime.utcnow()
+        carts = [
+            (now - timedelta(days=1), 'pending', [cart_line(1, 'Men', 100.0, 2), cart_line(2, 'Women', 50.0)]),
+            (now - timedelta(days=2), 'shipped', [cart_line(3, 'Women', 80.0, 3)]),
+            (now - timedelta(days=2), 'pending', [cart_line(4, 'Accessories', 20.0)]),
+            # Outside the 30 day window
+            (now - timedelta(days=45), 'delivered', [cart_line(5, 'Men', 999.0)]),
+        ]
+        for created_at, status, lines in carts:
+            order = Order.create_from_cart_bulk(user.id, lines)
+            order.created_at = created_at
+            order.status = status
+        db.session.commit()
+        rebuild_rollup()
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_summary(self):
+        summary = get_admin_analytics()['summary']
+        self.assertEqual(summary['totalOrders'], 3)
+        self.assertEqual(summary['totalRevenue'], 510.0)
+        self.assertEqual(summary['pendingOrders'], 2)
+
+    def test_category_statistics(self):
+        stats = get_admin_analytics()['categoryStatistics']
+        self.assertEqual(stats, [
+            {'category': 'Women', 'count': 2, 'revenue': 290.0},
+            {'category': 'Men', 'count': 1, 'revenue': 200.0},
+            {'category': 'Accessories', 'count': 1, 'revenue': 20.0},
+        ])
+
+    def test_trends_and_status_distribution(self):
+        analytics = get_admin_analytics()
+        self.assertEqual(sum(r['count'] for r in analytics['ordersTrend']), 3)
+        self.assertEqual(sum(r['revenue'] for r in analytics['revenueTrend']), 510.0)
+        statuses = {r['status']: r['count'] for r in analytics['statusDistribution']}
+        self.assertEqual(statuses, {'pending': 2, 'shipped': 1})
+
+    def test_daily_trend_is_gap_filled(self):
+        trend = get_admin_analytics()['ordersTrend']
+        self.assertEqual(len(trend), 30)
+        self.assertEqual(trend[-1]['date'], datetime.utcnow().strftime('%Y-%m-%d'))
+        self.assertEqual([r['count'] for r in trend].count(0), 28)
+
+    def test_custom_window_and_granularity(self):
+        window = parse_analytics_params({'from': '2020-01-01', 'to': '2020-03-15', 'granularity': 'month'})
+        analytics = get_admin_analytics(**window)
+        self.assertEqual([r['date'] for r in analytics['ordersTrend']],
+                         ['2020-01-01', '2020-02-01', '2020-03-01'])
+        self.assertEqual(analytics['summary']['totalOrders'], 0)
+
+        window = parse_analytics_params({'granularity': 'week', 'from': '2020-01-01', 'to': '2020-01-31'})
+        labels = [r['date'] for r in get_admin_analytics(**window)['ordersTrend']]
+        self.assertEqual(labels[0], '2019-12-30')
+        self.assertTrue(all(datetime.strptime(d, '%Y-%m-%d').weekday() == 0 for d in labels))
+
+    def test_hourly_series_reads_orders(self):
+        now = datetime.utcnow()
+        window = parse_analytics_params({
+            'granularity': 'hour',
+            'from': (now - timedelta(days=3)).isoformat(),
+            'to': now.isoformat()
+        })
+        analytics = get_admin_analytics(**window)
+        # 72 whole hours plus the partial current hour
+        self.assertEqual(len(analytics['ordersTrend']), 73)
+        self.assertEqual(sum(r['count'] for r in analytics['ordersTrend']), 3)
+        self.assertEqual(analytics['summary']['totalRevenue'], 510.0)
+        self.assertEqual(analytics['categoryStatistics'][0]['category'], 'Women')
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(ValueError):
+            parse_analytics_params({'granularity': 'minute'})
+        with self.assertRaises(ValueError):
+            parse_analytics_params({'granularity': 'hour', 'from': '1990-01-01'})
+
+    def count_statements(self, fn):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            result = fn()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        return result, len(statements)
+
+    def test_statement_count_is_pinned(self):
+        # Grouped bucket x status scan, categories, sketches
+        _, statements = self.count_statements(get_admin_analytics)
+        self.assertEqual(statements, 3)
+        # Hourly windows have no daily sketches
+        _, statements = self.count_statements(lambda: get_admin_analytics(granularity='hour'))
+        self.assertEqual(statements, 2)
+
+    def test_dashboard_in_three_statements(self):
+        db.session.expunge_all()
+        dashboard, statements = self.count_statements(get_admin_dashboard)
+        self.assertEqual(statements, 3)
+        self.assertEqual(dashboard['overview'], {
+            'totalUsers': 1, 'newUsers30d': 1, 'totalOrders': 4, 'orders30d': 3,
+            'pendingOrders': 2, 'totalRevenue': 1509.0, 'revenue30d': 510.0
+        })
+        statuses = {r['status']: r['count'] for r in dashboard['orderStatus']}
+        self.assertEqual(statuses, {'pending': 2, 'shipped': 1, 'delivered': 1})
+        self.assertEqual(len(dashboard['recentOrders']), 4)
+        self.assertEqual(dashboard['recentOrders'][0]['customer']['email'], 'analyst@test.com')
+
+    def test_cached_dashboard_skips_queries(self):
+        get_cached_admin_dashboard()
+        _, statements = self.count_statements(get_cached_admin_dashboard)
+        self.assertEqual(statements, 0)
+
+
+class TestDailySalesRollup(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        user = User(email='rollup@test.com', role='customer')
+        user.set_password('rollup123')
+        db.session.add(user)
+        db.session.commit()
+        self.user_id = user.id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def snapshot(self):
+        return sorted(
+            (r.date, r.category, r.status, r.order_count, r.line_count, r.units, float(r.revenue))
+            for r in DailySalesRollup.query.all()
+            if r.order_count or r.line_count
+        )
+
+    def checkout(self, lines):
+        order = Order.create_from_cart_bulk(self.user_id, lines)
+        record_new_order(order, lines)
+        db.session.commit()
+        return order
+
+    def test_incremental_updates_match_rebuild(self):
+        first = self.checkout([cart_line(1, 'Men', 100.0, 2), cart_line(2, 'Men', 10.0)])
+        second = self.checkout([cart_line(3, 'Women', 40.0), cart_line(4, 'Men', 5.0, 4)])
+
+        old_status = second.status
+        second.status = 'cancelled'
+        record_status_change(second, old_status)
+        old_status = first.status
+        first.status = 'processing'
+        record_status_change(first, old_status)
+        db.session.commit()
+
+        incremental = self.snapshot()
+        rebuild_rollup()
+        db.session.commit()
+        self.assertEqual(incremental, self.snapshot())
+
+        totals = DailySalesRollup.query.filter_by(category='*', status='cancelled').one()
+        self.assertEqual((totals.order_count, totals.units, float(totals.revenue)), (1, 5, 60.0))
+
+    def test_rebuild_command(self):
+        self.checkout([cart_line(1, 'Accessories', 15.0, 3)])
+        DailySalesRollup.query.delete()
+        db.session.commit()
+
+        result = self.app.test_cli_runner().invoke(args=['analytics', 'rebuild-rollup'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Rebuilt daily_sales_rollup', result.output)
+        self.assertEqual(get_admin_analytics()['summary']['totalRevenue'], 45.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
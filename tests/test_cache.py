@@ -0,0 +1,62 @@
+# TTL cache tests
+# Covers expiry and single-flight behaviour of utils.cache.TTLCache
+
+import threading
+import time
+import unittest
+from utils.cache import TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+    def test_entries_expire(self):
+        cache = TTLCache(ttl=0.05)
+        calls = []
+        compute = lambda: calls.append(1) or len(calls)
+        self.assertEqual(cache.get_or_compute('k', compute), 1)
+        self.assertEqual(cache.get_or_compute('k', compute), 1)
+        time.sleep(0.06)
+        self.assertEqual(cache.get_or_compute('k', compute), 2)
+
+    def test_concurrent_misses_share_one_computation(self):
+        cache = TTLCache(ttl=60)
+        calls = []
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            release.wait(2)
+            return 'result'
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('k', compute)))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        time.sleep(0.05)
+        release.set()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['result'] * 8)
+
+    def test_errors_are_not_cached(self):
+        cache = TTLCache(ttl=60)
+
+        def fail():
+            raise RuntimeError('db down')
+
+        with self.assertRaises(RuntimeError):
+            cache.get_or_compute('k', fail)
+        self.assertEqual(cache.get_or_compute('k', lambda: 'ok'), 'ok')
+
+    def test_zero_ttl_disables_caching(self):
+        cache = TTLCache(ttl=0)
+        calls = []
+        cache.get_or_compute('k', lambda: calls.append(1))
+        cache.get_or_compute('k', lambda: calls.append(1))
+        self.assertEqual(len(calls), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+# Connection pool telemetry tests
+# Covers utils.db_pool, /health/db and /api/admin/metrics/db-pool
+
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from flask_jwt_extended import create_access_token
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeout
+from app import create_app, db
+from config import engine_options
+from models.user import User
+from services.security_epoch import token_claims
+from utils.db_pool import Histogram, InstrumentedQueuePool, init_pool_metrics, pool_status
+
+
+class TestHistogram(unittest.TestCase):
+    def test_cumulative_buckets(self):
+        histogram = Histogram(bounds=(1, 10))
+        for ms in (0.5, 1, 5, 50):
+            histogram.observe(ms)
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot['buckets'], {'le_1': 2, 'le_10': 3, 'le_inf': 4})
+        self.assertEqual((snapshot['count'], snapshot['maxMs']), (4, 50))
+
+
+class TestInstrumentedQueuePool(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.engine = create_engine(f'sqlite:///{self.path}', poolclass=InstrumentedQueuePool,
+                                    pool_size=1, max_overflow=0, pool_timeout=0.05)
+
+    def tearDown(self):
+        self.engine.dispose()
+        os.remove(self.path)
+
+    def test_checkouts_waits_and_timeouts(self):
+        with self.engine.connect() as conn:
+            conn.execute(text('SELECT 1'))
+            status = pool_status(self.engine)
+            self.assertEqual((status['checkedOut'], status['checkedIn']), (1, 0))
+            with self.assertRaises(PoolTimeout):
+                self.engine.connect()
+        with self.engine.connect():
+            pass
+
+        status = pool_status(self.engine)
+        self.assertEqual((status['checkouts'], status['timeouts'], status['waits']), (2, 1, 1))
+        self.assertEqual(status['connects'], 1)
+        self.assertEqual(status['checkoutLatency']['count'], 2)
+        self.assertEqual(status['holdTime']['count'], 2)
+
+    def test_waiting_checkout_is_counted(self):
+        conn = self.engine.connect()
+        self.engine.pool._timeout = 5
+        threading.Timer(0.05, conn.close).start()
+        with self.engine.connect():
+            pass
+        status = pool_status(self.engine)
+        self.assertEqual(status['waits'], 1)
+        self.assertGreaterEqual(status['checkoutLatency']['maxMs'], 25)
+
+    def test_metrics_survive_dispose(self):
+        with self.engine.connect():
+            pass
+        self.engine.dispose()
+        with self.engine.connect():
+            pass
+        status = pool_status(self.engine)
+        self.assertEqual((status['checkouts'], status['connects'], status['holdTime']['count']), (2, 2, 2))
+
+
+class TestHealthDb(unittest.TestCase):
+    def test_pool_class_only_where_pooling_is_configured(self):
+        app = create_app()
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_size': 5}
+        init_pool_metrics(app)
+        self.assertIs(app.config['SQLALCHEMY_ENGINE_OPTIONS']['poolclass'], InstrumentedQueuePool)
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {}
+        init_pool_metrics(app)
+        self.assertNotIn('poolclass', app.config['SQLALCHEMY_ENGINE_OPTIONS'])
+
+    def test_replica_gets_options_for_its_own_url(self):
+        pool = {'pool_size': 5}
+        self.assertEqual(engine_options('sqlite:///replica.db', pool, 1000), {})
+        self.assertEqual(engine_options('postgresql://db/shop', pool, 1000)['connect_args'],
+                         {'options': '-c statement_timeout=1000'})
+        self.assertEqual(engine_options('mysql://db/shop', pool, 1000), {'pool_size': 5, 'connect_args': {}})
+
+        app = create_app()
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {}
+        app.config['SQLALCHEMY_BINDS'] = {
+            'replica': dict(engine_options('mysql://db/shop', pool, 1000), url='mysql://db/shop'),
+            'other': 'sqlite:///other.db'
+        }
+        init_pool_metrics(app)
+        self.assertIs(app.config['SQLALCHEMY_BINDS']['replica']['poolclass'], InstrumentedQueuePool)
+        self.assertEqual(app.config['SQLALCHEMY_BINDS']['other'], 'sqlite:///other.db')
+        self.assertNotIn('poolclass', app.config['SQLALCHEMY_ENGINE_OPTIONS'])
+
+    def test_health_db_endpoint(self):
+        app = create_app()
+        response = app.test_client().get('/health/db')
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body['status'], 'healthy')
+        self.assertNotIn('pools', body)
+
+    def test_health_db_hides_driver_errors(self):
+        app = create_app()
+        with mock.patch.object(Engine, 'connect', side_effect=OperationalError(
+                'SELECT 1', {}, Exception('could not connect to server at db.internal as shop_user'))):
+            with self.assertLogs(app.logger, 'ERROR'):
+                response = app.test_client().get('/health/db')
+        self.assertEqual(response.status_code, 503)
+        self.assertNotIn('db.internal', response.get_data(as_text=True))
+
+    def test_pool_metrics_are_admin_only(self):
+        app = create_app()
+        client = app.test_client()
+        with app.app_context():
+            db.create_all()
+            admin = User(email='pool@test.com', role='admin', password='x')
+            customer = User(email='shopper@test.com', role='customer', password='x')
+            db.session.add_all([admin, customer])
+            db.session.commit()
+            tokens = {user.role: create_access_token(identity=str(user.id), additional_claims=token_claims(user))
+                      for user in (admin, customer)}
+        try:
+            path = '/api/admin/metrics/db-pool'
+            self.assertEqual(client.get(path).status_code, 401)
+            headers = {'Authorization': f"Bearer {tokens['customer']}"}
+            self.assertEqual(client.get(path, headers=headers).status_code, 403)
+            headers = {'Authorization': f"Bearer {tokens['admin']}"}
+            response = client.get(path, headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('primary', response.get_json()['data'])
+        finally:
+            with app.app_context():
+                db.session.remove()
+                db.drop_all()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+# Verified JWT cache tests
+# Covers utils.jwt_cache and its use on protected requests
+
+import inspect
+import time
+import unittest
+from datetime import timedelta
+from unittest import mock
+from flask_jwt_extended import JWTManager, create_access_token
+from flask_jwt_extended.tokens import _decode_jwt
+from app import create_app, db
+from models.user import User
+from utils.jwt_cache import VerifiedTokenCache, get_verified_token_cache
+
+
+class TestVerifiedTokenCache(unittest.TestCase):
+    def test_overridden_method_signature(self):
+        # CachingJWTManager overrides this private method; fail loudly if
+        # an upgrade changes it
+        params = list(inspect.signature(JWTManager._decode_jwt_from_config).parameters)
+        self.assertEqual(params, ['self', 'encoded_token', 'csrf_value', 'allow_expired'])
+
+    def test_lru_eviction_and_stats(self):
+        cache = VerifiedTokenCache(maxsize=2)
+        exp = time.time() + 60
+        for name in ('a', 'b', 'c'):
+            cache.set(f'h.p.{name}', {'sub': name, 'exp': exp})
+        self.assertIsNone(cache.get('h.p.a'))
+        self.assertEqual(cache.get('h.p.c')['sub'], 'c')
+        stats = cache.stats()
+        self.assertEqual((stats['size'], stats['hits'], stats['misses'], stats['evictions']), (2, 1, 1, 1))
+
+    def test_expired_entries_are_dropped(self):
+        cache = VerifiedTokenCache()
+        cache.set('h.p.s', {'sub': '1', 'exp': time.time() - 1})
+        self.assertIsNone(cache.get('h.p.s'))
+        self.assertEqual(cache.stats()['expired'], 1)
+        self.assertEqual(cache.stats()['size'], 0)
+
+    def test_same_signature_with_other_payload_misses(self):
+        cache = VerifiedTokenCache()
+        cache.set('h.p.s', {'sub': '1', 'exp': time.time() + 60})
+        self.assertIsNone(cache.get('h.forged.s'))
+
+    def test_tokens_without_exp_are_not_cached(self):
+        cache = VerifiedTokenCache()
+        cache.set('h.p.s', {'sub': '1'})
+        self.assertEqual(cache.stats()['size'], 0)
+
+    def test_returned_claims_are_copies(self):
+        cache = VerifiedTokenCache()
+        cache.set('h.p.s', {'sub': '1', 'exp': time.time() + 60})
+        cache.get('h.p.s')['sub'] = '2'
+        self.assertEqual(cache.get('h.p.s')['sub'], '1')
+
+
+class TestCachedDecodePath(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        admin = User(email='jwtcache@test.com', role='admin')
+        admin.set_password('cache123')
+        db.session.add(admin)
+        db.session.commit()
+        self.token = create_access_token(identity=str(admin.id))
+        self.headers = {'Authorization': f'Bearer {self.token}'}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_signature_verified_once_per_token(self):
+        with mock.patch('flask_jwt_extended.jwt_manager._decode_jwt', wraps=_decode_jwt) as decode:
+            for _ in range(3):
+                response = self.client.get('/api/test-auth', headers=self.headers)
+                self.assertEqual(response.status_code, 200)
+        self.assertEqual(decode.call_count, 1)
+        stats = get_verified_token_cache().stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 1))
+
+    def test_tampered_token_is_still_rejected(self):
+        self.client.get('/api/test-auth', headers=self.headers)
+        header, payload, signature = self.token.split('.')
+        forged = create_access_token(identity='999', additional_claims={'role': 'admin'}).split('.')[1]
+        response = self.client.get('/api/test-auth', headers={'Authorization': f'Bearer {header}.{forged}.{signature}'})
+        self.assertEqual(response.status_code, 422)
+
+    def test_cached_claims_expire_with_token(self):
+        token = create_access_token(identity='1', expires_delta=timedelta(seconds=1))
+        headers = {'Authorization': f'Bearer {token}'}
+        self.assertEqual(self.client.get('/api/test-auth', headers=headers).status_code, 200)
+        with mock.patch('time.time', return_value=time.time() + 5):
+            self.assertIsNone(get_verified_token_cache().get(token))
+
+    def test_disabled_cache_decodes_every_time(self):
+        self.app.config['JWT_DECODE_CACHE_SIZE'] = 0
+        self.app.extensions.pop('jwt_decode_cache', None)
+        for _ in range(2):
+            self.assertEqual(self.client.get('/api/test-auth', headers=self.headers).status_code, 200)
+        self.assertEqual(get_verified_token_cache().stats()['size'], 0)
+
+    def test_metrics_endpoint(self):
+        response = self.client.get('/api/admin/metrics/auth', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('hitRate', response.get_json()['data']['jwtDecodeCache'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+# Data migration tests
+# Runs individual alembic upgrades against a database that already holds
+# orders, as the release step's `flask db upgrade` would
+
+import importlib.util
+import os
+import unittest
+from datetime import datetime, timedelta
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from app import create_app, db
+from models.cart import Cart
+from models.order import Order
+from models.user import User
+from services.analytics_service import get_admin_analytics
+from services.sketch_service import get_sketch_stats
+
+VERSIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations', 'versions')
+
+
+def run_upgrade(filename):
+    spec = importlib.util.spec_from_file_location(filename[:-3], os.path.join(VERSIONS, filename))
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with Operations.context(MigrationContext.configure(db.session.connection())):
+        migration.upgrade()
+    db.session.commit()
+
+
+class TestAnalyticsBackfill(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        users = [User(email=f'migrate{i}@test.com', role='customer', password='x') for i in range(2)]
+        db.session.add_all(users)
+        db.session.commit()
+        now = datetime.utcnow()
+        for days_ago, user, price in ((0, users[0], 100.0), (1, users[1], 200.0), (3, users[0], 50.0)):
+            order = Order.create_from_cart_bulk(user.id, [
+                {'product_id': 1, 'product_name': 'Shirt', 'quantity': 2,
+                 'unit_price': price, 'category_name': 'Men'}
+            ])
+            order.created_at = now - timedelta(days=days_ago)
+        db.session.commit()
+        self.today = now.date()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def drop_table(self, name):
+        db.session.execute(db.text(f'DROP TABLE {name}'))
+        db.session.commit()
+
+    def test_rollup_is_backfilled(self):
+        self.drop_table('daily_sales_rollup')
+        run_upgrade('f2a8d4b61c95_add_daily_sales_rollup.py')
+        summary = get_admin_analytics()['summary']
+        self.assertEqual(summary['totalOrders'], 3)
+        self.assertEqual(summary['totalRevenue'], 700.0)
+
+    def test_sketches_are_backfilled(self):
+        self.drop_table('daily_sketches')
+        run_upgrade('9b3e5f1a7c20_add_daily_sketches.py')
+        stats = get_sketch_stats(self.today - timedelta(days=7), self.today + timedelta(days=1))
+        self.assertEqual(stats['distinctCustomers'], 2)
+        self.assertIsNotNone(stats['orderValuePercentiles']['p50'])
+
+
+class TestEmailDuplicates(unittest.TestCase):
+    MIGRATION = 'c3f8d1a6b294_unique_lower_email.py'
+
+    def setUp(self):
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        # The schema as it was before the unique index
+        db.session.execute(db.text('DROP INDEX ix_users_email_lower'))
+        db.session.execute(db.text('CREATE INDEX ix_users_email_lower ON users (lower(email))'))
+        for user_id, email, role in ((1, 'Pat@Shop.com', 'customer'), (2, 'pat@shop.com', 'customer'),
+                                     (3, 'Boss@Shop.com', 'admin'), (4, 'boss@shop.com', 'customer'),
+                                     (5, 'solo@shop.com', 'customer')):
+            db.session.execute(db.text(
+                "INSERT INTO users (id, email, password, role, security_epoch) VALUES (:id, :email, 'x', :role, 0)"
+            ), {'id': user_id, 'email': email, 'role': role})
+        db.session.commit()
+        order = Order.create_from_cart_bulk(2, [
+            {'product_id': 1, 'product_name': 'Shirt', 'quantity': 1, 'unit_price': 10.0, 'category_name': 'Men'}
+        ])
+        db.session.add(Cart(user_id=2))
+        db.session.commit()
+        self.order_id = order.id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def cli(self, *args):
+        return self.app.test_cli_runner().invoke(args=['users', 'resolve-email-duplicates', *args])
+
+    def test_upgrade_refuses_and_logs_only_user_ids(self):
+        with self.assertLogs('alembic.runtime.migration', 'ERROR') as logs:
+            with self.assertRaises(RuntimeError) as raised:
+                run_upgrade(self.MIGRATION)
+        db.session.rollback()
+        output = ' '.join(logs.output) + str(raised.exception)
+        self.assertIn('user ids 1, 2', output)
+        self.assertIn('resolve-email-duplicates', output)
+        self.assertNotIn('@', output)
+
+    def test_resolve_then_upgrade(self):
+        report = self.cli()
+        self.assertEqual(report.exit_code, 0, report.output)
+        self.assertIn('Group 1: id=1 role=customer orders=0', report.output)
+        self.assertIn('id=4 role=customer', report.output)
+
+        refused = self.cli('--merge', '3')
+        self.assertNotEqual(refused.exit_code, 0)
+        self.assertIn('rename', refused.output)
+
+        self.assertEqual(self.cli('--merge', '1').exit_code, 0)
+        self.assertIsNone(db.session.get(User, 2))
+        self.assertEqual(db.session.get(Order, self.order_id).user_id, 1)
+        self.assertEqual(Cart.query.filter_by(user_id=1).count(), 1)
+
+        self.assertNotEqual(self.cli('--rename', '4', 'PAT@shop.com').exit_code, 0)
+        self.assertEqual(self.cli('--rename', '4', 'Boss.Two@Shop.com').exit_code, 0)
+        self.assertEqual(db.session.get(User, 4).email, 'boss.two@shop.com')
+        self.assertIn('No duplicate emails', self.cli().output)
+
+        run_upgrade(self.MIGRATION)
+        self.assertEqual(db.session.get(User, 1).email, 'pat@shop.com')
+
+
+if __name__ == '__main__':
+    unittest.main()
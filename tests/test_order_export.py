@@ -0,0 +1,72 @@
+# Order export tests
+# Covers the streamed admin export at /api/orders/admin/export
+
+import csv
+import io
+import json
+import unittest
+from datetime import datetime
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from models.order import Order
+from models.user import User
+
+
+class TestOrderExport(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            admin = User(email='finance@test.com', role='admin')
+            admin.set_password('finance123')
+            customer = User(email='shopper@test.com', role='customer')
+            customer.set_password('shopper123')
+            db.session.add_all([admin, customer])
+            db.session.commit()
+
+            for day, lines in ((30, 2), (31, 3), (1, 1)):
+                month = 1 if day > 1 else 2
+                order = Order.create_from_cart_bulk(customer.id, [
+                    {'product_id': n, 'product_name': f'Item {n}', 'quantity': 1,
+                     'unit_price': 10.0 * n, 'category_name': 'Women'}
+                    for n in range(1, lines + 1)
+                ])
+                order.created_at = datetime(2026, month, day, 15, 30)
+            db.session.commit()
+            self.token = create_access_token(identity=str(admin.id))
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def export(self, **params):
+        return self.client.get('/api/orders/admin/export', query_string=params,
+                               headers={'Authorization': f'Bearer {self.token}'})
+
+    def test_csv_export_has_one_row_per_line(self):
+        response = self.export(format='csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.mimetype.startswith('text/csv'))
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0]['customer_email'], 'shopper@test.com')
+
+    def test_ndjson_export_with_inclusive_end_date(self):
+        response = self.export(format='ndjson', start_date='2026-01-31', end_date='2026-01-31')
+        self.assertEqual(response.status_code, 200)
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual({row['created_at'][:10] for row in rows}, {'2026-01-31'})
+        self.assertEqual(rows[2]['line_total'], 30.0)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.export(format='xml').status_code, 400)
+        self.assertEqual(self.export(start_date='last week').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
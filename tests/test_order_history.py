@@ -0,0 +1,84 @@
+# Customer order history tests
+# Covers cursor pagination on /api/orders/my-orders
+
+import json
+import unittest
+from datetime import datetime, timedelta
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from models.order import Order
+from models.user import User
+
+
+class TestOrderHistory(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            user = User(email='repeat@test.com', role='customer')
+            user.set_password('repeat123')
+            db.session.add(user)
+            db.session.commit()
+
+            # Several orders share a timestamp so the id tie-breaker matters
+            base = datetime(2026, 1, 1, 12, 0, 0)
+            for i in range(25):
+                db.session.add(Order(
+                    user_id=user.id,
+                    total_amount=100 + i,
+                    items=json.dumps([{'product_id': 1, 'quantity': 1}]),
+                    created_at=base + timedelta(hours=i // 3)
+                ))
+            db.session.commit()
+            self.token = create_access_token(identity=str(user.id))
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def get(self, **params):
+        return self.client.get('/api/orders/my-orders', query_string=params,
+                               headers={'Authorization': f'Bearer {self.token}'})
+
+    def test_pages_cover_all_orders_newest_first(self):
+        seen = []
+        cursor = None
+        while True:
+            params = {'limit': 10, 'summary': 'true'}
+            if cursor:
+                params['cursor'] = cursor
+            response = self.get(**params)
+            self.assertEqual(response.status_code, 200)
+            body = response.get_json()
+            seen.extend(order['id'] for order in body['data'])
+            cursor = body['pagination']['next_cursor']
+            if not cursor:
+                break
+
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_summary_mode_omits_items(self):
+        body = self.get(limit=5, summary='1').get_json()
+        self.assertEqual(len(body['data']), 5)
+        self.assertNotIn('items', body['data'][0])
+        self.assertIn('totalAmount', body['data'][0])
+
+    def test_full_mode_includes_items(self):
+        body = self.get(limit=3).get_json()
+        self.assertEqual(len(body['data']), 3)
+        self.assertEqual(body['data'][0]['items'], [{'product_id': 1, 'quantity': 1}])
+        self.assertEqual(body['data'][0]['customer']['email'], 'repeat@test.com')
+
+    def test_invalid_cursor(self):
+        response = self.get(cursor='not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
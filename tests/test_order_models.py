@@ -0,0 +1,131 @@
+# Order model tests
+# Covers order creation from cart data and order serialization
+
+import json
+import unittest
+from unittest import mock
+from sqlalchemy import event
+from app import create_app, db
+from models.order import Order, OrderItem
+from models.user import User
+
+
+class TestOrderCreation(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        user = User(email='buyer@test.com', role='customer')
+        user.set_password('buyer123')
+        db.session.add(user)
+        db.session.commit()
+        self.user_id = user.id
+
+        self.cart_items = [
+            {'product_id': i, 'product_name': f'Item {i}', 'product_image': '',
+             'quantity': i % 3 + 1, 'unit_price': 100.0 + i,
+             'category_name': 'Men' if i % 2 else 'Women'}
+            for i in range(1, 51)
+        ]
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_bulk_creation_matches_orm_path(self):
+        expected = Order.create_from_cart(self.user_id, self.cart_items, {'city': 'Nairobi'}, 'online')
+        order = Order.create_from_cart_bulk(self.user_id, self.cart_items, {'city': 'Nairobi'}, 'online')
+        db.session.commit()
+
+        self.assertEqual(order.subtotal, expected.subtotal)
+        self.assertEqual(order.total_amount, expected.total_amount)
+        self.assertEqual(json.loads(order.items), json.loads(expected.items))
+
+        rows = OrderItem.query.filter_by(order_id=order.id).order_by(OrderItem.id).all()
+        self.assertEqual(len(rows), len(self.cart_items))
+        self.assertEqual(rows[4].product_name, 'Item 5')
+        self.assertEqual(float(rows[4].total_price), 105.0 * 3)
+        self.assertEqual(rows[4].category_name, 'Men')
+        self.assertEqual(len(order.order_items), len(self.cart_items))
+
+    def test_bulk_creation_with_empty_cart(self):
+        order = Order.create_from_cart_bulk(self.user_id, [])
+        db.session.commit()
+        self.assertEqual(order.subtotal, 0)
+        self.assertEqual(OrderItem.query.count(), 0)
+
+
+class TestOrderSerialization(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        for n in range(20):
+            user = User(email=f'customer{n}@test.com', role='customer')
+            user.set_password('secret')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Order(
+                user_id=user.id,
+                total_amount=50,
+                items=json.dumps([{'product_id': 1, 'quantity': 2}]),
+                shipping_address=json.dumps({'city': 'Mombasa'})
+            ))
+        db.session.commit()
+        db.session.expunge_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def count_statements(self, fn):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            result = fn()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        return result, len(statements)
+
+    def test_list_serializer_loads_customers_in_one_query(self):
+        orders = Order.query.all()
+        data, statements = self.count_statements(lambda: Order.to_dict_list(orders))
+        self.assertEqual(statements, 1)
+        self.assertEqual(len(data), 20)
+        self.assertTrue(all(d['customer']['email'].startswith('customer') for d in data))
+        self.assertEqual(data[0]['shippingAddress'], {'city': 'Mombasa'})
+
+    def test_parsed_payloads_are_cached_until_reassigned(self):
+        order = Order.query.first()
+        with mock.patch('models.order.json.loads', wraps=json.loads) as loads:
+            self.assertEqual(order.items_dict, order.items_dict)
+        self.assertEqual(loads.call_count, 1)
+        order.items_dict = [{'product_id': 2, 'quantity': 1}]
+        self.assertEqual(order.items_dict, [{'product_id': 2, 'quantity': 1}])
+
+    def test_mutating_serialized_payloads_leaves_cache_intact(self):
+        order = Order.query.first()
+        data = order.to_dict()
+        data['items'][0]['product_name'] = 'Changed'
+        data['items'].append({'product_id': 99})
+        data['shippingAddress']['city'] = 'Changed'
+        again = order.to_dict()
+        self.assertEqual(len(again['items']), len(data['items']) - 1)
+        self.assertNotEqual(again['items'][0].get('product_name'), 'Changed')
+        self.assertEqual(again['shippingAddress'], {'city': 'Mombasa'})
+
+
+if __name__ == '__main__':
+    unittest.main()
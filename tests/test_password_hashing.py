@@ -0,0 +1,96 @@
+# Password hashing service tests
+# Covers the bounded hashing pool and rehash-on-login
+
+import threading
+import unittest
+from unittest import mock
+from werkzeug.security import generate_password_hash
+from app import create_app, db
+from models.user import User
+from services.password_service import HashingBusy, HashTimeout, PasswordHasher
+
+
+class TestPasswordHasher(unittest.TestCase):
+    def test_policy_prefix_and_rehash(self):
+        hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=1)
+        pwhash = hasher.hash('secret')
+        self.assertTrue(pwhash.startswith('pbkdf2:sha256:1000$'))
+        self.assertTrue(hasher.verify(pwhash, 'secret'))
+        self.assertFalse(hasher.verify(pwhash, 'wrong'))
+        self.assertFalse(hasher.needs_rehash(pwhash))
+        self.assertTrue(hasher.needs_rehash(generate_password_hash('secret', 'pbkdf2:sha256:2000')))
+
+    def test_full_queue_is_refused(self):
+        hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=1, queue_limit=0)
+        release = threading.Event()
+        started = threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+            return True
+
+        worker = threading.Thread(target=hasher._run, args=(slow,))
+        worker.start()
+        started.wait(5)
+        with self.assertRaises(HashingBusy):
+            hasher.hash('secret')
+        release.set()
+        worker.join()
+        self.assertTrue(hasher.verify(hasher.hash('secret'), 'secret'))
+
+
+class TestLoginRehash(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app()
+        self.app.config.update(TESTING=True, PASSWORD_HASH_METHOD='pbkdf2:sha256:2000')
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            user = User(email='legacy@test.com', role='customer',
+                        password=generate_password_hash('secret123', 'pbkdf2:sha256:1000'))
+            db.session.add(user)
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def login(self, password):
+        return self.client.post('/api/auth/login', json={'email': 'legacy@test.com', 'password': password})
+
+    def stored_hash(self):
+        with self.app.app_context():
+            return User.query.filter_by(email='legacy@test.com').first().password
+
+    def test_successful_login_upgrades_hash(self):
+        self.assertEqual(self.login('wrong').status_code, 401)
+        self.assertTrue(self.stored_hash().startswith('pbkdf2:sha256:1000$'))
+        self.assertEqual(self.login('secret123').status_code, 200)
+        self.assertTrue(self.stored_hash().startswith('pbkdf2:sha256:2000$'))
+        self.assertEqual(self.login('secret123').status_code, 200)
+
+    def test_busy_pool_skips_rehash(self):
+        with mock.patch.object(PasswordHasher, 'hash', side_effect=HashingBusy('full')):
+            self.assertEqual(self.login('secret123').status_code, 200)
+        self.assertTrue(self.stored_hash().startswith('pbkdf2:sha256:1000$'))
+
+    def test_busy_pool_returns_503(self):
+        with mock.patch('routes.auth.verify_password', side_effect=HashingBusy('full')):
+            response = self.login('secret123')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+
+    def test_hashing_timeout_returns_503(self):
+        with mock.patch('routes.auth.verify_password', side_effect=HashTimeout()):
+            response = self.login('secret123')
+        self.assertEqual(response.status_code, 503)
+        with mock.patch('routes.auth.hash_password', side_effect=HashTimeout()):
+            response = self.client.post('/api/auth/register', json={'email': 'new@test.com', 'password': 'secret123'})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+# Analytics precompute tests
+# Covers the scheduler lease, run_precompute and shared cache reads
+
+import json
+import unittest
+from unittest import mock
+from datetime import datetime, timedelta
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from config import Config
+from models.order import Order
+from models.precompute import AnalyticsCacheEntry, SchedulerLease
+from models.user import User
+from services.security_epoch import token_claims
+from services.analytics_service import get_cached_admin_analytics, get_cached_admin_dashboard
+from services.precompute_service import acquire_lease, parse_windows, run_precompute, start_scheduler, window_params
+from services.shared_cache import get_shared, set_shared
+
+
+class TestPrecompute(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app()
+        self.app.config.update(TESTING=True, ANALYTICS_PRECOMPUTE_WINDOWS='30:day,2:hour')
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        user = User(email='precompute@test.com', role='customer')
+        user.set_password('precompute123')
+        db.session.add(user)
+        db.session.commit()
+        self.user_id = user.id
+        self.add_order(100)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def add_order(self, amount):
+        db.session.add(Order(user_id=self.user_id, status='pending', total_amount=amount,
+                             items=json.dumps([]), created_at=datetime.utcnow() - timedelta(hours=1)))
+        db.session.commit()
+
+    def test_lease_has_one_holder(self):
+        self.assertTrue(acquire_lease('job', 'a', 60))
+        self.assertFalse(acquire_lease('job', 'b', 60))
+        self.assertTrue(acquire_lease('job', 'a', 60))
+
+        SchedulerLease.query.filter_by(name='job').update({'expires_at': datetime.utcnow() - timedelta(seconds=1)})
+        db.session.commit()
+        self.assertTrue(acquire_lease('job', 'b', 60))
+        self.assertEqual(db.session.get(SchedulerLease, 'job').holder, 'b')
+
+    def test_endpoints_read_precomputed_results(self):
+        self.assertEqual(run_precompute(self.app.config), 4)
+        self.assertEqual(AnalyticsCacheEntry.query.count(), 4)
+
+        # Orders placed after the run are not visible until the next one
+        self.add_order(50)
+        self.assertEqual(get_cached_admin_analytics(**window_params(2, 'hour'))['summary']['totalOrders'], 1)
+        self.assertEqual(get_cached_admin_dashboard()['overview']['totalOrders'], 1)
+
+    def test_default_endpoint_requests_hit_precomputed_windows(self):
+        self.app.config['ANALYTICS_PRECOMPUTE_WINDOWS'] = Config.ANALYTICS_PRECOMPUTE_WINDOWS
+        run_precompute(self.app.config)
+
+        admin = User(email='precompute-admin@test.com', role='admin', password='x')
+        db.session.add(admin)
+        db.session.commit()
+        token = create_access_token(identity=str(admin.id), additional_claims=token_claims(admin))
+        client = self.app.test_client()
+        # Served from the shared cache, or this would fail with 500
+        with mock.patch('services.analytics_service.get_admin_analytics', side_effect=AssertionError('computed')):
+            for granularity in ('day', 'hour', 'week', 'month'):
+                response = client.get('/api/orders/admin/analytics', query_string={'granularity': granularity},
+                                      headers={'Authorization': f'Bearer {token}'})
+                self.assertEqual(response.status_code, 200, granularity)
+
+    def test_expired_entries_are_ignored(self):
+        set_shared('report', {'value': 1}, ttl=60)
+        db.session.commit()
+        self.assertEqual(get_shared('report'), {'value': 1})
+        set_shared('report', {'value': 2}, ttl=-1)
+        db.session.commit()
+        self.assertIsNone(get_shared('report'))
+
+    def test_configuration(self):
+        self.assertEqual(parse_windows('30:day, 2:hour,7,week'),
+                         [(30, 'day'), (2, 'hour'), (7, 'day'), (None, 'week')])
+        with self.assertRaises(ValueError):
+            parse_windows('30:fortnight')
+        self.assertIsNone(start_scheduler(self.app))
+
+    def test_deferred_scheduler_is_not_started_by_the_factory(self):
+        # A preloading gunicorn master defers it to post_fork
+        with mock.patch.multiple(Config, ANALYTICS_PRECOMPUTE_INTERVAL=60, DEFER_BACKGROUND_THREADS=True):
+            app = create_app()
+        self.assertNotIn('precompute_scheduler', app.extensions)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+# Rate limiter tests
+# Covers utils.rate_limit and the limits on login, register and checkout
+
+import os
+import runpy
+import time
+import unittest
+from unittest import mock
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from models.rate_limit import RateLimitBucket
+from models.user import User
+from utils.rate_limit import DatabaseStore, MemoryStore, parse_limit
+
+
+class TestTokenBuckets(unittest.TestCase):
+    def test_parse_limit(self):
+        self.assertEqual(parse_limit('5/minute'), (5, 5 / 60))
+        self.assertEqual(parse_limit('100/hours'), (100, 100 / 3600))
+        for bad in ('5', 'five/minute', '0/minute', '5/fortnight'):
+            with self.assertRaises(ValueError):
+                parse_limit(bad)
+
+    def test_memory_bucket_refills(self):
+        store = MemoryStore()
+        with mock.patch('time.monotonic', return_value=1000.0):
+            self.assertEqual([store.take('k', 2, 1.0) for _ in range(2)], [0.0, 0.0])
+            self.assertAlmostEqual(store.take('k', 2, 1.0), 1.0)
+        with mock.patch('time.monotonic', return_value=1001.0):
+            self.assertEqual(store.take('k', 2, 1.0), 0.0)
+            self.assertGreater(store.take('k', 2, 1.0), 0)
+        self.assertEqual(store.take('other', 2, 1.0), 0.0)
+
+    def test_memory_store_is_bounded(self):
+        store = MemoryStore(max_keys=3)
+        for i in range(10):
+            store.take(f'k{i}', 1, 1.0)
+        self.assertEqual(list(store._buckets), ['k7', 'k8', 'k9'])
+
+
+class TestRateLimitedRoutes(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app()
+        self.app.config.update(TESTING=True, RATE_LIMIT_LOGIN_IP='5/minute', RATE_LIMIT_LOGIN_EMAIL='2/minute',
+                               RATE_LIMIT_REGISTER_IP='2/hour', RATE_LIMIT_CHECKOUT_USER='1/minute')
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        user = User(email='limited@test.com', role='customer')
+        user.set_password('limited123')
+        db.session.add(user)
+        db.session.commit()
+        self.user_id = user.id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def login(self, email, **kwargs):
+        return self.client.post('/api/auth/login', json={'email': email, 'password': 'wrong'}, **kwargs)
+
+    def test_login_limited_per_email_then_per_ip(self):
+        self.assertEqual([self.login('Limited@test.com').status_code for _ in range(3)], [401, 401, 429])
+        response = self.login('limited@test.com')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response.headers['Retry-After']), 1)
+        # Other emails get through until the IP budget (rejections included) is spent
+        self.assertEqual(self.login('other@test.com').status_code, 401)
+        self.assertEqual(self.login('third@test.com').status_code, 429)
+
+    def test_proxy_hops_select_forwarded_address(self):
+        self.app.config.update(RATE_LIMIT_PROXY_HOPS=1, RATE_LIMIT_LOGIN_EMAIL=None)
+        for i in range(5):
+            self.login(f'user{i}@test.com', headers={'X-Forwarded-For': 'spoofed, 203.0.113.5'})
+        self.assertEqual(self.login('x@test.com', headers={'X-Forwarded-For': '203.0.113.5'}).status_code, 429)
+        self.assertEqual(self.login('x@test.com', headers={'X-Forwarded-For': '203.0.113.6'}).status_code, 401)
+
+    def test_register_limited_per_ip(self):
+        statuses = [self.client.post('/api/auth/register', json={'email': f'new{i}@test.com', 'password': 'pass1234'}).status_code
+                    for i in range(3)]
+        self.assertEqual(statuses, [201, 201, 429])
+
+    def test_checkout_limited_per_user(self):
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(self.user_id))}'}
+        first = self.client.post('/api/cart/checkout', json={'shipping_address': 'Nairobi'}, headers=headers)
+        self.assertNotEqual(first.status_code, 429)
+        second = self.client.post('/api/cart/checkout', json={'shipping_address': 'Nairobi'}, headers=headers)
+        self.assertEqual(second.status_code, 429)
+
+    def test_multi_worker_gunicorn_defaults_to_shared_buckets(self):
+        conf = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'gunicorn.conf.py')
+        for workers, storage in (('3', 'database'), ('1', None)):
+            with mock.patch.dict(os.environ, {'WEB_CONCURRENCY': workers, 'GUNICORN_PRELOAD': 'false'}):
+                os.environ.pop('RATE_LIMIT_STORAGE', None)
+                runpy.run_path(conf)
+                self.assertEqual(os.environ.get('RATE_LIMIT_STORAGE'), storage)
+
+    def test_disabled(self):
+        self.app.config['RATE_LIMIT_ENABLED'] = False
+        self.assertEqual({self.login('limited@test.com').status_code for _ in range(5)}, {401})
+
+
+class TestDatabaseStore(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app()
+        self.app.config.update(TESTING=True, RATE_LIMIT_STORAGE='database', RATE_LIMIT_LOGIN_EMAIL='2/minute')
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_buckets_shared_between_workers(self):
+        # Two stores stand in for two worker processes
+        first, second = DatabaseStore(), DatabaseStore()
+        self.assertEqual(first.take('login_email:a', 2, 1 / 60), 0.0)
+        self.assertEqual(second.take('login_email:a', 2, 1 / 60), 0.0)
+        self.assertGreater(first.take('login_email:a', 2, 1 / 60), 50)
+        self.assertEqual(RateLimitBucket.query.count(), 1)
+
+    def test_purge_removes_refilled_buckets(self):
+        store = DatabaseStore()
+        store.take('login_email:a', 2, 1 / 60)
+        store.take('login_email:b', 2, 1000.0)
+        with mock.patch('time.time', return_value=time.time() + 1):
+            self.assertEqual(store.purge(), 1)
+        self.assertEqual([row.key for row in RateLimitBucket.query], ['login_email:a'])
+
+    def test_routes_use_shared_store(self):
+        client = self.app.test_client()
+        statuses = [client.post('/api/auth/login', json={'email': 'a@test.com', 'password': 'x'}).status_code
+                    for _ in range(3)]
+        self.assertEqual(statuses, [401, 401, 429])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+# Read replica routing tests
+# Uses two SQLite files as primary and replica
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from flask import g
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from config import Config
+from models.order import Order
+from models.user import User
+from utils.replica import REPLICA_BIND, use_replica
+
+
+def make_app(primary, replica):
+    with mock.patch.object(Config, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{primary}'), \
+            mock.patch.object(Config, 'SQLALCHEMY_BINDS', {REPLICA_BIND: f'sqlite:///{replica}'}):
+        app = create_app()
+    app.config['TESTING'] = True
+    return app
+
+
+def add_orders(count, user_id):
+    for i in range(count):
+        db.session.add(Order(user_id=user_id, status='pending', total_amount=10,
+                             items=json.dumps([])))
+    db.session.commit()
+
+
+class TestReadReplica(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.primary = os.path.join(self.tmp, 'primary.db')
+        self.replica = os.path.join(self.tmp, 'replica.db')
+        self.app = make_app(self.primary, self.replica)
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            db.metadata.create_all(db.engines[REPLICA_BIND])
+            admin = User(email='replica@test.com', role='admin')
+            admin.set_password('replica123')
+            db.session.add(admin)
+            db.session.commit()
+            add_orders(5, admin.id)
+            self.token = create_access_token(identity=str(admin.id))
+            self.admin_id = admin.id
+
+            # The replica has only some of the primary's orders
+            with db.engines[REPLICA_BIND].begin() as conn:
+                conn.execute(Order.__table__.insert(), [
+                    {'user_id': admin.id, 'status': 'shipped', 'total_amount': 99, 'items': '[]'}
+                ])
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+        # init_app registered a metadata for the bind on the shared db object
+        db.metadatas.pop(REPLICA_BIND, None)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def dashboard(self):
+        response = self.client.get('/api/admin/analytics/dashboard',
+                                   headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()['data']['overview']
+
+    def test_reporting_endpoint_reads_replica(self):
+        overview = self.dashboard()
+        self.assertEqual(overview['totalOrders'], 1)
+        self.assertEqual(overview['totalRevenue'], 99.0)
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        with mock.patch('utils.replica.replica_lag', return_value=600):
+            self.assertEqual(self.dashboard()['totalOrders'], 5)
+
+    def test_unreachable_replica_falls_back_to_primary(self):
+        with mock.patch('utils.replica.replica_lag', side_effect=OSError('connection refused')):
+            self.assertEqual(self.dashboard()['totalOrders'], 5)
+
+    def test_writes_go_to_primary(self):
+        with self.app.app_context():
+            self.assertTrue(use_replica())
+            add_orders(1, self.admin_id)
+            self.assertEqual(Order.query.count(), 1)
+            g.read_replica = None
+            self.assertEqual(Order.query.count(), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+# Prefix-sum revenue index tests
+# Covers services.revenue_index and /api/admin/analytics/range
+
+import random
+import unittest
+from unittest import mock
+from datetime import date, datetime, timedelta
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from models.cart import Cart, CartItem
+from models.order import Order
+from models.product import Category, Product
+from models.user import User
+from services.revenue_index import PrefixSumIndex
+from services.rollup_service import rebuild_rollup
+
+
+class TestPrefixSumIndex(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        origin = date(2026, 1, 1)
+        self.rows = [
+            (origin + timedelta(days=d), category, rng.randint(1, 5), rng.randint(1, 9), rng.randint(100, 999))
+            for d in range(0, 90, 2)
+            for category in ('*', 'Men', 'Women')
+        ]
+        self.index = PrefixSumIndex.from_daily_totals(self.rows)
+
+    def brute_force(self, start, end, category):
+        rows = [r for r in self.rows if r[1] == category and start <= r[0] < end]
+        return {'orders': sum(r[2] for r in rows), 'units': sum(r[3] for r in rows),
+                'revenue': float(sum(r[4] for r in rows))}
+
+    def test_range_totals_match_brute_force(self):
+        origin = date(2026, 1, 1)
+        for start_offset, length in ((0, 90), (5, 17), (30, 7), (-10, 20), (80, 40), (40, 0)):
+            start = origin + timedelta(days=start_offset)
+            end = start + timedelta(days=length)
+            for category in ('*', 'Men', 'Women', 'Kids'):
+                self.assertEqual(self.index.range_total(start, end, category),
+                                 self.brute_force(start, end, category))
+
+    def test_add_extends_and_updates(self):
+        day = date(2026, 4, 15)
+        self.index.add(day, 'Men', orders=1, units=2, revenue=50)
+        self.index.add(day, 'Kids', orders=1, units=1, revenue=10)
+        self.assertEqual(self.index.range_total(day, day + timedelta(days=1), 'Men'),
+                         {'orders': 1, 'units': 2, 'revenue': 50.0})
+        self.assertEqual(self.index.range_total(date(2026, 1, 1), date(2027, 1, 1), 'Kids')['revenue'], 10.0)
+        self.assertIn('Kids', self.index.categories)
+
+
+class TestRangeEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            admin = User(email='range@test.com', role='admin')
+            admin.set_password('range123')
+            db.session.add(admin)
+            db.session.commit()
+
+            for day in (24, 27, 28, 30):
+                order = Order.create_from_cart_bulk(admin.id, [
+                    {'product_id': 1, 'product_name': 'Coat', 'quantity': 2,
+                     'unit_price': 100.0, 'category_name': 'Women'}
+                ])
+                order.created_at = datetime(2026, 11, day, 10)
+            db.session.commit()
+            rebuild_rollup()
+            db.session.commit()
+            self.token = create_access_token(identity=str(admin.id))
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_black_friday_week(self):
+        response = self.client.get('/api/admin/analytics/range',
+                                   query_string={'from': '2026-11-27', 'to': '2026-12-03', 'breakdown': 'true'},
+                                   headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()['data']
+        self.assertEqual(data['total'], {'orders': 3, 'units': 6, 'revenue': 600.0})
+        self.assertEqual(data['categories'][0]['category'], 'Women')
+        self.assertEqual(data['to'], '2026-12-03')
+
+    def test_index_failure_does_not_fail_committed_checkout(self):
+        with self.app.app_context():
+            user = User.query.one()
+            category = Category(name='Women')
+            product = Product(name='Coat', price=100.0, stock=5, category=category)
+            cart = Cart(user_id=user.id)
+            db.session.add_all([category, product, cart])
+            db.session.flush()
+            db.session.add(CartItem(cart_id=cart.id, product_id=product.id, product_name='Coat',
+                                    quantity=1, unit_price=100.0))
+            db.session.commit()
+            self.app.extensions['revenue_index'] = object()
+
+        with mock.patch('services.revenue_index.record_order', side_effect=RuntimeError('index')):
+            response = self.client.post('/api/cart/checkout', json={'shipping_address': 'Nairobi'},
+                                        headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('revenue_index', self.app.extensions)
+        with self.app.app_context():
+            self.assertEqual(Order.query.count(), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
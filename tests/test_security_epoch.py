@@ -0,0 +1,105 @@
+# Claims-based authorization tests
+# Covers admin_required/login_required with security epochs
+
+import unittest
+from sqlalchemy import event
+from flask import jsonify
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from models.user import User
+from utils.decorators import admin_required, login_required
+
+
+class TestSecurityEpoch(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.add_url_rule('/_test/admin', 'test_admin', admin_required(lambda: jsonify(ok=True)))
+        self.app.add_url_rule('/_test/user', 'test_user', login_required(lambda: jsonify(ok=True)))
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            for email, role in (('root@test.com', 'admin'), ('ops@test.com', 'admin'), ('shopper@test.com', 'customer')):
+                user = User(email=email, role=role)
+                user.set_password('secret123')
+                db.session.add(user)
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def login(self, email):
+        data = self.client.post('/api/auth/login', json={'email': email, 'password': 'secret123'}).get_json()
+        return data['access_token'], data['refresh_token'], data['user']['id']
+
+    def get(self, url, token):
+        return self.client.get(url, headers={'Authorization': f'Bearer {token}'})
+
+    def user_queries(self, fn):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            if 'FROM users' in statement:
+                statements.append(statement)
+
+        with self.app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            result = fn()
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+        return result, len(statements)
+
+    def test_claims_path_skips_user_lookup(self):
+        token, _, _ = self.login('root@test.com')
+        self.assertEqual(self.get('/_test/admin', token).status_code, 200)
+        response, queries = self.user_queries(lambda: self.get('/_test/admin', token))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, 0)
+
+        shopper, _, _ = self.login('shopper@test.com')
+        self.assertEqual(self.get('/_test/admin', shopper).status_code, 403)
+        self.assertEqual(self.get('/_test/user', shopper).status_code, 200)
+
+    def test_demotion_rejects_older_tokens(self):
+        root, _, _ = self.login('root@test.com')
+        ops, ops_refresh, ops_id = self.login('ops@test.com')
+        self.assertEqual(self.get('/_test/admin', ops).status_code, 200)
+
+        response = self.client.put(f'/api/admin/users/{ops_id}', json={'is_admin': False},
+                                   headers={'Authorization': f'Bearer {root}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['data']['role'], 'customer')
+
+        self.assertEqual(self.get('/_test/admin', ops).status_code, 401)
+        response = self.client.post('/api/auth/refresh', headers={'Authorization': f'Bearer {ops_refresh}'})
+        self.assertEqual(response.status_code, 401)
+
+        fresh, _, _ = self.login('ops@test.com')
+        self.assertEqual(self.get('/_test/admin', fresh).status_code, 403)
+        self.assertEqual(self.get('/_test/user', fresh).status_code, 200)
+
+    def test_deleted_user_tokens_are_rejected(self):
+        root, _, _ = self.login('root@test.com')
+        shopper, _, shopper_id = self.login('shopper@test.com')
+        self.assertEqual(self.get('/_test/user', shopper).status_code, 200)
+
+        response = self.client.delete(f'/api/admin/users/{shopper_id}', headers={'Authorization': f'Bearer {root}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get('/_test/user', shopper).status_code, 401)
+
+    def test_tokens_without_epoch_use_database(self):
+        with self.app.app_context():
+            admin_id = User.query.filter_by(email='root@test.com').first().id
+            token = create_access_token(identity=str(admin_id))
+        response, queries = self.user_queries(lambda: self.get('/_test/admin', token))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
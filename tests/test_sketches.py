@@ -0,0 +1,174 @@
+# Analytics sketch tests
+# Covers utils.sketches and the daily sketches in services.sketch_service
+
+import random
+import unittest
+from datetime import datetime, timedelta
+from app import create_app, db
+from models.order import Order
+from models.sketch import DailySketch, SketchDelta
+from models.user import User
+from services.sketch_service import (compact_if_due, compact_sketches, get_sketch_stats, merged_sketches,
+                                     rebuild_sketches, record_new_order)
+from utils.sketches import DDSketch, HyperLogLog
+
+
+class TestHyperLogLog(unittest.TestCase):
+    def test_estimate_within_error(self):
+        hll = HyperLogLog()
+        for i in range(20000):
+            hll.add(i % 10000)
+        self.assertAlmostEqual(hll.count(), 10000, delta=500)
+
+    def test_small_counts_are_exact_enough(self):
+        hll = HyperLogLog()
+        for user_id in (1, 2, 3, 2, 1):
+            hll.add(user_id)
+        self.assertEqual(hll.count(), 3)
+        self.assertEqual(HyperLogLog().count(), 0)
+
+    def test_merge_is_union_and_round_trips(self):
+        left, right = HyperLogLog(), HyperLogLog()
+        for i in range(3000):
+            left.add(i)
+        for i in range(2000, 5000):
+            right.add(i)
+        merged = HyperLogLog.from_bytes(left.to_bytes()).merge(HyperLogLog.from_bytes(right.to_bytes()))
+        self.assertAlmostEqual(merged.count(), 5000, delta=250)
+        self.assertLess(len(HyperLogLog().to_bytes()), 100)
+
+
+class TestDDSketch(unittest.TestCase):
+    def test_quantiles_within_relative_accuracy(self):
+        rng = random.Random(36)
+        values = sorted(rng.lognormvariate(8, 1) for _ in range(5000))
+        sketch = DDSketch()
+        for value in values:
+            sketch.add(value)
+        for q in (0.5, 0.9, 0.95, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            self.assertAlmostEqual(sketch.quantile(q), exact, delta=exact * 0.011)
+
+    def test_merge_round_trip_and_zero(self):
+        left, right = DDSketch(), DDSketch()
+        for value in (0, 100, 200):
+            left.add(value)
+        right.add(300)
+        merged = DDSketch.from_bytes(left.to_bytes()).merge(DDSketch.from_bytes(right.to_bytes()))
+        self.assertEqual(merged.count, 4)
+        self.assertEqual(merged.quantile(0), 0.0)
+        self.assertAlmostEqual(merged.quantile(1), 300, delta=3)
+        self.assertIsNone(DDSketch().quantile(0.5))
+
+
+class TestDailySketches(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        users = [User(email=f'sketch{i}@test.com', role='customer') for i in range(3)]
+        for user in users:
+            user.set_password('sketch123')
+        db.session.add_all(users)
+        db.session.commit()
+
+        self.today = datetime.utcnow().date()
+        now = datetime.utcnow()
+        for days_ago, user, price in ((0, users[0], 100.0), (0, users[1], 200.0),
+                                      (1, users[0], 300.0), (9, users[2], 400.0)):
+            order = Order.create_from_cart_bulk(user.id, [
+                {'product_id': 1, 'product_name': 'Shirt', 'quantity': 1,
+                 'unit_price': price, 'category_name': 'Men'}
+            ])
+            order.created_at = now - timedelta(days=days_ago)
+        db.session.commit()
+        self.users = users
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_rebuild_and_window_stats(self):
+        self.assertEqual(rebuild_sketches(), 6)
+        db.session.commit()
+        stats = get_sketch_stats(self.today - timedelta(days=1), self.today + timedelta(days=1))
+        self.assertEqual(stats['distinctCustomers'], 2)
+        self.assertAlmostEqual(stats['orderValuePercentiles']['p50'], 200.0, delta=2)
+        self.assertAlmostEqual(stats['orderValuePercentiles']['p90'], 200.0, delta=2)
+
+        stats = get_sketch_stats(self.today - timedelta(days=30), self.today + timedelta(days=1))
+        self.assertEqual(stats['distinctCustomers'], 3)
+
+    def new_order(self, user, price):
+        order = Order.create_from_cart_bulk(user.id, [
+            {'product_id': 2, 'product_name': 'Coat', 'quantity': 1,
+             'unit_price': price, 'category_name': 'Women'}
+        ])
+        record_new_order(order)
+        db.session.commit()
+        return order
+
+    def today_order_values(self):
+        return merged_sketches(self.today, self.today + timedelta(days=1))[DailySketch.ORDER_VALUE]
+
+    def test_record_new_order_leaves_sketch_rows_alone(self):
+        rebuild_sketches()
+        db.session.commit()
+        stored = {row.name: row.data for row in DailySketch.query.filter_by(date=self.today)}
+        self.new_order(self.users[2], 1000.0)
+
+        self.assertEqual({row.name: row.data for row in DailySketch.query.filter_by(date=self.today)}, stored)
+        self.assertEqual(SketchDelta.query.count(), 1)
+        stats = get_sketch_stats(self.today, self.today + timedelta(days=1))
+        self.assertEqual(stats['distinctCustomers'], 3)
+        order_values = self.today_order_values()
+        self.assertEqual(order_values.count, 3)
+        self.assertAlmostEqual(order_values.quantile(1), 1000.0, delta=10)
+
+    def test_compaction_folds_deltas(self):
+        rebuild_sketches()
+        db.session.commit()
+        self.new_order(self.users[2], 1000.0)
+        self.new_order(self.users[2], 500.0)
+        before = get_sketch_stats(self.today - timedelta(days=30), self.today + timedelta(days=1))
+
+        self.assertEqual(compact_sketches(batch_size=1), 2)
+        self.assertEqual(SketchDelta.query.count(), 0)
+        self.assertEqual(get_sketch_stats(self.today - timedelta(days=30), self.today + timedelta(days=1)), before)
+        self.assertEqual(self.today_order_values().count, 4)
+        self.assertEqual(compact_sketches(), 0)
+
+    def test_worker_compacts_after_threshold(self):
+        self.app.config['SKETCH_COMPACT_THRESHOLD'] = 2
+        self.new_order(self.users[0], 10.0)
+        self.assertEqual(compact_if_due(), 0)
+        self.new_order(self.users[1], 20.0)
+        self.assertEqual(compact_if_due(), 2)
+        self.assertEqual(SketchDelta.query.count(), 0)
+        self.assertEqual(compact_if_due(), 0)
+
+    def test_record_new_order_on_empty_day(self):
+        self.new_order(self.users[1], 50.0)
+        stats = get_sketch_stats(self.today, self.today + timedelta(days=1))
+        self.assertEqual(stats['distinctCustomers'], 1)
+        compact_sketches()
+        self.assertEqual(DailySketch.query.filter_by(date=self.today).count(), 2)
+        self.assertEqual(get_sketch_stats(self.today, self.today + timedelta(days=1)), stats)
+
+    def test_rebuild_drops_redundant_deltas(self):
+        self.new_order(self.users[1], 50.0)
+        rebuild_sketches()
+        db.session.commit()
+        self.assertEqual(SketchDelta.query.count(), 0)
+        self.assertEqual(self.today_order_values().count, 3)
+
+        result = self.app.test_cli_runner().invoke(args=['analytics', 'compact-sketches'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Folded 0', result.output)
+
+if __name__ == '__main__':
+    unittest.main()
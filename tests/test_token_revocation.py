@@ -0,0 +1,139 @@
+# JWT revocation cache tests
+# Covers utils.bloom and services.token_revocation
+
+import time
+import unittest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from models.tokenblacklist import TokenBlacklist
+from models.user import User
+from services.token_revocation import RevocationCache, is_token_revoked, purge_expired_tokens
+from utils.bloom import BloomFilter
+
+
+class TestBloomFilter(unittest.TestCase):
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        bloom = BloomFilter(5000, error_rate=0.01)
+        for i in range(5000):
+            bloom.add(f'jti-{i}')
+        self.assertTrue(all(f'jti-{i}' in bloom for i in range(5000)))
+        false_positives = sum(f'other-{i}' in bloom for i in range(20000))
+        self.assertLess(false_positives / 20000, 0.02)
+        self.assertTrue(bloom.is_full)
+
+
+class TestRevocationCache(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        user = User(email='revoke@test.com', role='customer')
+        user.set_password('revoke123')
+        db.session.add(user)
+        db.session.add(TokenBlacklist(jti='old-token'))
+        db.session.commit()
+        self.user_id = user.id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def count_statements(self, fn):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            result = fn()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        return result, len(statements)
+
+    def test_not_revoked_is_answered_from_memory(self):
+        cache = RevocationCache(refresh_interval=60)
+        self.assertTrue(cache.is_revoked('old-token'))
+        revoked, statements = self.count_statements(lambda: cache.is_revoked('fresh-token'))
+        self.assertFalse(revoked)
+        self.assertEqual(statements, 0)
+
+    def test_other_workers_see_revocations_after_refresh(self):
+        worker = RevocationCache(refresh_interval=60)
+        self.assertFalse(worker.is_revoked('new-token'))
+
+        db.session.add(TokenBlacklist(jti='new-token'))
+        db.session.commit()
+        # Within the refresh interval the worker has not pulled the row yet
+        self.assertFalse(worker.is_revoked('new-token'))
+        worker.refresh(force=True)
+        self.assertTrue(worker.is_revoked('new-token'))
+
+    def test_late_commit_below_high_water_mark_is_seen(self):
+        worker = RevocationCache(refresh_interval=60)
+        db.session.add(TokenBlacklist(id=10, jti='higher-id'))
+        db.session.commit()
+        worker.refresh(force=True)
+        self.assertEqual(worker.high_water_mark, 10)
+
+        # A transaction that took id 5 commits after id 10 was read
+        db.session.add(TokenBlacklist(id=5, jti='lower-id'))
+        db.session.commit()
+        worker.refresh(force=True)
+        self.assertTrue(worker.is_revoked('lower-id'))
+        self.assertEqual(worker.high_water_mark, 10)
+
+    def test_full_reload_after_interval(self):
+        worker = RevocationCache(refresh_interval=0, full_reload_interval=60)
+        worker.refresh()
+        bloom = worker.bloom
+        worker.refresh()
+        self.assertIs(worker.bloom, bloom)
+        worker.reloaded_at -= 60
+        worker.refresh()
+        self.assertIsNot(worker.bloom, bloom)
+
+    def test_logout_revokes_immediately_on_this_worker(self):
+        token = create_access_token(identity=str(self.user_id))
+        headers = {'Authorization': f'Bearer {token}'}
+        self.assertEqual(self.client.post('/api/auth/logout', headers=headers).status_code, 200)
+        response = self.client.post('/api/auth/logout', headers=headers)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.get_json()['error'], 'token_revoked')
+
+        row = TokenBlacklist.query.filter(TokenBlacklist.jti != 'old-token').one()
+        self.assertAlmostEqual(row.expires_at, datetime.utcnow() + timedelta(hours=1), delta=timedelta(minutes=1))
+
+    def test_expired_tokens_are_not_checked(self):
+        payload = {'jti': 'old-token', 'exp': time.time() - 1}
+        revoked, statements = self.count_statements(lambda: is_token_revoked(payload))
+        self.assertFalse(revoked)
+        self.assertEqual(statements, 0)
+
+    def test_purge_deletes_expired_rows_in_batches(self):
+        now = datetime.utcnow()
+        db.session.add_all(
+            [TokenBlacklist(jti=f'expired-{i}', expires_at=now - timedelta(minutes=i + 1)) for i in range(5)]
+            + [TokenBlacklist(jti='live', expires_at=now + timedelta(hours=1)),
+               TokenBlacklist(jti='legacy', created_at=now - timedelta(days=60))]
+        )
+        db.session.commit()
+
+        self.assertEqual(purge_expired_tokens(batch_size=2), 6)
+        remaining = {row.jti for row in TokenBlacklist.query.all()}
+        self.assertEqual(remaining, {'old-token', 'live'})
+
+        result = self.app.test_cli_runner().invoke(args=['tokens', 'purge'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Purged 0', result.output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+# Email normalization tests
+# Covers case-insensitive registration, login and the unique lower(email) index
+
+import unittest
+from sqlalchemy import event, text
+from sqlalchemy.exc import IntegrityError
+from app import create_app, db
+from models.user import User
+
+
+class TestUserEmails(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def register(self, email):
+        return self.client.post('/api/auth/register', json={'email': email, 'password': 'secret123'})
+
+    def test_emails_are_stored_lowercase(self):
+        response = self.register('  Mixed.Case@Example.COM ')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.get_json()['user']['email'], 'mixed.case@example.com')
+        self.assertEqual(User(email='A@B.com').email, 'a@b.com')
+
+    def test_case_variants_cannot_register_twice(self):
+        self.assertEqual(self.register('dup@example.com').status_code, 201)
+        self.assertEqual(self.register('DUP@example.com').status_code, 400)
+        self.assertEqual(User.query.count(), 1)
+
+    def test_login_ignores_case(self):
+        self.register('login@example.com')
+        response = self.client.post('/api/auth/login', json={'email': 'Login@Example.com', 'password': 'secret123'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_index_rejects_case_variants(self):
+        db.session.add(User(email='raw@example.com', password='x'))
+        db.session.commit()
+        with self.assertRaises(IntegrityError):
+            # Bypasses the model's normalization
+            db.session.execute(text("INSERT INTO users (email, password, security_epoch) VALUES ('RAW@example.com', 'x', 0)"))
+        db.session.rollback()
+
+    def test_lookup_is_one_indexed_statement(self):
+        db.session.add(User(email='probe@example.com', password='x'))
+        db.session.commit()
+        statements = []
+
+        def record(conn, cursor, statement, parameters, *args):
+            statements.append((statement, parameters))
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            self.assertIsNotNone(User.find_by_email('PROBE@example.com'))
+            self.assertIsNone(User.find_by_email(None))
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        self.assertEqual(len(statements), 1)
+        statement, parameters = statements[0]
+        plan = db.session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+        self.assertIn('ix_users_email_lower', ' '.join(str(row) for row in plan))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+# User listing tests
+# Covers keyset pagination and email prefix search on
+# /api/admin/users and /api/auth/users
+
+import unittest
+from sqlalchemy import event
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from models.user import User
+from services.security_epoch import token_claims
+
+
+class TestUserListing(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        admin = User(email='admin@shop.com', role='admin', password='x')
+        db.session.add(admin)
+        for i in range(24):
+            db.session.add(User(email=f'Customer{i:02d}@Example.com', role='customer', password='x'))
+        db.session.add(User(email='under_score@test.com', role='customer', password='x'))
+        db.session.add(User(email='underXscore@test.com', role='customer', password='x'))
+        db.session.commit()
+        token = create_access_token(identity=str(admin.id), additional_claims=token_claims(admin))
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def get(self, path='/api/admin/users', **params):
+        return self.client.get(path, query_string=params, headers=self.headers)
+
+    def test_pages_cover_all_users_newest_first(self):
+        seen, cursor = [], None
+        while True:
+            body = self.get(limit=10, **({'cursor': cursor} if cursor else {})).get_json()
+            seen.extend(user['id'] for user in body['data'])
+            cursor = body['pagination']['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        self.assertEqual(len(seen), User.query.count())
+
+    def test_search_is_case_insensitive_prefix(self):
+        body = self.get(search='customer1', include_total='true').get_json()
+        self.assertEqual(body['pagination']['total'], 10)
+        self.assertTrue(all(user['email'].lower().startswith('customer1') for user in body['data']))
+        self.assertEqual(self.get(search='example.com').get_json()['data'], [])
+
+    def test_search_escapes_like_wildcards(self):
+        emails = [user['email'] for user in self.get(search='under_').get_json()['data']]
+        self.assertEqual(emails, ['under_score@test.com'])
+
+    def test_role_filter_and_projection(self):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            body = self.get(role='admin').get_json()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        self.assertEqual([user['email'] for user in body['data']], ['admin@shop.com'])
+        listing = [s for s in statements if 'ORDER BY users.id DESC' in s]
+        self.assertEqual(len(listing), 1)
+        self.assertNotIn('password', listing[0])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.get(cursor='garbage').status_code, 400)
+
+    def test_auth_users_listing(self):
+        body = self.get('/api/auth/users', limit=5).get_json()
+        self.assertEqual(len(body['users']), 5)
+        self.assertIsNotNone(body['pagination']['next_cursor'])
+        self.assertEqual(set(body['users'][0]), {'id', 'email', 'role', 'created_at'})
+
+
+if __name__ == '__main__':
+    unittest.main()
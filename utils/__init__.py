@@ -5,3 +5,10 @@ Utility functions, decorators, and error handlers
 
 from utils.decorators import admin_required, login_required
 from utils.error_handlers import register_error_handlers, setup_logging
+from utils.pagination import keyset_paginate, keyset_paginate_by_id, encode_cursor, decode_cursor, clamp_limit, check_first_page
+from utils.dates import parse_date_range, parse_datetime_param
+from utils.cache import TTLCache, app_cache
+from utils.sketches import HyperLogLog, DDSketch
+from utils.replica import read_replica, use_replica, replica_engine
+from utils.jwt_cache import CachingJWTManager, VerifiedTokenCache
+from utils.rate_limit import rate_limit, client_ip, request_email, jwt_user
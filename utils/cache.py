@@ -0,0 +1,110 @@
+"""
+In-process TTL cache
+Per-worker cache with single-flight de-duplication of concurrent misses
+"""
+
+import threading
+import time
+from flask import current_app
+
+_registry_lock = threading.Lock()
+
+
+class _Flight:
+    """A computation in progress that other callers can wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """
+    Thread-safe cache whose entries expire after `ttl` seconds.
+    get_or_compute() runs `compute` at most once per key at a time:
+    concurrent callers that miss the same key wait for the first one's
+    result instead of running their own.
+    """
+
+    def __init__(self, ttl, maxsize=256, wait_timeout=30):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._inflight = {}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+        return None
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            if len(self._entries) > self.maxsize:
+                self._evict()
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when key is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def get_or_compute(self, key, compute, ttl=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not leader:
+            if flight.event.wait(self.wait_timeout):
+                if flight.error is not None:
+                    raise flight.error
+                return flight.value
+            # The leader is stuck; compute independently rather than hang
+            return compute()
+
+        try:
+            flight.value = compute()
+        except Exception as e:
+            flight.error = e
+            raise
+        else:
+            self.set(key, flight.value, ttl)
+            return flight.value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def _evict(self):
+        now = time.monotonic()
+        for key in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[key]
+        while len(self._entries) > self.maxsize:
+            oldest = min(self._entries, key=lambda k: self._entries[k][0])
+            del self._entries[oldest]
+
+
+def app_cache(name, ttl):
+    """Return the named TTLCache of the current app, creating it on first use"""
+    caches = current_app.extensions.setdefault('ttl_caches', {})
+    cache = caches.get(name)
+    if cache is None:
+        with _registry_lock:
+            cache = caches.setdefault(name, TTLCache(ttl))
+    return cache
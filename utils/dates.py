@@ -0,0 +1,42 @@
+"""
+Date parameter helpers
+Parses query string dates into naive UTC datetimes for created_at filters
+"""
+
+from datetime import datetime, timedelta, timezone
+
+
+def parse_datetime_param(value):
+    """
+    Parse a YYYY-MM-DD date or an ISO 8601 timestamp.
+    Returns (datetime, is_date_only). Aware timestamps are converted to
+    naive UTC to match the stored created_at values.
+    Raises ValueError for anything else.
+    """
+    value = value.strip()
+    try:
+        if len(value) == 10:
+            return datetime.strptime(value, '%Y-%m-%d'), True
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f'Invalid date: {value!r}. Use YYYY-MM-DD or an ISO 8601 timestamp')
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed, False
+
+
+def parse_date_range(start=None, end=None):
+    """
+    Turn optional start/end query values into a half-open [start, end) range.
+    A bare end date covers that whole day. Missing bounds are returned as None.
+    """
+    start_dt = end_dt = None
+    if start:
+        start_dt, _ = parse_datetime_param(start)
+    if end:
+        end_dt, date_only = parse_datetime_param(end)
+        if date_only:
+            end_dt += timedelta(days=1)
+    if start_dt and end_dt and start_dt >= end_dt:
+        raise ValueError('start_date must be before end_date')
+    return start_dt, end_dt
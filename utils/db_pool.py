@@ -0,0 +1,175 @@
+"""
+Connection pool telemetry
+InstrumentedQueuePool times every checkout and, through pool events,
+counts new connections and invalidations and measures how long
+connections stay checked out. pool_status() reports this for each
+engine on /api/admin/metrics/db-pool.
+"""
+
+import bisect
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+
+# Histogram upper bounds in milliseconds
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class Histogram:
+    """Cumulative millisecond histogram (Prometheus style 'le' buckets)"""
+
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def snapshot(self):
+        buckets, running = {}, 0
+        for bound, count in zip(self.bounds + ('inf',), self.counts):
+            running += count
+            buckets[f'le_{bound}'] = running
+        return {'buckets': buckets, 'count': running,
+                'sumMs': round(self.total, 3), 'maxMs': round(self.max, 3)}
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.checkout_latency = Histogram()
+        self.hold_time = Histogram()
+
+    def record_checkout(self, ms, waited):
+        with self._lock:
+            self.checkouts += 1
+            self.waits += waited
+            self.checkout_latency.observe(ms)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+            self.waits += 1
+
+    def record_hold(self, ms):
+        with self._lock:
+            self.hold_time.observe(ms)
+
+    def count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'timeouts': self.timeouts,
+                'connects': self.connects,
+                'invalidations': self.invalidations,
+                'checkoutLatency': self.checkout_latency.snapshot(),
+                'holdTime': self.hold_time.snapshot()
+            }
+
+
+def _listen(pool, metrics):
+    @event.listens_for(pool, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        metrics.count('connects')
+
+    @event.listens_for(pool, 'invalidate')
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.count('invalidations')
+
+    @event.listens_for(pool, 'checkout')
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info['checked_out_at'] = time.perf_counter()
+
+    @event.listens_for(pool, 'checkin')
+    def on_checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop('checked_out_at', None)
+        if started is not None:
+            metrics.record_hold((time.perf_counter() - started) * 1000)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records checkout latency, waits and timeouts"""
+
+    def __init__(self, *args, **kwargs):
+        recreated = '_dispatch' in kwargs
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+        if not recreated:
+            _listen(self, self.metrics)
+
+    def recreate(self):
+        # Event listeners are carried over to the new pool; so are the
+        # metrics they write to
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _exhausted(self):
+        return self.checkedin() == 0 and 0 <= self._max_overflow <= self.overflow()
+
+    def connect(self):
+        waited = self._exhausted()
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeout:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_checkout((time.perf_counter() - started) * 1000, waited)
+        return connection
+
+
+def pool_status(engine):
+    """Current occupancy and accumulated metrics of engine's pool"""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {'class': type(pool).__name__, 'status': pool.status()}
+    status = {
+        'class': type(pool).__name__,
+        'size': pool.size(),
+        'checkedIn': pool.checkedin(),
+        'checkedOut': pool.checkedout(),
+        'overflow': max(0, pool.overflow()),
+        'maxOverflow': pool._max_overflow,
+        'timeout': pool.timeout()
+    }
+    metrics = getattr(pool, 'metrics', None)
+    if metrics is not None:
+        status.update(metrics.snapshot())
+    return status
+
+
+def _instrumented(options):
+    if 'pool_size' not in options:
+        return options
+    return dict(options, poolclass=options.get('poolclass', InstrumentedQueuePool))
+
+
+def init_pool_metrics(app):
+    """
+    Use InstrumentedQueuePool for the app's engines where pooling is
+    configured: the primary's SQLALCHEMY_ENGINE_OPTIONS and binds given
+    as option dicts
+    """
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = _instrumented(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    binds = app.config.get('SQLALCHEMY_BINDS') or {}
+    app.config['SQLALCHEMY_BINDS'] = {
+        key: _instrumented(value) if isinstance(value, dict) else value
+        for key, value in binds.items()
+    }
@@ -4,19 +4,40 @@ Global error handling and logging utilities
 """
 
 from functools import wraps
-from flask import jsonify
+from flask import jsonify, current_app
 
 from flask_jwt_extended import verify_jwt_in_request, get_jwt, get_jwt_identity
 
+def _claims_mode(claims):
+    """
+    True if the request can be authorized from the token's claims alone.
+    Tokens issued before epochs existed have no 'epoch' claim and take
+    the database path.
+    """
+    return current_app.config.get('AUTHZ_MODE', 'claims') == 'claims' and 'epoch' in claims
+
+def _stale_token():
+    return jsonify({'success': False, 'message': 'Token is no longer valid, please log in again'}), 401
+
 def admin_required(fn):
     """
     Decorator to restrict access to admin users only.
-    Verifies JWT token and checks if user has admin role.
+    Verifies JWT token and checks if user has admin role, from the signed
+    role claim when its security epoch is current, else from the database.
     """
     @wraps(fn)
     def wrapper(*args, **kwargs):
         verify_jwt_in_request()
         user_id = get_jwt_identity()
+        claims = get_jwt()
+        if _claims_mode(claims):
+            from services.security_epoch import claims_are_current
+            if not claims_are_current(user_id, claims):
+                return _stale_token()
+            if claims.get('role') != 'admin':
+                return jsonify({'success': False, 'message': 'Admin access required'}), 403
+            return fn(*args, **kwargs)
+
         from models.user import User
         user = User.query.get(user_id)
         
@@ -28,16 +49,24 @@ def admin_required(fn):
 def login_required(fn):
     """
     Decorator to require authentication.
-    Verifies JWT token is present and valid.
+    Verifies JWT token is present and valid, and that its user still
+    exists (checked through the security epoch cache in claims mode).
     """
     @wraps(fn)
     def wrapper(*args, **kwargs):
         verify_jwt_in_request()
         user_id = get_jwt_identity()
+        claims = get_jwt()
+        if _claims_mode(claims):
+            from services.security_epoch import claims_are_current
+            if not claims_are_current(user_id, claims):
+                return _stale_token()
+            return fn(*args, **kwargs)
+
         from models.user import User
         user = User.query.get(user_id)
         
         if not user:
             return jsonify({'success': False, 'message': 'User not found'}), 404
         return fn(*args, **kwargs)
-    return wrapper
\ No newline at end of file
+    return wrapper
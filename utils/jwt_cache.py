@@ -0,0 +1,106 @@
+"""
+Verified JWT cache
+Remembers the claims of tokens whose signature has already been checked,
+so repeat requests with the same token skip signature verification,
+base64 decoding and JSON parsing. Entries are keyed by the signature
+segment and live until the token's exp; the blocklist and security epoch
+checks still run on every request.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from flask_jwt_extended import JWTManager
+
+
+class VerifiedTokenCache:
+    """Thread-safe LRU of signature -> (token, claims, exp)"""
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(encoded_token):
+        return encoded_token.rpartition('.')[2]
+
+    def get(self, encoded_token):
+        key = self._key(encoded_token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != encoded_token:
+                # A different header or payload under a reused signature
+                # must go through full verification
+                self.misses += 1
+                return None
+            if entry[2] <= time.time():
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def set(self, encoded_token, claims):
+        exp = claims.get('exp')
+        if self.maxsize <= 0 or not isinstance(exp, (int, float)):
+            return
+        with self._lock:
+            key = self._key(encoded_token)
+            self._entries[key] = (encoded_token, dict(claims), exp)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'expired': self.expired,
+                'evictions': self.evictions,
+                'hitRate': round(self.hits / lookups, 4) if lookups else None
+            }
+
+
+def get_verified_token_cache():
+    cache = current_app.extensions.get('jwt_decode_cache')
+    if cache is None:
+        cache = current_app.extensions.setdefault('jwt_decode_cache', VerifiedTokenCache(
+            maxsize=current_app.config.get('JWT_DECODE_CACHE_SIZE', 10000)
+        ))
+    return cache
+
+
+class CachingJWTManager(JWTManager):
+    """
+    JWTManager whose decode path consults the VerifiedTokenCache.
+    Cookie tokens (CSRF checked during decode) and allow_expired decodes
+    always take the full path. _decode_jwt_from_config is private API,
+    hence the Flask-JWT-Extended version bound in requirements.txt.
+    """
+
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        cache = get_verified_token_cache()
+        if csrf_value is not None or allow_expired or cache.maxsize <= 0:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+        claims = cache.get(encoded_token)
+        if claims is None:
+            claims = super()._decode_jwt_from_config(encoded_token)
+            cache.set(encoded_token, claims)
+        return claims
@@ -0,0 +1,91 @@
+"""
+Keyset pagination helpers
+Opaque cursors over (timestamp, id) pairs, or ids alone, for newest-first
+listings
+"""
+
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(timestamp, row_id):
+    """Encode the sort key of the last row on a page as an opaque cursor"""
+    payload = json.dumps([timestamp.isoformat() if timestamp else None, row_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor.
+    Raises ValueError if the cursor is malformed.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(timestamp) if timestamp is not None else None, int(row_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def clamp_limit(limit, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Bound a client supplied page size"""
+    if not limit or limit < 1:
+        return default
+    return min(limit, maximum)
+
+
+def check_first_page(page):
+    """
+    Cursor-paginated listings still accept the offset `page` parameter
+    clients send by default, but only for the first page; raises
+    ValueError for a later one instead of silently returning page 1
+    """
+    if page is not None and page > 1:
+        raise ValueError('page is no longer supported beyond 1; pass pagination.next_cursor as cursor')
+
+
+def keyset_paginate(query, sort_column, id_column, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Fetch one newest-first page of `query` ordered by (sort_column, id_column).
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    Rows must expose the two key columns as attributes of the same name.
+    """
+    if cursor:
+        last_ts, last_id = decode_cursor(cursor)
+        if last_ts is None:
+            raise ValueError('Invalid cursor')
+        query = query.filter(or_(
+            sort_column < last_ts,
+            and_(sort_column == last_ts, id_column < last_id)
+        ))
+
+    rows = query.order_by(sort_column.desc(), id_column.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
+
+
+def keyset_paginate_by_id(query, id_column, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Like keyset_paginate, ordered by id_column alone. For tables whose ids
+    follow creation order, this lists newest first off the primary key.
+    """
+    if cursor:
+        query = query.filter(id_column < decode_cursor(cursor)[1])
+
+    rows = query.order_by(id_column.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = encode_cursor(None, getattr(rows[-1], id_column.key)) if has_more else None
+    return rows, next_cursor
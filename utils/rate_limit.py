@@ -0,0 +1,187 @@
+"""
+Request rate limiting
+Token buckets keyed by client IP, email or user, checked by per-route
+decorators before the view runs. Buckets live in process memory, or in
+the rate_limit_buckets table when RATE_LIMIT_STORAGE is 'database' so
+that every worker enforces the same budget. Rejected requests get 429
+with Retry-After.
+"""
+
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache, wraps
+from flask import current_app, jsonify, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from extensions import db
+from models.rate_limit import RateLimitBucket
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+MAX_KEY_LENGTH = 255
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=64)
+def parse_limit(limit):
+    """'5/minute' -> (capacity 5, refill rate in tokens per second)"""
+    count, _, period = limit.partition('/')
+    period = period.strip().rstrip('s')
+    if period not in PERIODS or not count.strip().isdigit() or int(count) < 1:
+        raise ValueError(f'Invalid rate limit: {limit!r}')
+    return int(count), int(count) / PERIODS[period]
+
+
+def _refill(tokens, updated_at, now, capacity, rate):
+    return min(capacity, tokens + max(0.0, now - updated_at) * rate)
+
+
+class MemoryStore:
+    """
+    Per-process buckets. Beyond max_keys the least recently used bucket
+    is dropped, which at worst hands that key a full bucket again.
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate, cost=1):
+        """Spend cost tokens. Returns 0 if allowed, else seconds until it would be"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = _refill(tokens, updated_at, now, capacity, rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return 0.0 if allowed else (cost - tokens) / rate
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class DatabaseStore:
+    """
+    Buckets in rate_limit_buckets, updated under a row lock in their own
+    transaction so that the request's session is left untouched.
+    """
+
+    def take(self, key, capacity, rate, cost=1):
+        now = time.time()
+        table = RateLimitBucket.__table__
+        with db.engine.begin() as conn:
+            insert = postgresql.insert if conn.dialect.name == 'postgresql' else sqlite.insert
+            conn.execute(insert(table).values(
+                key=key, tokens=capacity, updated_at=now, resets_at=now
+            ).on_conflict_do_nothing(index_elements=['key']))
+            tokens, updated_at = conn.execute(
+                select(table.c.tokens, table.c.updated_at).where(table.c.key == key).with_for_update()
+            ).one()
+            tokens = _refill(tokens, updated_at, now, capacity, rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            conn.execute(table.update().where(table.c.key == key).values(
+                tokens=tokens, updated_at=now, resets_at=now + (capacity - tokens) / rate
+            ))
+        return 0.0 if allowed else (cost - tokens) / rate
+
+    def purge(self):
+        """Delete buckets that have refilled completely. Returns the number deleted."""
+        table = RateLimitBucket.__table__
+        with db.engine.begin() as conn:
+            return conn.execute(table.delete().where(table.c.resets_at <= time.time())).rowcount
+
+
+def get_rate_limit_store():
+    store = current_app.extensions.get('rate_limit_store')
+    if store is None:
+        if current_app.config.get('RATE_LIMIT_STORAGE', 'memory') == 'database':
+            store = DatabaseStore()
+        else:
+            store = MemoryStore(current_app.config.get('RATE_LIMIT_MEMORY_KEYS', 100000))
+        store = current_app.extensions.setdefault('rate_limit_store', store)
+    return store
+
+
+def client_ip():
+    """
+    The client's address. Behind RATE_LIMIT_PROXY_HOPS trusted proxies it
+    is taken that many entries from the end of X-Forwarded-For, since
+    anything further left is set by the client.
+    """
+    hops = current_app.config.get('RATE_LIMIT_PROXY_HOPS', 0)
+    if hops > 0:
+        forwarded = [ip.strip() for ip in request.headers.get('X-Forwarded-For', '').split(',') if ip.strip()]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.remote_addr
+
+
+def request_email():
+    """The email in the JSON body, normalized; None when absent"""
+    data = request.get_json(silent=True)
+    email = data.get('email') if isinstance(data, dict) else None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+def jwt_user():
+    """The authenticated user id; use below @jwt_required()"""
+    return get_jwt_identity()
+
+
+def bucket_key(scope, key):
+    key = f'{scope}:{key}'
+    if len(key) > MAX_KEY_LENGTH:
+        key = f'{scope}:{hashlib.blake2b(key.encode(), digest_size=16).hexdigest()}'
+    return key
+
+
+def too_many_requests(retry_after):
+    response = jsonify({'success': False, 'message': 'Too many requests, please retry later'})
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response, 429
+
+
+def rate_limit(limit_setting, key_func):
+    """
+    Limit a view to the rate configured in app.config[limit_setting]
+    (e.g. RATE_LIMIT_LOGIN_IP = '20/minute') per value of key_func().
+    Requests whose key is None, or with no limit configured, pass.
+    Stacked decorators are checked outermost first; a rejected request
+    does not spend tokens from the inner ones.
+    """
+    scope = limit_setting.lower().replace('rate_limit_', '', 1)
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            config = current_app.config
+            limit = config.get(limit_setting)
+            if config.get('RATE_LIMIT_ENABLED', True) and limit:
+                key = key_func()
+                if key is not None:
+                    capacity, rate = parse_limit(limit)
+                    try:
+                        retry_after = get_rate_limit_store().take(bucket_key(scope, key), capacity, rate)
+                    except Exception:
+                        # An unavailable shared store must not take the endpoint down
+                        logger.exception('Rate limit check for %s failed', scope)
+                        retry_after = 0
+                    if retry_after:
+                        return too_many_requests(retry_after)
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
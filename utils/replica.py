@@ -0,0 +1,81 @@
+"""
+Read replica routing
+Sends the reads of reporting endpoints to the 'replica' bind when it is
+configured, reachable and caught up, and to the primary otherwise.
+"""
+
+import logging
+import time
+from functools import wraps
+from flask import current_app, g
+from sqlalchemy import text
+from extensions import db
+
+REPLICA_BIND = 'replica'
+
+logger = logging.getLogger(__name__)
+
+# Seconds the replica is behind the primary; 0 when fully replayed
+_LAG_SQL = {
+    'postgresql': (
+        "SELECT CASE WHEN NOT pg_is_in_recovery() "
+        "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+    ),
+}
+
+
+def replica_lag(engine):
+    """Replication lag of `engine` in seconds (0 for backends without replication)"""
+    with engine.connect() as conn:
+        sql = _LAG_SQL.get(engine.dialect.name)
+        if sql is None:
+            conn.execute(text('SELECT 1'))
+            return 0.0
+        return float(conn.execute(text(sql)).scalar() or 0)
+
+
+def replica_engine():
+    """
+    The replica engine if it is usable, else None.
+    Health is checked at most every REPLICA_CHECK_INTERVAL seconds per
+    worker; an unreachable or lagging replica is skipped until the next
+    check.
+    """
+    engine = db.engines.get(REPLICA_BIND)
+    if engine is None:
+        return None
+
+    status = current_app.extensions.setdefault('replica_status', {'checked_at': None, 'healthy': False})
+    now = time.monotonic()
+    if status['checked_at'] is None or now - status['checked_at'] >= current_app.config.get('REPLICA_CHECK_INTERVAL', 10):
+        try:
+            lag = replica_lag(engine)
+            healthy = lag <= current_app.config.get('REPLICA_MAX_LAG', 30)
+            if not healthy:
+                logger.warning('Read replica is %.1fs behind; using primary', lag)
+        except Exception as e:
+            logger.warning('Read replica unavailable (%s); using primary', e)
+            healthy = False
+        status.update(checked_at=now, healthy=healthy)
+    return engine if status['healthy'] else None
+
+
+def use_replica():
+    """Route the rest of this request's reads to the replica, if usable"""
+    g.read_replica = replica_engine()
+    return g.read_replica is not None
+
+
+def read_replica(fn):
+    """
+    Decorator for read-only endpoints: their queries run on the replica.
+    Apply below the auth decorators so the user lookup stays on the
+    primary. The choice lasts for the whole request, including streamed
+    responses.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        use_replica()
+        return fn(*args, **kwargs)
+    return wrapper